@@ -1,15 +1,29 @@
 import asyncio
 import json
 import logging
+import math
 import os
 import time
-from dataclasses import dataclass
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from functools import wraps
-from typing import Any, Dict, List, Optional, Protocol, Tuple, runtime_checkable
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Protocol,
+    Set,
+    Tuple,
+    runtime_checkable,
+)
 
-import aioredis
 import numpy as np  # 明示的インポート追加
+import redis.asyncio as aioredis  # aioredis は redis-py に統合済み（同じ API）
 from dotenv import (
     load_dotenv,
 )  # 修正ポイント: 環境変数を読み込むためのライブラリをインポート
@@ -53,6 +67,16 @@ REDIS_WRITE_TIME = Histogram(
 REDIS_ERRORS = Counter(
     "redis_errors_total", "Total Redis operation errors", ["operation"]
 )
+PENDING_WRITES = Gauge(
+    "redis_pending_feature_writes", "Feature keys waiting to be written to Redis"
+)
+COALESCED_WRITES = Counter(
+    "redis_coalesced_feature_writes_total",
+    "Feature updates superseded before being written to Redis",
+)
+FEATURE_CACHE = Counter(
+    "feature_cache_requests_total", "Local feature cache lookups", ["result"]
+)
 
 
 @runtime_checkable
@@ -63,6 +87,10 @@ class WindowProcessor(Protocol):
         """イベント処理メソッド"""
         ...
 
+    async def process_batch(self, events: List[Dict[str, Any]]) -> None:
+        """複数イベントをまとめて処理"""
+        ...
+
     async def flush(self) -> None:
         """バッファの内容をフラッシュ"""
         ...
@@ -76,14 +104,631 @@ class WindowConfig:
     batch_size: int = 100
     max_retries: int = 3
     retry_delay: float = 0.1
+    bucket_width: float = 60.0  # 集計バケットの幅（秒）
+    feature_windows: Tuple[int, ...] = (300, 3600)  # 特徴量の集計ウィンドウ（秒）
+    feature_ttl: int = 3600  # Redis に書き込む特徴量の有効期限（秒）
+    write_interval: float = 0.05  # Redis への書き込みをまとめる間隔（秒）
+    write_batch_size: int = 500  # 1回のパイプラインで送るキー数の上限
+    max_pending_writes: int = 10000  # 未書き込みキーがこの数を超えたら処理を待たせる
+    cache_size: int = 10000  # プロセス内の特徴量キャッシュのキー数上限
+
+
+# --- スライディングウィンドウ集計 ---
+
+
+class _WindowTotals:
+    """ウィンドウ内（またはバケット内）の集計値"""
+
+    __slots__ = (
+        "attempts",
+        "failures",
+        "high_severity",
+        "sessions",
+        "session_sum",
+        "session_sumsq",
+        "peers",
+    )
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self) -> None:
+        self.attempts = 0
+        self.failures = 0
+        self.high_severity = 0
+        self.sessions = 0
+        self.session_sum = 0.0
+        self.session_sumsq = 0.0
+        self.peers: Dict[str, int] = {}  # 相手側キー（ユーザーなら IP）ごとの件数
+
+    def add(
+        self,
+        attempts: int,
+        failures: int,
+        high_severity: int,
+        sessions: int,
+        session_sum: float,
+        session_sumsq: float,
+        peers: Dict[str, int],
+    ) -> None:
+        self.attempts += attempts
+        self.failures += failures
+        self.high_severity += high_severity
+        self.sessions += sessions
+        self.session_sum += session_sum
+        self.session_sumsq += session_sumsq
+        for peer, count in peers.items():
+            self.peers[peer] = self.peers.get(peer, 0) + count
+
+    def subtract(self, other: "_WindowTotals") -> None:
+        self.attempts -= other.attempts
+        self.failures -= other.failures
+        self.high_severity -= other.high_severity
+        self.sessions -= other.sessions
+        self.session_sum -= other.session_sum
+        self.session_sumsq -= other.session_sumsq
+        for peer, count in other.peers.items():
+            remaining = self.peers.get(peer, 0) - count
+            if remaining > 0:
+                self.peers[peer] = remaining
+            else:
+                self.peers.pop(peer, None)
+
+    def is_empty(self) -> bool:
+        return (
+            self.attempts == 0
+            and self.high_severity == 0
+            and self.sessions == 0
+            and not self.peers
+        )
+
+
+class _Bucket(_WindowTotals):
+    """固定幅の時間バケット（index はエポックからのバケット番号）"""
+
+    __slots__ = ("index",)
+
+    def __init__(self):
+        super().__init__()
+        self.index = -1
+
+    def reset(self, index: int) -> None:
+        self.clear()
+        self.index = index
+
+
+class KeyWindowState:
+    """1キー分のバケットのリングバッファとウィンドウごとの累計
+
+    バケットが古いウィンドウから外れるときにその分を累計から差し引くため、
+    イベントの追加は（ウィンドウ数に対して）O(1) で行える。
+    """
+
+    __slots__ = ("buckets", "window_buckets", "totals", "current")
+
+    def __init__(self, window_buckets: Tuple[int, ...]):
+        self.window_buckets = window_buckets
+        self.buckets = [_Bucket() for _ in range(max(window_buckets))]
+        self.totals = [_WindowTotals() for _ in window_buckets]
+        self.current: Optional[int] = None
+
+    def advance(self, index: int) -> bool:
+        """現在のバケットを index まで進め、ウィンドウから外れたバケットを差し引く
+
+        Returns:
+            いずれかのウィンドウの中身が変わったか
+        """
+        size = len(self.buckets)
+        if self.current is None or index - self.current >= size:
+            # 初回、またはリング全体が古くなった場合は作り直す
+            changed = any(not totals.is_empty() for totals in self.totals)
+            for bucket in self.buckets:
+                bucket.index = -1
+            for totals in self.totals:
+                totals.clear()
+            self.current = index
+            self.buckets[index % size].reset(index)
+            return changed
+        changed = False
+        for new in range(self.current + 1, index + 1):
+            for totals, width in zip(self.totals, self.window_buckets):
+                leaving = self.buckets[(new - width) % size]
+                if leaving.index == new - width and not leaving.is_empty():
+                    totals.subtract(leaving)
+                    changed = True
+            self.buckets[new % size].reset(new)
+        self.current = max(self.current, index)
+        return changed
+
+    def add(
+        self,
+        index: int,
+        attempts: int = 0,
+        failures: int = 0,
+        high_severity: int = 0,
+        sessions: int = 0,
+        session_sum: float = 0.0,
+        session_sumsq: float = 0.0,
+        peers: Optional[Dict[str, int]] = None,
+    ) -> bool:
+        """バケット index に集計値を加算（リングより古い場合は破棄して False）"""
+        self.advance(index)
+        age = self.current - index
+        if age >= len(self.buckets):
+            return False
+        bucket = self.buckets[index % len(self.buckets)]
+        if bucket.index != index:
+            bucket.reset(index)
+        values = (
+            attempts,
+            failures,
+            high_severity,
+            sessions,
+            session_sum,
+            session_sumsq,
+            peers or {},
+        )
+        bucket.add(*values)
+        for totals, width in zip(self.totals, self.window_buckets):
+            if age < width:
+                totals.add(*values)
+        return True
+
+
+class KeyEncoder:
+    """文字列キーと連番の整数コードの対応表（コードは clear するまで不変）"""
+
+    __slots__ = ("codes", "names")
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.names: List[str] = []
+
+    def encode(self, name: Any) -> int:
+        """コードを返す（None・空文字は -1）"""
+        if name is None or name == "":
+            return -1
+        name = str(name)
+        code = self.codes.get(name)
+        if code is None:
+            code = self.codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+    def clear(self) -> None:
+        self.codes.clear()
+        self.names.clear()
+
+
+# イベント種別の intern 表（集計で参照する種別は固定のコードにしておく）
+EVENT_TYPES = KeyEncoder()
+LOGIN_ATTEMPT = EVENT_TYPES.encode("login_attempt")
+SESSION_END = EVENT_TYPES.encode("session_end")
+
+# EventBuffer.flags のビット
+FLAG_FAILURE = 1  # ログイン失敗
+FLAG_HIGH = 2  # severity=high
+
+
+@dataclass
+class EventColumns:
+    """イベント列を列ごとの NumPy 配列にしたもの（ベクトル化集計の入力）"""
+
+    timestamps: np.ndarray  # float64（UNIX 秒）
+    user_codes: np.ndarray  # int32（KeyEncoder のコード、なしは -1）
+    ip_codes: np.ndarray  # int32
+    is_login: np.ndarray  # bool
+    is_failure: np.ndarray  # bool（ログイン失敗）
+    is_high: np.ndarray  # bool（severity=high）
+    is_session: np.ndarray  # bool（session_end）
+    durations: np.ndarray  # float64（session_end 以外は 0）
+
+    @classmethod
+    def from_events(
+        cls, events: List[Dict[str, Any]], users: KeyEncoder, ips: KeyEncoder
+    ) -> "EventColumns":
+        buffer = EventBuffer(len(events), users, ips)
+        buffer.extend(events)
+        return buffer.columns()
+
+
+class EventBuffer:
+    """監査イベントを型付き配列に詰めて保持するバッファ
+
+    イベントの dict は追加時に数値へ変換して手放す（1件あたり約 30 バイト）。
+    キーは KeyEncoder の整数コード、種別は intern 済みのコードで保持し、
+    配列はフラッシュ後も使い回す（容量が足りない場合のみ倍に拡張する）。
+    """
+
+    __slots__ = (
+        "users",
+        "ips",
+        "size",
+        "timestamps",
+        "user_codes",
+        "ip_codes",
+        "event_types",
+        "flags",
+        "durations",
+    )
+
+    def __init__(self, capacity: int, users: KeyEncoder, ips: KeyEncoder):
+        self.users = users
+        self.ips = ips
+        self.size = 0
+        self.timestamps = np.empty(max(capacity, 1), np.float64)
+        self.user_codes = np.empty(max(capacity, 1), np.int32)
+        self.ip_codes = np.empty(max(capacity, 1), np.int32)
+        self.event_types = np.empty(max(capacity, 1), np.int16)
+        self.flags = np.empty(max(capacity, 1), np.uint8)
+        self.durations = np.empty(max(capacity, 1), np.float64)
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def capacity(self) -> int:
+        return len(self.timestamps)
+
+    def _reserve(self, count: int) -> None:
+        required = self.size + count
+        if required <= self.capacity:
+            return
+        capacity = max(required, self.capacity * 2)
+        for name in (
+            "timestamps",
+            "user_codes",
+            "ip_codes",
+            "event_types",
+            "flags",
+            "durations",
+        ):
+            self._grow(name, capacity)
+
+    def _grow(self, name: str, capacity: int) -> None:
+        old = getattr(self, name)
+        new = np.empty(capacity, old.dtype)
+        new[: self.size] = old[: self.size]
+        setattr(self, name, new)
+
+    def append(self, event: Dict[str, Any]) -> None:
+        self._reserve(1)
+        i = self.size
+        event_type = EVENT_TYPES.encode(event.get("event_type"))
+        self.timestamps[i] = event_time(event)
+        self.user_codes[i] = self.users.encode(event.get("user_id"))
+        self.ip_codes[i] = self.ips.encode(event.get("source_ip"))
+        self.event_types[i] = event_type
+        self.flags[i] = _event_flags(event, event_type)
+        self.durations[i] = (
+            float(event.get("duration_seconds") or 0.0)
+            if event_type == SESSION_END
+            else 0.0
+        )
+        self.size = i + 1
+
+    def extend(self, events: List[Dict[str, Any]]) -> None:
+        """まとめて追加（列ごとに fromiter で書き込む）"""
+        count = len(events)
+        self._reserve(count)
+        part = slice(self.size, self.size + count)
+        event_types = np.fromiter(
+            (EVENT_TYPES.encode(event.get("event_type")) for event in events),
+            np.int16,
+            count,
+        )
+        self.event_types[part] = event_types
+        self.timestamps[part] = np.fromiter(
+            (event_time(event) for event in events), np.float64, count
+        )
+        self.user_codes[part] = np.fromiter(
+            (self.users.encode(event.get("user_id")) for event in events),
+            np.int32,
+            count,
+        )
+        self.ip_codes[part] = np.fromiter(
+            (self.ips.encode(event.get("source_ip")) for event in events),
+            np.int32,
+            count,
+        )
+        self.flags[part] = np.fromiter(
+            (
+                _event_flags(event, event_type)
+                for event, event_type in zip(events, event_types.tolist())
+            ),
+            np.uint8,
+            count,
+        )
+        self.durations[part] = np.where(
+            event_types == SESSION_END,
+            np.fromiter(
+                (float(event.get("duration_seconds") or 0.0) for event in events),
+                np.float64,
+                count,
+            ),
+            0.0,
+        )
+        self.size += count
+
+    def columns(self) -> EventColumns:
+        """格納済みイベントの列（配列のビュー。clear 前に使い切ること）"""
+        n = self.size
+        event_types = self.event_types[:n]
+        flags = self.flags[:n]
+        return EventColumns(
+            timestamps=self.timestamps[:n],
+            user_codes=self.user_codes[:n],
+            ip_codes=self.ip_codes[:n],
+            is_login=event_types == LOGIN_ATTEMPT,
+            is_failure=(flags & FLAG_FAILURE) != 0,
+            is_high=(flags & FLAG_HIGH) != 0,
+            is_session=event_types == SESSION_END,
+            durations=self.durations[:n],
+        )
+
+    def clear(self) -> None:
+        """件数だけ戻す（配列は次のバッチで再利用）"""
+        self.size = 0
+
+
+def _event_flags(event: Dict[str, Any], event_type: int) -> int:
+    flags = 0
+    if event_type == LOGIN_ATTEMPT and is_login_failure(event):
+        flags |= FLAG_FAILURE
+    if event.get("severity") == "high":
+        flags |= FLAG_HIGH
+    return flags
+
+
+@dataclass
+class WindowedFeatureAggregator:
+    """user_id / source_ip ごとのスライディングウィンドウ特徴量
+
+    ログイン試行数・失敗数・失敗率・相手側の異なり数（ユーザーなら IP 数、
+    IP ならユーザー数）・高重要度イベント数・セッション時間の件数/平均/標準偏差を
+    ウィンドウごとに算出する。時刻はイベントの timestamp を基準にし、
+    時計より先の時刻は現在のバケットの次までに丸める（未来の時刻で
+    ウィンドウ全体が進み、以降のイベントが捨てられるのを防ぐ）。
+    """
+
+    bucket_width: float = 60.0
+    windows: Tuple[int, ...] = (300, 3600)
+    states: Dict[Tuple[str, str], KeyWindowState] = field(default_factory=dict)
+    dirty: Set[Tuple[str, str]] = field(default_factory=set)
+    latest_index: int = 0
+    swept_index: int = 0  # 全キーを latest_index まで進めたバケット
+    users: KeyEncoder = field(default_factory=KeyEncoder)
+    ips: KeyEncoder = field(default_factory=KeyEncoder)
+    clock: Callable[[], float] = time.time
+
+    def __post_init__(self):
+        self.windows = tuple(sorted(self.windows))
+        self.window_buckets = tuple(
+            max(1, math.ceil(window / self.bucket_width)) for window in self.windows
+        )
+
+    def max_timestamp(self) -> float:
+        """受け付けるイベント時刻の上限（これより先の時刻は丸める）"""
+        return self.clock() + self.bucket_width
+
+    def bucket_index(self, timestamp: float) -> int:
+        return int(min(timestamp, self.max_timestamp()) // self.bucket_width)
+
+    def add_event(self, event: Dict[str, Any]) -> None:
+        """1イベントを集計に加える"""
+        index = self.bucket_index(event_time(event))
+        user_id = event.get("user_id")
+        source_ip = event.get("source_ip")
+        event_type = event.get("event_type")
+        is_login = event_type == "login_attempt"
+        duration = (
+            float(event.get("duration_seconds") or 0.0)
+            if event_type == "session_end"
+            else None
+        )
+        values = dict(
+            attempts=int(is_login),
+            failures=int(is_login and is_login_failure(event)),
+            high_severity=int(event.get("severity") == "high"),
+            sessions=int(duration is not None),
+            session_sum=duration or 0.0,
+            session_sumsq=(duration or 0.0) ** 2,
+        )
+        # キーの有無は KeyEncoder と同じ基準（None・空文字はキーなし）で判定する
+        has_user = user_id is not None and user_id != ""
+        has_ip = source_ip is not None and source_ip != ""
+        if has_user:
+            peers = {str(source_ip): 1} if has_ip else {}
+            self.add(("user", str(user_id)), index, peers=peers, **values)
+        if has_ip:
+            peers = {str(user_id): 1} if has_user else {}
+            self.add(("ip", str(source_ip)), index, peers=peers, **values)
+
+    def add_batch(self, events: List[Dict[str, Any]]) -> None:
+        """イベント列をまとめて集計に加える（add_event を順に呼ぶのと同じ結果）"""
+        if events:
+            self.add_columns(EventColumns.from_events(events, self.users, self.ips))
+
+    def add_columns(self, columns: EventColumns) -> None:
+        """(キー, バケット) ごとに NumPy でまとめて集計してからリングに加える
+
+        Python の処理はイベント数ではなく (キー, バケット) の組の数に比例する。
+        """
+        indexes = np.floor_divide(
+            np.minimum(columns.timestamps, self.max_timestamp()), self.bucket_width
+        ).astype(np.int64)
+        for kind, codes, peer_codes, names, peer_names in (
+            ("user", columns.user_codes, columns.ip_codes, self.users, self.ips),
+            ("ip", columns.ip_codes, columns.user_codes, self.ips, self.users),
+        ):
+            valid = codes >= 0
+            if not valid.any():
+                continue
+            code = codes[valid]
+            bucket = indexes[valid]
+            # (バケット, キー) を1つの整数にまとめて並べ替え（バケットの昇順になる）
+            width = int(code.max()) + 1
+            base = int(bucket.min())
+            groups, inverse = np.unique(
+                (bucket - base) * width + code, return_inverse=True
+            )
+            inverse = inverse.reshape(-1)
+            count = len(groups)
+
+            def total(values: np.ndarray) -> np.ndarray:
+                return np.bincount(inverse, weights=values, minlength=count)
+
+            durations = columns.durations[valid]
+            attempts = total(columns.is_login[valid])
+            failures = total(columns.is_failure[valid])
+            high = total(columns.is_high[valid])
+            sessions = total(columns.is_session[valid])
+            session_sum = total(durations)
+            session_sumsq = total(durations * durations)
+
+            # 相手側キーの (グループ, 相手) ごとの件数
+            peers: List[Dict[str, int]] = [{} for _ in range(count)]
+            peer = peer_codes[valid]
+            has_peer = peer >= 0
+            if has_peer.any():
+                peer_width = int(peer.max()) + 1
+                pairs, pair_counts = np.unique(
+                    inverse[has_peer] * peer_width + peer[has_peer], return_counts=True
+                )
+                for pair, pair_count in zip(pairs.tolist(), pair_counts.tolist()):
+                    group, peer_code = divmod(pair, peer_width)
+                    peers[group][peer_names.names[peer_code]] = pair_count
+
+            for i, group in enumerate(groups.tolist()):
+                bucket_offset, key_code = divmod(group, width)
+                self.add(
+                    (kind, names.names[key_code]),
+                    base + bucket_offset,
+                    attempts=int(attempts[i]),
+                    failures=int(failures[i]),
+                    high_severity=int(high[i]),
+                    sessions=int(sessions[i]),
+                    session_sum=float(session_sum[i]),
+                    session_sumsq=float(session_sumsq[i]),
+                    peers=peers[i],
+                )
+
+    def add(self, key: Tuple[str, str], index: int, **values) -> None:
+        """キーのバケットに集計値を加算（ベクトル化した集計結果のマージにも使う）"""
+        state = self.states.get(key)
+        if state is None:
+            state = self.states[key] = KeyWindowState(self.window_buckets)
+        if state.add(index, **values):
+            self.dirty.add(key)
+        self.latest_index = max(self.latest_index, index)
+
+    def features(self, key: Tuple[str, str]) -> Dict[str, float]:
+        """キーの全ウィンドウの特徴量 {特徴量名: 値}"""
+        kind = key[0]
+        peer_name = "distinct_ips" if kind == "user" else "distinct_users"
+        state = self.states[key]
+        state.advance(self.latest_index)
+        result: Dict[str, float] = {}
+        for window, totals in zip(self.windows, state.totals):
+            suffix = f"{window}s"
+            sessions = totals.sessions
+            mean = totals.session_sum / sessions if sessions else 0.0
+            # 累計の差し引きによる丸め誤差で1件でも分散が出ないようにする
+            variance = (
+                max(totals.session_sumsq / sessions - mean * mean, 0.0)
+                if sessions > 1
+                else 0.0
+            )
+            result.update(
+                {
+                    f"{kind}_login_attempts_{suffix}": totals.attempts,
+                    f"{kind}_login_failures_{suffix}": totals.failures,
+                    f"{kind}_failure_rate_{suffix}": (
+                        totals.failures / totals.attempts if totals.attempts else 0.0
+                    ),
+                    f"{kind}_{peer_name}_{suffix}": len(totals.peers),
+                    f"{kind}_high_severity_{suffix}": totals.high_severity,
+                    f"{kind}_session_count_{suffix}": sessions,
+                    f"{kind}_session_mean_{suffix}": mean,
+                    f"{kind}_session_std_{suffix}": math.sqrt(variance),
+                }
+            )
+        return result
+
+    def collect(self) -> Dict[str, float]:
+        """値が変わったキーの特徴量を Redis キー形式（feature:<名前>:<キー>）で返す
+
+        イベントが来たキーに加え、時間の経過でバケットがウィンドウから外れたキーも
+        対象にする。最大ウィンドウが空になったキーは 0 を出力してから状態を破棄する。
+        """
+        if self.latest_index > self.swept_index:
+            # バケットが進んだときだけ全キーを進める（バケット幅ごとに1回）
+            for key, state in self.states.items():
+                if key not in self.dirty and state.advance(self.latest_index):
+                    self.dirty.add(key)
+            self.swept_index = self.latest_index
+        collected: Dict[str, float] = {}
+        for key in self.dirty:
+            for name, value in self.features(key).items():
+                collected[feature_key(name, key[1])] = value
+            if self.states[key].totals[-1].is_empty():
+                del self.states[key]
+        self.dirty.clear()
+        return collected
+
+    def release_codes(self) -> None:
+        """キーの整数コードを破棄（未集計のイベントが残っていないときに呼ぶ）
+
+        コードはバッファから集計までの間だけ使うため、フラッシュごとに作り直して
+        過去に現れた全ユーザー・IP の対応表が残り続けないようにする。
+        """
+        self.users.clear()
+        self.ips.clear()
+
+
+def feature_key(feature_name: str, key: str) -> str:
+    """特徴量の Redis キー（get_feature と同じ形式）"""
+    return f"feature:{feature_name}:{key}"
+
+
+def event_time(event: Dict[str, Any]) -> float:
+    """イベントの発生時刻（UNIX 秒。timestamp がなければ現在時刻）"""
+    timestamp = event.get("timestamp")
+    if timestamp is None:
+        return time.time()
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    if isinstance(timestamp, datetime):
+        return timestamp.timestamp()
+    return datetime.fromisoformat(str(timestamp)).timestamp()
+
+
+def is_login_failure(event: Dict[str, Any]) -> bool:
+    """ログイン試行が失敗か（success=False または status="failure"）"""
+    return event.get("success") is False or event.get("status") == "failure"
+
+
+FeatureSink = Callable[[Dict[str, float]], Awaitable[Any]]
 
 
 class ProcessWindowFunction(WindowProcessor):
     """完全実装されたウィンドウ処理関数"""
 
-    def __init__(self, config: WindowConfig):
+    def __init__(
+        self,
+        config: WindowConfig,
+        aggregator: Optional[WindowedFeatureAggregator] = None,
+        sink: Optional[FeatureSink] = None,
+    ):
         self.config = config
-        self.buffer: List[Dict[str, Any]] = []
+        self.aggregator = aggregator or WindowedFeatureAggregator(
+            config.bucket_width, config.feature_windows
+        )
+        self.sink = sink
+        # イベントは dict のまま溜めず、型付き配列に変換して保持する
+        self.buffer = EventBuffer(
+            config.batch_size, self.aggregator.users, self.aggregator.ips
+        )
         self.last_flush_time: float = time.time()
 
     async def process(self, event: Dict[str, Any]) -> None:
@@ -96,20 +741,47 @@ class ProcessWindowFunction(WindowProcessor):
         ):
             await self.flush()
 
+    async def process_batch(self, events: List[Dict[str, Any]]) -> None:
+        """複数イベントをバッファに追加（集計はフラッシュ時に列指向で一括実行）"""
+        self.buffer.extend(events)
+
+        if (
+            len(self.buffer) >= self.config.batch_size
+            or time.time() - self.last_flush_time >= self.config.window_size
+        ):
+            await self.flush()
+
     async def flush(self) -> None:
-        """バッファの内容をフラッシュ"""
-        if not self.buffer:
+        """バッファのイベントを集計し、更新された特徴量を sink に渡す"""
+        if not self.buffer and not self.aggregator.dirty:
             return
 
         try:
             processed = len(self.buffer)
+            if processed:
+                self.aggregator.add_columns(self.buffer.columns())
             self.buffer.clear()
             self.last_flush_time = time.time()
+            await self._emit()
+            if not self.buffer:
+                self.aggregator.release_codes()
             logging.info(f"Processed batch of {processed} events")
         except Exception as e:
             logging.error(f"Batch processing failed: {e}")
             raise
 
+    async def _emit(self) -> None:
+        """特徴量を sink に渡す（失敗時はキーを更新済みに戻し、次回のフラッシュで再送）"""
+        dirty = set(self.aggregator.dirty)
+        features = self.aggregator.collect()
+        if not features or self.sink is None:
+            return
+        try:
+            await self.sink(features)
+        except Exception:
+            self.aggregator.dirty |= dirty & self.aggregator.states.keys()
+            raise
+
 
 def retry_mechanism(max_retries: int = 3, delay: float = 0.1):
     """リトライデコレータ"""
@@ -133,40 +805,184 @@ def retry_mechanism(max_retries: int = 3, delay: float = 0.1):
     return decorator
 
 
-class HybridWindowFunction(WindowProcessor):
-    """ハイブリッドウィンドウ処理機能"""
+class HybridWindowFunction(ProcessWindowFunction):
+    """ハイブリッドウィンドウ処理機能（フラッシュ失敗時にリトライ）"""
 
-    def __init__(self, config: WindowConfig):
-        self.config = config
-        self.buffer: List[Dict[str, Any]] = []
-        self.last_flush_time: float = time.time()
+    @retry_mechanism(max_retries=3, delay=0.1)
+    async def flush(self) -> None:
+        """バッファのイベントを集計し、更新された特徴量を sink に渡す"""
+        if self.buffer:
+            BATCH_WRITE_SIZE.set(len(self.buffer))
+        await super().flush()
 
-    async def process(self, event: Dict[str, Any]) -> None:
-        """イベントを処理"""
-        self.buffer.append(event)
 
-        if (
-            len(self.buffer) >= self.config.batch_size
-            or time.time() - self.last_flush_time >= self.config.window_size
-        ):
+class RedisFeatureWriter:
+    """特徴量をまとめて Redis に書き込むバックグラウンドライター
+
+    submit された値はキーごとに最新値だけを保持し（同じキーの更新は上書き）、
+    write_interval ごとに write_batch_size 件ずつのパイプラインで setex する。
+    Redis への往復回数はイベント数ではなく、更新されたキーの数で決まる。
+    未書き込みのキーが max_pending を超えると、submit は書き込みが進むまで待つ。
+    """
+
+    def __init__(
+        self,
+        ttl: int,
+        interval: float = 0.05,
+        batch_size: int = 500,
+        max_pending: int = 10000,
+    ):
+        self.ttl = ttl
+        self.interval = interval
+        self.batch_size = max(batch_size, 1)
+        self.max_pending = max(max_pending, 1)
+        self.client: Optional[aioredis.Redis] = None
+        self.pending: Dict[str, Any] = {}
+        self._wakeup = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def start(self, client: aioredis.Redis) -> None:
+        """書き込みタスクを開始"""
+        self.client = client
+        self._stopping = False
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """書き込みタスクを停止し、残りを書き込む
+
+        書き込み途中のバッチを失わないよう、タスクはキャンセルせずに
+        現在の周期を終えさせてから止める。
+        """
+        self._stopping = True
+        self._wakeup.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        if self.client is not None:
             await self.flush()
 
-    @retry_mechanism(max_retries=3, delay=0.1)
+    async def submit(self, features: Dict[str, Any]) -> None:
+        """書き込み予約（未書き込みが上限を超えている間は待つ）"""
+        pending = self.pending
+        for key, value in features.items():
+            if key in pending:
+                COALESCED_WRITES.inc()
+            pending[key] = value
+        PENDING_WRITES.set(len(pending))
+
+        if len(pending) > self.max_pending:
+            # 間隔を待たずに書き込ませ、減るまで呼び出し元を待たせる
+            self._wakeup.set()
+            self._drained.clear()
+            if self._task is None or self._task.done():
+                # 書き込みタスクが動いていない場合はその場で書き込む
+                await self.flush()
+            else:
+                await self._drained.wait()
+
     async def flush(self) -> None:
-        """バッファの内容をフラッシュ"""
-        if not self.buffer:
-            return
+        """未書き込みのキーをすべて書き込む"""
+        while self.pending:
+            await self._write_batch()
 
-        BATCH_WRITE_SIZE.set(len(self.buffer))
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._stopping:
+                break
+            try:
+                await self.flush()
+            except aioredis.RedisError:
+                # 失敗したキーは pending に戻っている。次の周期で再送する
+                await asyncio.sleep(self.interval)
+            except Exception as e:
+                # 想定外のエラーでもタスクを終わらせず、書き込みを続ける
+                logging.error(f"Feature writer error: {e}", exc_info=True)
+                REDIS_ERRORS.labels(operation="feature_writer").inc()
+                await asyncio.sleep(self.interval)
 
+    async def _write_batch(self) -> None:
+        if self.client is None:
+            raise ValueError("Redis connection pool not initialized")
+
+        batch = []
+        for key in self.pending:
+            batch.append(key)
+            if len(batch) >= self.batch_size:
+                break
+        items = [(key, self.pending.pop(key)) for key in batch]
+        PENDING_WRITES.set(len(self.pending))
+
+        start_time = time.time()
         try:
-            processed = len(self.buffer)
-            self.buffer.clear()
-            self.last_flush_time = time.time()
-            logging.info(f"Processed batch of {processed} events")
-        except Exception as e:
-            logging.error(f"Batch processing failed: {e}")
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key, value in items:
+                    pipe.setex(key, self.ttl, str(value))
+                BATCH_WRITE_SIZE.set(len(items))
+                await pipe.execute()
+            REDIS_OPS.labels(operation="set").inc(len(items))
+            REDIS_WRITE_TIME.observe(time.time() - start_time)
+        except BaseException as e:
+            if isinstance(e, aioredis.RedisError):
+                logging.error(f"Redis batch write failed: {e}")
+                REDIS_ERRORS.labels(operation="batch_write").inc()
+            # キャンセルされた場合も含めて未書き込みに戻す
+            # （書き込み中に新しい値が届いたキーはそちらを優先する）
+            for key, value in items:
+                self.pending.setdefault(key, value)
+            PENDING_WRITES.set(len(self.pending))
             raise
+        finally:
+            if len(self.pending) <= self.max_pending // 2:
+                self._drained.set()
+
+
+class FeatureCache:
+    """特徴量のプロセス内キャッシュ（LRU + TTL）
+
+    Redis のキー（feature:<名前>:<キー>）ごとに変換済みの値を保持する。
+    Redis に値がなかったことも None として保持し、同じキーを何度も問い合わせない。
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Optional[float]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, key: str) -> Tuple[bool, Optional[float]]:
+        """(ヒットしたか, 値)。期限切れのエントリは捨てる"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def update(self, values: Dict[str, Optional[float]]) -> None:
+        expires_at = time.monotonic() + self.ttl
+        entries = self._entries
+        for key, value in values.items():
+            entries[key] = (expires_at, value)
+            entries.move_to_end(key)
+        while len(entries) > self.maxsize:
+            entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
 
 
 class FeatureEngine:
@@ -187,7 +1003,20 @@ class FeatureEngine:
         self.redis_url = redis_url
         self.config = config or WindowConfig()
         self.redis_pool: Optional[aioredis.Redis] = None
-        self.window_processor: WindowProcessor = HybridWindowFunction(self.config)
+        self.aggregator = WindowedFeatureAggregator(
+            self.config.bucket_width, self.config.feature_windows
+        )
+        self.writer = RedisFeatureWriter(
+            self.config.feature_ttl,
+            self.config.write_interval,
+            self.config.write_batch_size,
+            self.config.max_pending_writes,
+        )
+        # 特徴量は window_size ごとのフラッシュで更新されるため、同じ間隔で期限切れにする
+        self.cache = FeatureCache(self.config.cache_size, self.config.window_size)
+        self.window_processor: WindowProcessor = HybridWindowFunction(
+            self.config, self.aggregator, self._store_features_in_redis
+        )
 
         # Prometheusメトリクスサーバー起動
         start_http_server(8000)
@@ -197,10 +1026,12 @@ class FeatureEngine:
         self.redis_pool = await aioredis.from_url(
             self.redis_url, max_connections=10, decode_responses=True
         )
+        self.writer.start(self.redis_pool)
 
     async def close(self) -> None:
-        """リソースの解放"""
+        """リソースの解放（未書き込みの特徴量は書き込んでから閉じる）"""
         if self.redis_pool:
+            await self.writer.stop()
             await self.redis_pool.close()
 
     async def process_event(self, event: Dict[str, Any]) -> None:
@@ -216,10 +1047,43 @@ class FeatureEngine:
             logging.error(f"Error processing event: {e}")
             raise
 
-    async def _calculate_features(self, event: Dict[str, Any]) -> None:
-        """特徴量を計算"""
-        current_time = time.time()
+    async def process_batch(self, events: List[Dict[str, Any]]) -> None:
+        """監査ログイベントをまとめて処理
+
+        ウィンドウ特徴量はフラッシュ時に NumPy で一括集計し、
+        Prometheus のカウンタもラベルごとにまとめて加算する。
 
+        Args:
+            events: 監査ログイベントデータのリスト
+        """
+        try:
+            await self.window_processor.process_batch(events)
+            self._calculate_batch_metrics(events)
+        except Exception as e:
+            logging.error(f"Error processing event batch: {e}")
+            raise
+
+    def _calculate_batch_metrics(self, events: List[Dict[str, Any]]) -> None:
+        """process_batch 用のメトリクス更新（ラベルごとに1回だけ inc する）"""
+        attempts: Dict[str, int] = {}
+        abnormal: Dict[str, int] = {}
+        for event in events:
+            event_type = event.get("event_type")
+            if event_type == "login_attempt":
+                user_id = event["user_id"]
+                attempts[user_id] = attempts.get(user_id, 0) + 1
+            elif event_type == "session_end":
+                SESSION_DURATION.observe(event["duration_seconds"])
+            if event.get("severity") == "high":
+                ip = event["source_ip"]
+                abnormal[ip] = abnormal.get(ip, 0) + 1
+        for user_id, count in attempts.items():
+            LOGIN_ATTEMPTS.labels(user_id=user_id).inc(count)
+        for ip, count in abnormal.items():
+            ABNORMAL_REQUESTS.labels(ip_address=ip).inc(count)
+
+    async def _calculate_features(self, event: Dict[str, Any]) -> None:
+        """イベント単位のメトリクスを更新（ウィンドウ特徴量はフラッシュ時に集計）"""
         if event.get("event_type") == "login_attempt":
             user_id = event["user_id"]
             LOGIN_ATTEMPTS.labels(user_id=user_id).inc()
@@ -232,52 +1096,27 @@ class FeatureEngine:
             duration = event["duration_seconds"]
             SESSION_DURATION.observe(duration)
 
-    @retry_mechanism(max_retries=3, delay=0.1)
     async def _store_features_in_redis(self, features: Dict[str, Any]) -> None:
-        """特徴量をRedisにバッチ書き込み
+        """特徴量を書き込みキューに追加（書き込みは RedisFeatureWriter が行う）
 
         Args:
             features: 特徴量辞書 {feature_key: feature_value}
         """
         if not self.redis_pool:
             raise ValueError("Redis connection pool not initialized")
+        # 自分で計算した値はキャッシュにも書き込む（直後の読み出しで Redis を引かない）
+        self.cache.update({key: float(value) for key, value in features.items()})
+        await self.writer.submit(features)
 
-        start_time = time.time()
-        try:
-            async with self.redis_pool.pipeline(transaction=False) as pipe:
-                for key, value in features.items():
-                    pipe.setex(key, 300, str(value))
-                    REDIS_OPS.labels(operation="set").inc()
-
-                BATCH_WRITE_SIZE.set(len(features))
-
-                results = await pipe.execute()
-
-                successful_ops = len([r for r in results if r])
-                logging.debug(
-                    f"Redis batch write: {successful_ops}/{len(features)} successful"
-                )
-
-                REDIS_WRITE_TIME.observe(time.time() - start_time)
-
-                return successful_ops
-
-        except aioredis.RedisError as e:
-            logging.error(f"Redis batch write failed: {e}")
-            REDIS_ERRORS.labels(operation="batch_write").inc()
-            raise
-
-    @REDIS_WRITE_TIME.time()
     async def _async_write_to_redis(self, user_id, features):
-        """Redisへの非同期書き込み"""
+        """ユーザー単位の特徴量をまとめて書き込みキューに追加"""
         try:
-            redis = await self._get_redis()
-            await redis.setex(f"user_features:{user_id}", 300, json.dumps(features))
+            await self.writer.submit({f"user_features:{user_id}": json.dumps(features)})
         except Exception as e:
             logging.error(f"Redis書き込みエラー: {str(e)}", exc_info=True)
 
     async def get_feature(self, feature_name: str, key: str) -> Optional[float]:
-        """Redisから特徴量を取得
+        """特徴量を取得（ローカルキャッシュになければ Redis から）
 
         Args:
             feature_name: 特徴量名
@@ -286,16 +1125,48 @@ class FeatureEngine:
         Returns:
             特徴量値 or None
         """
+        features = await self.get_features([(feature_name, key)])
+        return features[(feature_name, key)]
+
+    async def get_features(
+        self, requests: Iterable[Tuple[str, str]]
+    ) -> Dict[Tuple[str, str], Optional[float]]:
+        """複数の特徴量をまとめて取得（キャッシュにないものは1回の MGET で取得）
+
+        Args:
+            requests: (特徴量名, キー) の並び
+
+        Returns:
+            {(特徴量名, キー): 特徴量値 or None}
+        """
+        results: Dict[Tuple[str, str], Optional[float]] = {}
+        misses: Dict[str, Tuple[str, str]] = {}
+        for request in requests:
+            redis_key = feature_key(*request)
+            hit, value = self.cache.lookup(redis_key)
+            results[request] = value
+            if not hit:
+                misses[redis_key] = request
+        FEATURE_CACHE.labels(result="hit").inc(len(results) - len(misses))
+        if not misses:
+            return results
+        FEATURE_CACHE.labels(result="miss").inc(len(misses))
+
         if not self.redis_pool:
-            return None
+            return results
 
-        try:
-            value = await self.redis_pool.get(f"feature:{feature_name}:{key}")
-            REDIS_OPS.labels(operation="get").inc()
-            return float(value) if value else None
-        except (ValueError, TypeError) as e:
-            logging.error(f"Feature value conversion error: {e}")
-            return None
+        values = await self.redis_pool.mget(list(misses))
+        REDIS_OPS.labels(operation="mget").inc()
+        fetched: Dict[str, Optional[float]] = {}
+        for redis_key, value in zip(misses, values):
+            try:
+                fetched[redis_key] = float(value) if value else None
+            except (ValueError, TypeError) as e:
+                logging.error(f"Feature value conversion error: {e}")
+                continue
+            results[misses[redis_key]] = fetched[redis_key]
+        self.cache.update(fetched)
+        return results
 
     def clear(self, context):
         """状態管理のクリア処理実装"""
@@ -0,0 +1,111 @@
+"""
+非同期データベース接続設定
+FastAPI ハンドラ用の AsyncEngine / AsyncSession（SQLite は aiosqlite、PostgreSQL は asyncpg）
+"""
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from packages.backend.database import DATABASE_URL
+from packages.backend.db_pool import (
+    SQLITE_READ_POOL_SIZE,
+    SQLITE_WRITE_TIMEOUT,
+    RoutingSession,
+    TimedAsyncQueuePool,
+    is_file_sqlite,
+    label_pool,
+    set_sqlite_pragma,
+    set_sqlite_reader_pragma,
+)
+
+# 同期ドライバ名 → 非同期ドライバ名
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+
+def to_async_url(url: str) -> str:
+    """同期用の DATABASE_URL を非同期ドライバの URL に変換"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"Unsupported database for async engine: {backend}")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(
+        hide_password=False
+    )
+
+
+ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+
+# 読み取り専用エンジン（SQLite ファイル DB の場合のみ）
+async_read_engine = None
+
+if is_file_sqlite(DATABASE_URL):
+    # 同期エンジンと同じく書き込み1接続 + 読み取りプール
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        connect_args={"timeout": 30},
+        poolclass=TimedAsyncQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=SQLITE_WRITE_TIMEOUT,
+        echo=False,
+    )
+    async_read_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        connect_args={"timeout": 30},
+        poolclass=TimedAsyncQueuePool,
+        pool_size=SQLITE_READ_POOL_SIZE,
+        max_overflow=0,
+        echo=False,
+    )
+    label_pool(async_engine.sync_engine, "async_writer")
+    label_pool(async_read_engine.sync_engine, "async_reader")
+
+    # SQLiteの最適化設定（同期エンジンと同じ）
+    event.listen(async_engine.sync_engine, "connect", set_sqlite_pragma)
+    event.listen(async_read_engine.sync_engine, "connect", set_sqlite_reader_pragma)
+
+elif ASYNC_DATABASE_URL.startswith("sqlite"):
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        connect_args={"timeout": 30},
+        poolclass=StaticPool,
+        echo=False,
+    )
+    event.listen(async_engine.sync_engine, "connect", set_sqlite_pragma)
+
+else:
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        pool_size=10,
+        max_overflow=20,
+        pool_pre_ping=True,
+        echo=False,
+    )
+
+# セッション設定（コミット後もレスポンス生成で属性を参照するため expire しない）
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False,
+    reader=async_read_engine.sync_engine if async_read_engine else None,
+)
+
+
+async def get_async_db():
+    """非同期データベースセッションを取得"""
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+async def dispose_async_engines():
+    """プール済み接続を閉じる（aiosqlite の接続スレッドを終了させる）"""
+    await async_engine.dispose()
+    if async_read_engine is not None:
+        await async_read_engine.dispose()
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+FastAPI アプリのエンドポイント別レイテンシ計測
+httpx の ASGI トランスポートでプロセス内から呼び出し（ネットワークを介さない）、
+シナリオごとの p50/p95/p99 と requests/sec を JSON で出力する。
+--baseline を指定すると保存済みの結果と比較し、劣化があれば終了コード 1 を返す。
+
+例:
+    DATABASE_URL=sqlite:////tmp/perf.db python packages/backend/seed_perf_data.py
+    DATABASE_URL=sqlite:////tmp/perf.db python packages/backend/benchmark_api.py \\
+        --requests 500 --concurrency 8 --output current.json --baseline baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import random
+import sys
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# プロジェクトルートをPythonパスに追加
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+BENCH_USERNAME = "bench_user"
+BENCH_PASSWORD = "bench-password"
+
+
+@dataclass
+class Scenario:
+    """1種類のリクエスト（パスと本文は呼び出しごとに生成）"""
+
+    name: str
+    method: str
+    path: Callable[["BenchContext"], str]
+    body: Optional[Callable[["BenchContext"], Dict[str, Any]]] = None
+    authenticated: bool = True
+
+
+class BenchContext:
+    """シナリオが参照する ID 範囲・トークンなど"""
+
+    def __init__(self, id_ranges: Dict[str, range], user_id: int, seed: int):
+        self.id_ranges = id_ranges
+        self.user_id = user_id
+        self.rng = random.Random(seed)
+        self.token: Optional[str] = None
+
+    def pick(self, table: str) -> int:
+        ids = self.id_ranges.get(table)
+        return self.rng.choice(ids) if ids else 1
+
+    def unique(self) -> str:
+        return uuid.UUID(int=self.rng.getrandbits(128)).hex[:12]
+
+
+def _list(path: str) -> Callable[[BenchContext], str]:
+    return lambda ctx: path
+
+
+def _detail(path: str, table: str) -> Callable[[BenchContext], str]:
+    return lambda ctx: f"{path}/{ctx.pick(table)}"
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario(
+        "auth.login",
+        "POST",
+        _list("/api/auth/login"),
+        lambda ctx: {"username": BENCH_USERNAME, "password": BENCH_PASSWORD},
+        authenticated=False,
+    ),
+    Scenario("auth.me", "GET", _list("/api/auth/me")),
+]
+for _name, _path, _table, _create, _update in [
+    (
+        "incidents",
+        "/api/incidents",
+        "incidents",
+        lambda ctx: {
+            "title": f"bench {ctx.unique()}",
+            "description": "benchmark",
+            "reporter_id": ctx.user_id,
+        },
+        lambda ctx: {"title": f"bench {ctx.unique()}"},
+    ),
+    (
+        "problems",
+        "/api/problems",
+        "problems",
+        lambda ctx: {
+            "title": f"bench {ctx.unique()}",
+            "description": "benchmark",
+            "reporter_id": ctx.user_id,
+        },
+        lambda ctx: {"title": f"bench {ctx.unique()}"},
+    ),
+    (
+        "changes",
+        "/api/changes",
+        "changes",
+        lambda ctx: {
+            "title": f"bench {ctx.unique()}",
+            "description": "benchmark",
+            "requester_id": ctx.user_id,
+        },
+        lambda ctx: {"title": f"bench {ctx.unique()}"},
+    ),
+]:
+    SCENARIOS += [
+        Scenario(f"{_name}.list", "GET", _list(f"{_path}?limit=20&count=estimated")),
+        Scenario(
+            f"{_name}.list_cursor", "GET", _list(f"{_path}?limit=20&cursor=&count=none")
+        ),
+        Scenario(f"{_name}.detail", "GET", _detail(_path, _table)),
+        Scenario(f"{_name}.create", "POST", _list(_path), _create),
+        Scenario(f"{_name}.update", "PUT", _detail(_path, _table), _update),
+    ]
+SCENARIOS += [
+    Scenario("users.list", "GET", _list("/api/users?limit=20&count=estimated")),
+    Scenario("users.detail", "GET", _detail("/api/users", "users")),
+    Scenario(
+        "users.create",
+        "POST",
+        _list("/api/users"),
+        lambda ctx: {
+            "username": f"bench_{ctx.unique()}",
+            "email": f"bench_{ctx.unique()}@example.com",
+            "password": BENCH_PASSWORD,
+        },
+    ),
+    # 計測用ユーザー自身を同じ値で更新する（既存データを書き換えない）
+    Scenario(
+        "users.update",
+        "PUT",
+        lambda ctx: f"/api/users/{ctx.user_id}",
+        lambda ctx: {
+            "username": BENCH_USERNAME,
+            "email": f"{BENCH_USERNAME}@example.com",
+            "password": BENCH_PASSWORD,
+        },
+    ),
+]
+
+
+# --- 集計・比較 ---
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """線形補間のパーセンタイル（sorted_values は昇順）"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (
+        position - lower
+    )
+
+
+def summarize(
+    latencies: Sequence[float], statuses: Sequence[int], elapsed: float
+) -> Dict[str, Any]:
+    """レイテンシ（秒）とステータスコードから結果を作成"""
+    ordered = sorted(latencies)
+    errors = sum(1 for code in statuses if code >= 400)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "error_rate": round(errors / len(ordered), 4) if ordered else 0.0,
+        "status_codes": {
+            str(code): count for code, count in sorted(Counter(statuses).items())
+        },
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+        "rps": round(len(ordered) / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float = 0.2,
+    min_delta_ms: float = 1.0,
+) -> List[str]:
+    """ベースラインに対する劣化を列挙する
+
+    レイテンシ（p50/p95/p99）は tolerance の割合かつ min_delta_ms 以上の増加、
+    スループットは tolerance の割合以上の低下を劣化とみなす（ベースラインにない
+    シナリオは比較しない）。エラー応答が1件でもあるシナリオは常に失敗とする。
+    """
+    regressions = []
+    for name, result in current["scenarios"].items():
+        if result.get("errors"):
+            regressions.append(
+                f"{name}: {result['errors']} error responses "
+                f"{result.get('status_codes', {})}"
+            )
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            delta = result[key] - base[key]
+            if delta > min_delta_ms and result[key] > base[key] * (1 + tolerance):
+                regressions.append(
+                    f"{name}: {key} {base[key]:.2f} -> {result[key]:.2f}"
+                )
+        if result["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {base['rps']:.1f} -> {result['rps']:.1f}")
+    return regressions
+
+
+# --- 実行 ---
+
+
+def prepare_database(seed: int) -> BenchContext:
+    """計測用ユーザーを用意し、詳細取得・更新に使う ID 範囲を調べる"""
+    from sqlalchemy import func, select
+
+    from packages.backend.database import SessionLocal
+    from packages.backend.models.change import Change
+    from packages.backend.models.incident import Incident
+    from packages.backend.models.problem import Problem
+    from packages.backend.models.user import User
+    from packages.backend.utils.auth import get_password_hash
+
+    db = SessionLocal()
+    try:
+        user = db.scalar(select(User).where(User.username == BENCH_USERNAME))
+        if user is None:
+            user = User(
+                username=BENCH_USERNAME,
+                email=f"{BENCH_USERNAME}@example.com",
+                password_hash=get_password_hash(BENCH_PASSWORD),
+                is_active=True,
+            )
+            db.add(user)
+            db.commit()
+        id_ranges = {}
+        for model in (Incident, Problem, Change, User):
+            low, high = db.execute(select(func.min(model.id), func.max(model.id))).one()
+            if low is not None:
+                id_ranges[model.__tablename__] = range(low, high + 1)
+        return BenchContext(id_ranges, user.id, seed)
+    finally:
+        db.close()
+        SessionLocal.remove()
+
+
+async def run_scenario(
+    client, scenario: Scenario, ctx: BenchContext, requests: int, concurrency: int
+) -> Dict[str, Any]:
+    latencies: List[float] = []
+    statuses: List[int] = []
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            headers = {"Authorization": f"Bearer {ctx.token}"}
+            kwargs = {"headers": headers} if scenario.authenticated else {}
+            if scenario.body is not None:
+                kwargs["json"] = scenario.body(ctx)
+            path = scenario.path(ctx)
+            started = time.perf_counter()
+            response = await client.request(scenario.method, path, **kwargs)
+            latencies.append(time.perf_counter() - started)
+            statuses.append(response.status_code)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, statuses, time.perf_counter() - started)
+
+
+async def run_benchmark(
+    scenarios: Sequence[Scenario],
+    ctx: BenchContext,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+) -> Dict[str, Any]:
+    import httpx
+
+    from packages.backend.database import engine
+    from packages.backend.main import app
+
+    results: Dict[str, Any] = {}
+    # ASGITransport は startup/shutdown を送らないため lifespan を直接実行する
+    async with app.router.lifespan_context(app):
+        # 500 などはステータスコードとして集計する（例外で計測を止めない）
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            response = await client.post(
+                "/api/auth/login",
+                json={"username": BENCH_USERNAME, "password": BENCH_PASSWORD},
+            )
+            response.raise_for_status()
+            ctx.token = response.json()["access_token"]
+
+            for scenario in scenarios:
+                if warmup:
+                    await run_scenario(client, scenario, ctx, warmup, 1)
+                results[scenario.name] = await run_scenario(
+                    client, scenario, ctx, requests, concurrency
+                )
+                print(
+                    f"  {scenario.name:<26} p50 {results[scenario.name]['p50_ms']:>8.2f}ms"
+                    f"  p95 {results[scenario.name]['p95_ms']:>8.2f}ms"
+                    f"  {results[scenario.name]['rps']:>8.1f} req/s"
+                    f"  errors {results[scenario.name]['errors']}",
+                    file=sys.stderr,
+                )
+
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": engine.dialect.name,
+            "rows": {table: len(ids) for table, ids in ctx.id_ranges.items()},
+            "requests": requests,
+            "concurrency": concurrency,
+        },
+        "scenarios": results,
+    }
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="API のレイテンシを計測します")
+    parser.add_argument(
+        "--requests", type=int, default=200, help="シナリオごとのリクエスト数"
+    )
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--warmup", type=int, default=10, help="計測前に捨てるリクエスト数"
+    )
+    parser.add_argument(
+        "--scenarios",
+        default="",
+        help="実行するシナリオ名の接頭辞（カンマ区切り。例: incidents,auth.login）",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="結果 JSON の出力先（省略時は標準出力）")
+    parser.add_argument("--baseline", help="比較するベースライン JSON")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="劣化とみなすまでの許容割合（0.2 = 20%%）",
+    )
+    parser.add_argument(
+        "--log-level", default="CRITICAL", help="計測中のアプリのログレベル"
+    )
+    parser.add_argument(
+        "--min-delta-ms",
+        type=float,
+        default=1.0,
+        help="これ未満のレイテンシ増加は誤差として無視する",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    prefixes = [p.strip() for p in args.scenarios.split(",") if p.strip()]
+    scenarios = [
+        s for s in SCENARIOS if not prefixes or s.name.startswith(tuple(prefixes))
+    ]
+    if not scenarios:
+        print(f"No scenarios match: {args.scenarios}", file=sys.stderr)
+        return 2
+
+    # アプリのログはレイテンシに影響するため既定では抑止する（エラーは status_codes で分かる）
+    logging.basicConfig()
+    logging.getLogger().setLevel(args.log_level)
+    logging.getLogger("packages.backend").setLevel(args.log_level)
+
+    ctx = prepare_database(args.seed)
+    result = asyncio.run(
+        run_benchmark(scenarios, ctx, args.requests, args.concurrency, args.warmup)
+    )
+
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(result, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print("✗ Regressions against baseline:", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            return 1
+        print("✓ No regressions against baseline", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
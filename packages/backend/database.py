@@ -14,27 +14,63 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.pool import StaticPool
 
+from packages.backend.db_pool import (
+    SQLITE_READ_POOL_SIZE,
+    SQLITE_WRITE_TIMEOUT,
+    RoutingSession,
+    TimedQueuePool,
+    is_file_sqlite,
+    label_pool,
+    set_sqlite_pragma,
+    set_sqlite_reader_pragma,
+)
+
 db_path = pathlib.Path(__file__).parent.parent.parent / "itsm.db"
 DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{db_path.absolute()}")
 
+# 読み取り専用エンジン（SQLite ファイル DB の場合のみ。None なら engine を共用）
+read_engine = None
+
 # スタンドアロン用のエンジン設定
-if DATABASE_URL.startswith("sqlite"):
+if is_file_sqlite(DATABASE_URL):
+    # 書き込みは1接続に直列化し、読み取りは WAL 上で並行させる
+    engine = label_pool(
+        create_engine(
+            DATABASE_URL,
+            connect_args={"check_same_thread": False, "timeout": 30},
+            poolclass=TimedQueuePool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=SQLITE_WRITE_TIMEOUT,
+            echo=False,
+        ),
+        "writer",
+    )
+    read_engine = label_pool(
+        create_engine(
+            DATABASE_URL,
+            connect_args={"check_same_thread": False, "timeout": 30},
+            poolclass=TimedQueuePool,
+            pool_size=SQLITE_READ_POOL_SIZE,
+            max_overflow=0,
+            echo=False,
+        ),
+        "reader",
+    )
+
+    # SQLiteの最適化設定
+    event.listen(engine, "connect", set_sqlite_pragma)
+    event.listen(read_engine, "connect", set_sqlite_reader_pragma)
+
+elif DATABASE_URL.startswith("sqlite"):
+    # インメモリ DB は接続ごとに別 DB になるため単一接続を共有
     engine = create_engine(
         DATABASE_URL,
         connect_args={"check_same_thread": False, "timeout": 30},
         poolclass=StaticPool,
         echo=False,
     )
-
-    # SQLiteの最適化設定
-    @event.listens_for(engine, "connect")
-    def set_sqlite_pragma(dbapi_conn, connection_record):
-        cursor = dbapi_conn.cursor()
-        cursor.execute("PRAGMA foreign_keys=ON")
-        cursor.execute("PRAGMA journal_mode=WAL")
-        cursor.execute("PRAGMA cache_size=10000")
-        cursor.execute("PRAGMA synchronous=NORMAL")
-        cursor.close()
+    event.listen(engine, "connect", set_sqlite_pragma)
 
 else:
     engine = create_engine(
@@ -43,7 +79,13 @@ else:
 
 # セッション設定
 SessionLocal = scoped_session(
-    sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    sessionmaker(
+        class_=RoutingSession,
+        autocommit=False,
+        autoflush=False,
+        bind=engine,
+        reader=read_engine,
+    )
 )
 
 # Baseクラスを定義
@@ -0,0 +1,127 @@
+"""
+SQLite 用の読み書き分離コネクションプール
+書き込みは1本の接続に直列化し、読み取りは WAL の読み取り専用接続プールで並行実行する
+"""
+
+import os
+import time
+from typing import Optional
+
+from prometheus_client import Counter, Histogram
+from sqlalchemy import event, exc, make_url
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# 読み取り専用接続の数
+SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", "5"))
+# 書き込み接続の取得を待つ最大秒数
+SQLITE_WRITE_TIMEOUT = float(os.getenv("SQLITE_WRITE_TIMEOUT", "30"))
+
+# Prometheusメトリクス定義
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting to check out a database connection",
+    ["pool"],
+    buckets=[0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30],
+)
+POOL_CHECKOUT_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Connection checkouts that timed out waiting for the pool",
+    ["pool"],
+)
+
+
+class _TimedPoolMixin:
+    """接続取得の待ち時間を計測するプール"""
+
+    label = "default"
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            POOL_CHECKOUT_TIMEOUTS.labels(pool=self.label).inc()
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT.labels(pool=self.label).observe(
+                time.perf_counter() - started_at
+            )
+
+    def recreate(self):
+        # engine.dispose() で作り直された場合もラベルを引き継ぐ
+        pool = super().recreate()
+        pool.label = self.label
+        return pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    """同期エンジン用"""
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    """非同期エンジン用"""
+
+
+def label_pool(engine: Engine, label: str) -> Engine:
+    """メトリクスのラベルをエンジンのプールに設定"""
+    engine.pool.label = label
+    return engine
+
+
+def is_file_sqlite(url: str) -> bool:
+    """ファイルベースの SQLite か（インメモリは読み書き分離できない）"""
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database not in (
+        None,
+        "",
+        ":memory:",
+    )
+
+
+def set_sqlite_pragma(dbapi_conn, connection_record):
+    """書き込み接続の SQLite 最適化設定"""
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA cache_size=10000")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+def set_sqlite_reader_pragma(dbapi_conn, connection_record):
+    """読み取り接続の設定（query_only で書き込みを拒否）"""
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.execute("PRAGMA cache_size=10000")
+    cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
+
+class RoutingSession(Session):
+    """SELECT は読み取りエンジン、それ以外は書き込みエンジンに振り分けるセッション
+
+    トランザクション内で一度書き込みを行った後は、自分の変更を読めるよう
+    トランザクション終了まで書き込みエンジンを使い続ける。
+    """
+
+    def __init__(self, *args, reader: Optional[Engine] = None, **kw):
+        super().__init__(*args, **kw)
+        self.reader = reader
+        self._use_writer = False
+
+    def get_bind(self, mapper=None, *, clause=None, **kw):
+        if self.reader is None or self._use_writer:
+            return super().get_bind(mapper, clause=clause, **kw)
+        if not self._flushing and clause is not None and clause.is_select:
+            return self.reader
+        self._use_writer = True
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+# トップレベルのトランザクション終了時（コミット・ロールバック）に振り分けを戻す
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _reset_routing(session, transaction):
+    if transaction.parent is None:
+        session._use_writer = False
@@ -27,12 +27,15 @@ from packages.backend.models.incident import (
 from packages.backend.models.problem import Problem, ProblemPriority, ProblemStatus
 from packages.backend.models.user import Permission, Role, User
 from packages.backend.utils.auth import get_password_hash
+from packages.backend.utils.search import ensure_search_index, search_metadata
 
 
 def create_tables():
     """全テーブルを作成"""
     print("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        ensure_search_index(connection)
     print("✓ Tables created successfully")
 
 
@@ -40,6 +43,7 @@ def drop_tables():
     """全テーブルを削除（危険：本番環境では使用しないこと）"""
     print("Dropping existing tables...")
     Base.metadata.drop_all(bind=engine)
+    search_metadata.drop_all(bind=engine)
     print("✓ Tables dropped")
 
 
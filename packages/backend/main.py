@@ -3,26 +3,54 @@ FastAPI ITサービス管理システム（ITSM）
 ISO 20000/27001/27002準拠のメインアプリケーション
 """
 
+import asyncio
 import logging
 import os
 import sys
+from contextlib import suppress
 from datetime import timedelta
+from typing import Optional
 
-from fastapi import Depends, FastAPI, HTTPException, status
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from sqlalchemy import text
-from sqlalchemy.orm import Session
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # プロジェクトルートをPythonパスに追加
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 sys.path.insert(0, project_root)
 
 # データベースとモデル
-from packages.backend.database import engine, get_db
-from packages.backend.models.change import Change
-from packages.backend.models.incident import Incident
-from packages.backend.models.problem import Problem
+from packages.backend.async_database import (
+    AsyncSessionLocal,
+    async_engine,
+    async_read_engine,
+    dispose_async_engines,
+    get_async_db,
+)
+from packages.backend.database import SessionLocal, engine, read_engine
+from packages.backend.middleware.profiling import ProfilingMiddleware
+from packages.backend.middleware.query_metrics import (
+    QueryMetricsMiddleware,
+    instrument_engine,
+)
+from packages.backend.models.change import Change, ChangePriority, ChangeStatus
+from packages.backend.models.incident import (
+    Attachment,
+    Incident,
+    IncidentPriority,
+    IncidentStatus,
+)
+from packages.backend.models.loading import DETAIL, loading_options
+from packages.backend.models.problem import (
+    Problem,
+    ProblemCategory,
+    ProblemPriority,
+    ProblemStatus,
+)
 from packages.backend.models.user import User
 from packages.backend.schemas.change import Change as ChangeSchema
 from packages.backend.schemas.change import ChangeCreate, ChangeList, ChangeUpdate
@@ -36,18 +64,42 @@ from packages.backend.schemas.problem import Problem as ProblemSchema
 from packages.backend.schemas.problem import ProblemCreate, ProblemList, ProblemUpdate
 
 # スキーマ
+from packages.backend.schemas.search import SearchResponse
 from packages.backend.schemas.user import Token
 from packages.backend.schemas.user import User as UserSchema
 from packages.backend.schemas.user import UserCreate, UserList, UserLogin, UserMe
 
-# 認証ユーティリティ
+# 認証・添付ファイルユーティリティ
+from packages.backend.utils.attachment_download import attachment_response
+from packages.backend.utils.attachment_storage import (
+    ATTACHMENT_GC_INTERVAL,
+    sweep_periodically,
+)
 from packages.backend.utils.auth import (
     ACCESS_TOKEN_EXPIRE_MINUTES,
-    authenticate_user,
+    authenticate_user_async,
     create_access_token,
     get_current_active_user,
-    get_password_hash,
+    get_password_hash_async,
+    password_needs_rehash,
+    require_permissions,
 )
+from packages.backend.utils.pagination import paginate
+from packages.backend.utils.permissions import permission_registry
+from packages.backend.utils.principal_cache import Principal
+from packages.backend.utils.profiler import (
+    PROFILE_MAX_SECONDS,
+    ProfileFormat,
+    ProfilerBusy,
+    profile_store,
+    render,
+    start_exclusive,
+    stop_exclusive,
+)
+from packages.backend.utils.reference_data import reference_data
+from packages.backend.utils.row_counts import CountMode, count_rows
+from packages.backend.utils.search import SOURCES_BY_TYPE, ensure_search_index, search
+from packages.backend.utils.ticket_numbers import next_ticket_number
 
 # ログ設定
 logging.basicConfig(
@@ -90,6 +142,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# リクエストごとの SQL 件数・DB 時間（Server-Timing ヘッダーとルート別メトリクス）
+app.add_middleware(QueryMetricsMiddleware)
+# ?profile=1 による管理者向けのリクエスト単位プロファイル
+app.add_middleware(ProfilingMiddleware)
+for _engine in (engine, read_engine, async_engine, async_read_engine):
+    if _engine is not None:
+        instrument_engine(getattr(_engine, "sync_engine", _engine))
+
 
 # エラーハンドリング
 @app.exception_handler(Exception)
@@ -100,25 +160,135 @@ async def general_exception_handler(request, exc):
 
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
-    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail},
+        headers=getattr(exc, "headers", None),
+    )
+
+
+async def get_or_404(db: AsyncSession, model, object_id: int, detail: str):
+    """主キーで1件取得（詳細プロファイルのリレーションも読み込む）"""
+    obj = await db.get(model, object_id, options=loading_options(model, DETAIL))
+    if obj is None:
+        raise HTTPException(status_code=404, detail=detail)
+    return obj
+
+
+async def list_page(
+    db: AsyncSession, model, skip: int, limit: int, cursor: Optional[str], count
+):
+    """一覧取得（件数取得・ページングは同期ヘルパーを run_sync で実行）"""
+
+    def run(session):
+        total = count_rows(session, model, count)
+        query = session.query(model).options(*loading_options(model))
+        return paginate(query, model, skip, limit, cursor, total)
+
+    return await db.run_sync(run)
+
+
+async def reference_id(
+    db: AsyncSession, model, row_id: Optional[int], default: Optional[str] = None
+) -> int:
+    """参照データ（ステータス・優先度・カテゴリ）の ID を検証する
+
+    row_id が None で default が指定されていれば、その名前の行（なければ先頭の行）を使う。
+    """
+    table = await reference_data.get_async(db, model)
+    if row_id is None and default is not None:
+        row_id = table.id_for(default)
+        if row_id is None and table.rows:
+            row_id = table.rows[0]["id"]
+    if not table.has_id(row_id):
+        raise HTTPException(
+            status_code=400, detail=f"{model.__name__} with id {row_id} not found"
+        )
+    return row_id
+
+
+async def apply_update(db: AsyncSession, obj, data: dict, references: dict) -> None:
+    """更新内容を反映する（参照データの ID は references のモデルで検証）"""
+    columns = type(obj).__table__.c
+    for field, value in data.items():
+        model = references.get(field)
+        # NULL を許すカテゴリ等は None（解除）を検証しない
+        if model is not None and not (value is None and columns[field].nullable):
+            value = await reference_id(db, model, value)
+        setattr(obj, field, value)
+
+
+async def save(db: AsyncSession, obj):
+    """コミットし、更新後の値とレスポンス用リレーションを読み直す"""
+    await db.commit()
+    return await db.get(
+        type(obj),
+        obj.id,
+        options=loading_options(type(obj), DETAIL),
+        populate_existing=True,
+    )
+
+
+# 起動時処理
+@app.on_event("startup")
+async def load_registries():
+    """権限ビットマスクと参照データ（ステータス・優先度等）を読み込み、検索インデックスを用意する"""
+    async with async_engine.begin() as conn:
+        await conn.run_sync(ensure_search_index)
+    async with AsyncSessionLocal() as db:
+        await db.run_sync(permission_registry.load)
+        await db.run_sync(reference_data.load)
+
+
+@app.on_event("startup")
+async def start_attachment_sweep():
+    """未参照の添付ファイル実体の定期回収を開始する"""
+    app.state.attachment_sweep = None
+    if ATTACHMENT_GC_INTERVAL > 0:
+        app.state.attachment_sweep = asyncio.create_task(
+            sweep_periodically(SessionLocal, ATTACHMENT_GC_INTERVAL)
+        )
+
+
+@app.on_event("shutdown")
+async def stop_attachment_sweep():
+    task = app.state.attachment_sweep
+    if task is not None:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+
+@app.on_event("shutdown")
+async def close_database_connections():
+    """プール済みのデータベース接続を閉じる"""
+    await dispose_async_engines()
 
 
 # ヘルスチェック
 @app.get("/health")
-async def health_check(db: Session = Depends(get_db)):
+async def health_check(db: AsyncSession = Depends(get_async_db)):
     try:
         # データベース接続テスト
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
         return {"status": "healthy", "database": "connected"}
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         return {"status": "unhealthy", "database": "disconnected", "error": str(e)}
 
 
+# メトリクス（Prometheus形式）
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 # 認証エンドポイント
 @app.post("/api/auth/login", response_model=Token)
-async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
-    user = authenticate_user(db, user_credentials.username, user_credentials.password)
+async def login(user_credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    user = await authenticate_user_async(
+        db, user_credentials.username, user_credentials.password
+    )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -134,7 +304,10 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
     from datetime import datetime
 
     user.last_login = datetime.utcnow()
-    db.commit()
+    # work factor 変更後は次回ログイン時に再ハッシュ
+    if password_needs_rehash(user.password_hash):
+        user.password_hash = await get_password_hash_async(user_credentials.password)
+    await db.commit()
 
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -146,10 +319,8 @@ async def logout():
 
 
 @app.get("/api/auth/me", response_model=UserMe)
-async def read_users_me(current_user: User = Depends(get_current_active_user)):
-    user_roles = (
-        [role.name for role in current_user.roles] if current_user.roles else []
-    )
+async def read_users_me(current_user: Principal = Depends(get_current_active_user)):
+    user_roles = sorted(current_user.roles)
     return UserMe(
         id=current_user.id,
         username=current_user.username,
@@ -168,49 +339,43 @@ async def read_users_me(current_user: User = Depends(get_current_active_user)):
 async def get_incidents(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    cursor: Optional[str] = None,
+    count: CountMode = CountMode.ESTIMATED,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
 ):
-    incidents = db.query(Incident).offset(skip).limit(limit).all()
-    total = db.query(Incident).count()
-    return IncidentList(
-        items=incidents,
-        total=total,
-        page=skip // limit + 1,
-        size=limit,
-        pages=(total + limit - 1) // limit,
-    )
+    return IncidentList(**await list_page(db, Incident, skip, limit, cursor, count))
 
 
 @app.post("/api/incidents", response_model=IncidentSchema)
 async def create_incident(
     incident: IncidentCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
 ):
     db_incident = Incident(**incident.dict())
+    db_incident.status_id = await reference_id(
+        db, IncidentStatus, incident.status_id, "新規"
+    )
+    db_incident.priority_id = await reference_id(
+        db, IncidentPriority, incident.priority_id, "中"
+    )
     # インシデントIDの生成（例：INC-YYYY-NNNN）
-    from datetime import datetime
-
-    year = datetime.now().year
-    count = db.query(Incident).count() + 1
-    db_incident.incident_id = f"INC-{year}-{count:04d}"
+    db_incident.incident_number = await db.run_sync(
+        next_ticket_number, "INC", Incident.incident_number
+    )
 
     db.add(db_incident)
-    db.commit()
-    db.refresh(db_incident)
-    return db_incident
+    return await save(db, db_incident)
 
 
 @app.get("/api/incidents/{incident_id}", response_model=IncidentSchema)
 async def get_incident(
     incident_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
 ):
-    incident = db.query(Incident).filter(Incident.id == incident_id).first()
-    if incident is None:
-        raise HTTPException(status_code=404, detail="Incident not found")
+    incident = await get_or_404(db, Incident, incident_id, "Incident not found")
     return incident
 
 
@@ -218,41 +383,35 @@ async def get_incident(
 async def update_incident(
     incident_id: int,
     incident_update: IncidentUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
 ):
-    incident = db.query(Incident).filter(Incident.id == incident_id).first()
-    if incident is None:
-        raise HTTPException(status_code=404, detail="Incident not found")
+    incident = await get_or_404(db, Incident, incident_id, "Incident not found")
 
-    for field, value in incident_update.dict(exclude_unset=True).items():
-        setattr(incident, field, value)
+    await apply_update(
+        db,
+        incident,
+        incident_update.dict(exclude_unset=True),
+        {"status_id": IncidentStatus, "priority_id": IncidentPriority},
+    )
 
     from datetime import datetime
 
     incident.updated_at = datetime.utcnow()
-    if incident_update.status == "resolved":
-        incident.resolved_at = datetime.utcnow()
-    elif incident_update.status == "closed":
-        incident.closed_at = datetime.utcnow()
 
-    db.commit()
-    db.refresh(incident)
-    return incident
+    return await save(db, incident)
 
 
 @app.delete("/api/incidents/{incident_id}")
 async def delete_incident(
     incident_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
 ):
-    incident = db.query(Incident).filter(Incident.id == incident_id).first()
-    if incident is None:
-        raise HTTPException(status_code=404, detail="Incident not found")
+    incident = await get_or_404(db, Incident, incident_id, "Incident not found")
 
-    db.delete(incident)
-    db.commit()
+    await db.delete(incident)
+    await db.commit()
     return {"message": "Incident deleted successfully"}
 
 
@@ -261,49 +420,45 @@ async def delete_incident(
 async def get_problems(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    cursor: Optional[str] = None,
+    count: CountMode = CountMode.ESTIMATED,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
 ):
-    problems = db.query(Problem).offset(skip).limit(limit).all()
-    total = db.query(Problem).count()
-    return ProblemList(
-        items=problems,
-        total=total,
-        page=skip // limit + 1,
-        size=limit,
-        pages=(total + limit - 1) // limit,
-    )
+    return ProblemList(**await list_page(db, Problem, skip, limit, cursor, count))
 
 
 @app.post("/api/problems", response_model=ProblemSchema)
 async def create_problem(
     problem: ProblemCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
 ):
     db_problem = Problem(**problem.dict())
+    db_problem.status_id = await reference_id(
+        db, ProblemStatus, problem.status_id, "新規"
+    )
+    db_problem.priority_id = await reference_id(
+        db, ProblemPriority, problem.priority_id, "中"
+    )
+    if problem.category_id is not None:
+        await reference_id(db, ProblemCategory, problem.category_id)
     # 問題IDの生成（例：PRB-YYYY-NNNN）
-    from datetime import datetime
-
-    year = datetime.now().year
-    count = db.query(Problem).count() + 1
-    db_problem.problem_id = f"PRB-{year}-{count:04d}"
+    db_problem.problem_number = await db.run_sync(
+        next_ticket_number, "PRB", Problem.problem_number
+    )
 
     db.add(db_problem)
-    db.commit()
-    db.refresh(db_problem)
-    return db_problem
+    return await save(db, db_problem)
 
 
 @app.get("/api/problems/{problem_id}", response_model=ProblemSchema)
 async def get_problem(
     problem_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
 ):
-    problem = db.query(Problem).filter(Problem.id == problem_id).first()
-    if problem is None:
-        raise HTTPException(status_code=404, detail="Problem not found")
+    problem = await get_or_404(db, Problem, problem_id, "Problem not found")
     return problem
 
 
@@ -311,27 +466,31 @@ async def get_problem(
 async def update_problem(
     problem_id: int,
     problem_update: ProblemUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
 ):
-    problem = db.query(Problem).filter(Problem.id == problem_id).first()
-    if problem is None:
-        raise HTTPException(status_code=404, detail="Problem not found")
-
-    for field, value in problem_update.dict(exclude_unset=True).items():
-        setattr(problem, field, value)
+    problem = await get_or_404(db, Problem, problem_id, "Problem not found")
+
+    await apply_update(
+        db,
+        problem,
+        problem_update.dict(exclude_unset=True),
+        {
+            "status_id": ProblemStatus,
+            "priority_id": ProblemPriority,
+            "category_id": ProblemCategory,
+        },
+    )
 
     from datetime import datetime
 
     problem.updated_at = datetime.utcnow()
-    if problem_update.status == "resolved":
-        problem.resolved_at = datetime.utcnow()
-    elif problem_update.status == "closed":
-        problem.closed_at = datetime.utcnow()
+    if problem_update.status_id is not None:
+        statuses = await reference_data.get_async(db, ProblemStatus)
+        if statuses.name_for(problem.status_id) == "解決済み":
+            problem.resolved_at = datetime.utcnow()
 
-    db.commit()
-    db.refresh(problem)
-    return problem
+    return await save(db, problem)
 
 
 # 変更要求管理エンドポイント
@@ -339,49 +498,43 @@ async def update_problem(
 async def get_changes(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    cursor: Optional[str] = None,
+    count: CountMode = CountMode.ESTIMATED,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
 ):
-    changes = db.query(Change).offset(skip).limit(limit).all()
-    total = db.query(Change).count()
-    return ChangeList(
-        items=changes,
-        total=total,
-        page=skip // limit + 1,
-        size=limit,
-        pages=(total + limit - 1) // limit,
-    )
+    return ChangeList(**await list_page(db, Change, skip, limit, cursor, count))
 
 
 @app.post("/api/changes", response_model=ChangeSchema)
 async def create_change(
     change: ChangeCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
 ):
     db_change = Change(**change.dict())
+    db_change.status_id = await reference_id(
+        db, ChangeStatus, change.status_id, "申請中"
+    )
+    db_change.priority_id = await reference_id(
+        db, ChangePriority, change.priority_id, "中"
+    )
     # 変更IDの生成（例：CHG-YYYY-NNNN）
-    from datetime import datetime
-
-    year = datetime.now().year
-    count = db.query(Change).count() + 1
-    db_change.change_id = f"CHG-{year}-{count:04d}"
+    db_change.change_number = await db.run_sync(
+        next_ticket_number, "CHG", Change.change_number
+    )
 
     db.add(db_change)
-    db.commit()
-    db.refresh(db_change)
-    return db_change
+    return await save(db, db_change)
 
 
 @app.get("/api/changes/{change_id}", response_model=ChangeSchema)
 async def get_change(
     change_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
 ):
-    change = db.query(Change).filter(Change.id == change_id).first()
-    if change is None:
-        raise HTTPException(status_code=404, detail="Change not found")
+    change = await get_or_404(db, Change, change_id, "Change not found")
     return change
 
 
@@ -389,27 +542,114 @@ async def get_change(
 async def update_change(
     change_id: int,
     change_update: ChangeUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
 ):
-    change = db.query(Change).filter(Change.id == change_id).first()
-    if change is None:
-        raise HTTPException(status_code=404, detail="Change not found")
+    change = await get_or_404(db, Change, change_id, "Change not found")
 
-    for field, value in change_update.dict(exclude_unset=True).items():
-        setattr(change, field, value)
+    await apply_update(
+        db,
+        change,
+        change_update.dict(exclude_unset=True),
+        {"status_id": ChangeStatus, "priority_id": ChangePriority},
+    )
 
     from datetime import datetime
 
     change.updated_at = datetime.utcnow()
-    if change_update.status == "implementation":
-        change.actual_start = datetime.utcnow()
-    elif change_update.status == "complete":
-        change.actual_end = datetime.utcnow()
+    if change_update.status_id is not None:
+        statuses = await reference_data.get_async(db, ChangeStatus)
+        status_name = statuses.name_for(change.status_id)
+        if status_name == "実施中":
+            change.actual_start = datetime.utcnow()
+        elif status_name == "完了":
+            change.actual_end = datetime.utcnow()
+
+    return await save(db, change)
+
+
+# 全文検索エンドポイント
+@app.get("/api/search", response_model=SearchResponse)
+async def search_tickets(
+    q: str = Query(..., min_length=1, max_length=200),
+    types: Optional[str] = Query(None, description="incident,problem,change"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
+):
+    """インシデント・問題・変更要求を横断して全文検索（関連度順）"""
+    entity_types = [t.strip() for t in types.split(",") if t.strip()] if types else None
+    unknown = set(entity_types or ()) - set(SOURCES_BY_TYPE)
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown types: {', '.join(sorted(unknown))}"
+        )
+    hits = await db.run_sync(search, q, entity_types, limit, offset)
+    return SearchResponse(query=q, results=hits)
+
+
+# 添付ファイルエンドポイント
+@app.api_route("/api/attachments/{attachment_id}/download", methods=["GET", "HEAD"])
+async def download_attachment(
+    attachment_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
+):
+    """添付ファイルをダウンロード（Range による部分取得・ETag による条件付き取得に対応）"""
+    attachment = await db.get(Attachment, attachment_id)
+    if attachment is None:
+        raise HTTPException(status_code=404, detail="Attachment not found")
+    try:
+        return await run_in_threadpool(attachment_response, request, attachment)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Attachment file not found")
+
+
+# プロファイリングエンドポイント（管理者のみ）
+def profile_response(profiler, output_format: ProfileFormat, name: str):
+    body = render(profiler, output_format, name)
+    if output_format == ProfileFormat.SPEEDSCOPE:
+        return JSONResponse(
+            body,
+            headers={
+                "Content-Disposition": f'attachment; filename="{name}.speedscope.json"'
+            },
+        )
+    return PlainTextResponse(body)
 
-    db.commit()
-    db.refresh(change)
-    return change
+
+@app.get("/api/admin/profile")
+async def capture_profile(
+    seconds: float = Query(5, gt=0, le=PROFILE_MAX_SECONDS),
+    interval_ms: float = Query(5, ge=1, le=100),
+    format: ProfileFormat = ProfileFormat.COLLAPSED,
+    current_user: Principal = Depends(require_permissions(["admin"])),
+):
+    """ワーカー全体のスタックを指定秒数サンプリング（collapsed または speedscope 形式）"""
+    try:
+        profiler = start_exclusive(interval_ms / 1000)
+    except ProfilerBusy:
+        raise HTTPException(status_code=409, detail="Profile already in progress")
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        stop_exclusive(profiler)
+    return profile_response(profiler, format, f"worker-{os.getpid()}")
+
+
+@app.get("/api/admin/profiles/{profile_id}")
+async def get_request_profile(
+    profile_id: str,
+    format: ProfileFormat = ProfileFormat.COLLAPSED,
+    current_user: Principal = Depends(require_permissions(["admin"])),
+):
+    """?profile=1 で採取したリクエストのプロファイル（X-Profile-Id で指定）"""
+    profiler = profile_store.get(profile_id)
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile_response(profiler, format, f"request-{profile_id}")
 
 
 # ユーザー管理エンドポイント
@@ -417,52 +657,42 @@ async def update_change(
 async def get_users(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    cursor: Optional[str] = None,
+    count: CountMode = CountMode.ESTIMATED,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
 ):
-    users = db.query(User).offset(skip).limit(limit).all()
-    total = db.query(User).count()
-    return UserList(
-        items=users,
-        total=total,
-        page=skip // limit + 1,
-        size=limit,
-        pages=(total + limit - 1) // limit,
-    )
+    return UserList(**await list_page(db, User, skip, limit, cursor, count))
 
 
 @app.post("/api/users", response_model=UserSchema)
 async def create_user(
     user: UserCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
 ):
     # ユーザー名とメールの重複チェック
-    if db.query(User).filter(User.username == user.username).first():
+    if await db.scalar(select(User.id).where(User.username == user.username)):
         raise HTTPException(status_code=400, detail="Username already registered")
-    if db.query(User).filter(User.email == user.email).first():
+    if await db.scalar(select(User.id).where(User.email == user.email)):
         raise HTTPException(status_code=400, detail="Email already registered")
 
     user_dict = user.dict()
     password = user_dict.pop("password")
-    hashed_password = get_password_hash(password)
+    hashed_password = await get_password_hash_async(password)
 
     db_user = User(**user_dict, password_hash=hashed_password)
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    return await save(db, db_user)
 
 
 @app.get("/api/users/{user_id}", response_model=UserSchema)
 async def get_user(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
 ):
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
-        raise HTTPException(status_code=404, detail="User not found")
+    user = await get_or_404(db, User, user_id, "User not found")
     return user
 
 
@@ -470,12 +700,10 @@ async def get_user(
 async def update_user(
     user_id: int,
     user_update: UserCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
 ):
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
-        raise HTTPException(status_code=404, detail="User not found")
+    user = await get_or_404(db, User, user_id, "User not found")
 
     for field, value in user_update.dict(exclude_unset=True).items():
         if field != "password":
@@ -485,9 +713,7 @@ async def update_user(
 
     user.updated_at = datetime.utcnow()
 
-    db.commit()
-    db.refresh(user)
-    return user
+    return await save(db, user)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,92 @@
+"""
+リクエスト単位のプロファイル採取ミドルウェア
+?profile=1 付きのリクエストのうち、許可されたロールのユーザーからのものだけ
+処理中のスタックを採取する。結果は profile_store に保持し、X-Profile-Id ヘッダーで
+返した ID を使って管理者用エンドポイントから取得する（レスポンス本文は変えない）。
+"""
+
+import logging
+import os
+import uuid
+from urllib.parse import parse_qs
+
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from packages.backend.async_database import AsyncSessionLocal
+from packages.backend.utils.auth import get_current_user
+from packages.backend.utils.permissions import permission_registry
+from packages.backend.utils.profiler import (
+    PROFILE_INTERVAL,
+    ProfilerBusy,
+    profile_store,
+    start_exclusive,
+    stop_exclusive,
+)
+
+logger = logging.getLogger(__name__)
+
+# ?profile=1 を許可するロール（カンマ区切り）
+PROFILE_ROLES = [
+    role.strip()
+    for role in os.getenv("PROFILE_ROLES", "admin").split(",")
+    if role.strip()
+]
+
+
+class ProfilingMiddleware:
+    """?profile=1 のリクエストをサンプリングする ASGI ミドルウェア"""
+
+    def __init__(self, app, roles=PROFILE_ROLES, interval: float = PROFILE_INTERVAL):
+        self.app = app
+        self.interval = interval
+        # require_permissions と同じく定義時にビットマスク化する
+        self.required_mask = permission_registry.roles.mask_for(roles)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        if not await self._authorized(scope):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            profiler = start_exclusive(self.interval)
+        except ProfilerBusy:
+            logger.info("Profile skipped (another profile in progress)")
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profile_store.add(profile_id, stop_exclusive(profiler))
+
+    async def _authorized(self, scope) -> bool:
+        """Bearer トークンのユーザーが許可ロールを持つか（認証失敗は False）"""
+        headers = dict(scope.get("headers", []))
+        scheme, _, token = headers.get(b"authorization", b"").decode().partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return False
+        credentials = HTTPAuthorizationCredentials(scheme=scheme, credentials=token)
+        try:
+            async with AsyncSessionLocal() as db:
+                principal = await get_current_user(credentials, db)
+        except HTTPException:
+            return False
+        return principal.is_active and bool(principal.role_mask & self.required_mask)
+
+
+def _wants_profile(scope) -> bool:
+    query = parse_qs(scope.get("query_string", b"").decode())
+    return query.get("profile", [""])[-1] in ("1", "true")
@@ -0,0 +1,178 @@
+"""
+リクエスト単位の SQL 計測ミドルウェア
+エンジンのカーソル実行イベントでクエリ数・DB 時間・最も遅い文をリクエストごとに集計し、
+Server-Timing ヘッダーとルート別の Prometheus ヒストグラムに出力する。
+同じ文が閾値回以上繰り返されたリクエストは N+1 の疑いとして警告ログに残す。
+"""
+
+import logging
+import os
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from prometheus_client import Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# 同じ文がこの回数以上実行されたら N+1 として記録（0 で無効）
+N_PLUS_ONE_THRESHOLD = int(os.getenv("QUERY_METRICS_N_PLUS_ONE_THRESHOLD", "10"))
+# Server-Timing ヘッダーを付けるか（本番で内部情報を出したくない場合は無効化）
+SERVER_TIMING_ENABLED = os.getenv("QUERY_METRICS_SERVER_TIMING", "1") == "1"
+
+# Prometheusメトリクス定義
+REQUEST_QUERY_COUNT = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed per HTTP request",
+    ["method", "route"],
+    buckets=[0, 1, 2, 5, 10, 20, 50, 100, 200, 500],
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds",
+    "Time spent executing SQL per HTTP request",
+    ["method", "route"],
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5],
+)
+
+_STARTED_KEY = "_query_metrics_started"
+
+
+class RequestQueryStats:
+    """1リクエストで実行された SQL の集計"""
+
+    __slots__ = ("count", "total", "slowest", "slowest_statement", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.total += elapsed
+        self.statements[statement] += 1
+        if elapsed >= self.slowest:
+            self.slowest = elapsed
+            self.slowest_statement = statement
+
+    def repeated(self, threshold: int):
+        """最も多く繰り返された文と回数（閾値未満なら None）"""
+        if threshold <= 0 or not self.statements:
+            return None
+        statement, count = self.statements.most_common(1)[0]
+        return (statement, count) if count >= threshold else None
+
+    def server_timing(self) -> str:
+        value = f'db;dur={self.total * 1000:.1f};desc="{self.count} queries"'
+        if self.count:
+            value += f", db-slowest;dur={self.slowest * 1000:.1f}"
+        return value
+
+
+# 計測中のリクエストの集計（スレッドプール・greenlet にもコンテキストごと引き継がれる）
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar(
+    "request_query_stats", default=None
+)
+
+
+def current_query_stats() -> Optional[RequestQueryStats]:
+    """実行中のリクエストの集計（リクエスト外では None）"""
+    return _current_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None and context is not None:
+        setattr(context, _STARTED_KEY, time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    started_at = getattr(context, _STARTED_KEY, None)
+    if stats is not None and started_at is not None:
+        stats.record(statement, time.perf_counter() - started_at)
+
+
+def instrument_engine(engine: Engine) -> Engine:
+    """エンジンに計測用のイベントを登録（AsyncEngine は sync_engine を渡す）"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    return engine
+
+
+class QueryMetricsMiddleware:
+    """HTTP リクエストごとに SQL を集計する ASGI ミドルウェア"""
+
+    def __init__(
+        self,
+        app,
+        n_plus_one_threshold: int = N_PLUS_ONE_THRESHOLD,
+        server_timing: bool = SERVER_TIMING_ENABLED,
+    ):
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.server_timing = server_timing
+        self._route_paths: Dict[object, str] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats()
+        token = _current_stats.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and self.server_timing:
+                # ヘッダー送信時点までのクエリが対象（ストリーミング中の分は含まない）
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", stats.server_timing().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            self._observe(scope, stats)
+
+    def _route(self, scope) -> str:
+        """メトリクスのラベルにするルートのパステンプレート（ID 等でラベルを増やさない）"""
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            app = scope.get("app")
+            for route in getattr(app, "routes", ()):
+                if getattr(route, "endpoint", None) is endpoint:
+                    path = route.path
+                    break
+            path = path or "unmatched"
+            self._route_paths[endpoint] = path
+        return path
+
+    def _observe(self, scope, stats: RequestQueryStats) -> None:
+        method = scope.get("method", "")
+        route = self._route(scope)
+        REQUEST_QUERY_COUNT.labels(method=method, route=route).observe(stats.count)
+        REQUEST_DB_TIME.labels(method=method, route=route).observe(stats.total)
+
+        repeated = stats.repeated(self.n_plus_one_threshold)
+        if repeated is not None:
+            statement, count = repeated
+            logger.warning(
+                "Possible N+1 queries: %s %s ran the same statement %d times "
+                "(%d queries, %.1fms in database): %s",
+                method,
+                route,
+                count,
+                stats.count,
+                stats.total * 1000,
+                " ".join(statement.split())[:300],
+            )
@@ -4,5 +4,6 @@
 
 from .incident import Incident
 from .problem import Problem
+from .sequence import TicketSequence
 from .system import System
 from .user import User
@@ -12,6 +12,7 @@ from sqlalchemy import (
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     String,
     Table,
@@ -84,6 +85,15 @@ class Change(Base):
     """変更要求モデル（ISO 20000準拠）"""
 
     __tablename__ = "changes"
+    # キーセットページネーション用 (created_at, id) 複合インデックス
+    __table_args__ = (
+        Index("ix_changes_created_at_id", "created_at", "id"),
+        # 一覧の絞り込み条件 + 作成日時の降順に対応する複合インデックス
+        Index("ix_changes_status_created_at", "status_id", "created_at", "id"),
+        Index("ix_changes_priority_created_at", "priority_id", "created_at", "id"),
+        Index("ix_changes_assignee_created_at", "assignee_id", "created_at", "id"),
+        Index("ix_changes_requester_id", "requester_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     change_number = Column(String(20), unique=True, nullable=False, index=True)
@@ -134,8 +144,8 @@ class Change(Base):
     requires_cab_approval = Column(Boolean, default=True)  # CAB承認要否
     has_rollback_plan = Column(Boolean, default=False)
 
-    # 監査情報
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # 監査情報（created_at はキーセットページネーションのキーのため必須）
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # リレーションシップ
@@ -254,7 +264,7 @@ class ChangeTask(Base):
     __tablename__ = "change_tasks"
 
     id = Column(Integer, primary_key=True, index=True)
-    change_id = Column(Integer, ForeignKey("changes.id"), nullable=False)
+    change_id = Column(Integer, ForeignKey("changes.id"), nullable=False, index=True)
     title = Column(String(200), nullable=False)
     description = Column(Text)
     assignee_id = Column(Integer, ForeignKey("users.id"))
@@ -291,7 +301,7 @@ class ChangeComment(Base):
     __tablename__ = "change_comments"
 
     id = Column(Integer, primary_key=True, index=True)
-    change_id = Column(Integer, ForeignKey("changes.id"), nullable=False)
+    change_id = Column(Integer, ForeignKey("changes.id"), nullable=False, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     content = Column(Text, nullable=False)
     is_approval_comment = Column(Boolean, default=False)
@@ -319,14 +329,22 @@ change_incident_links = Table(
     "change_incident_links",
     Base.metadata,
     Column("change_id", Integer, ForeignKey("changes.id"), primary_key=True),
-    Column("incident_id", Integer, ForeignKey("incidents.id"), primary_key=True),
+    Column(
+        "incident_id",
+        Integer,
+        ForeignKey("incidents.id"),
+        primary_key=True,
+        index=True,
+    ),
 )
 
 change_problem_links = Table(
     "change_problem_links",
     Base.metadata,
     Column("change_id", Integer, ForeignKey("changes.id"), primary_key=True),
-    Column("problem_id", Integer, ForeignKey("problems.id"), primary_key=True),
+    Column(
+        "problem_id", Integer, ForeignKey("problems.id"), primary_key=True, index=True
+    ),
 )
 
 # 旧モデルとの互換性のため
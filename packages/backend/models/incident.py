@@ -7,12 +7,15 @@ from sqlalchemy import (
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
+    func,
+    select,
 )
 from sqlalchemy.ext.associationproxy import association_proxy
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import column_property, relationship
 
 from packages.backend.database import Base
 
@@ -79,8 +82,19 @@ class Incident(Base):  # Baseを継承
     """インシデントモデル"""
 
     __tablename__ = "incidents"
+    # キーセットページネーション用 (created_at, id) 複合インデックスと、
+    # 一覧の絞り込み条件 + 作成日時の降順に対応する複合インデックス
+    __table_args__ = (
+        Index("ix_incidents_created_at_id", "created_at", "id"),
+        Index("ix_incidents_status_created_at", "status_id", "created_at", "id"),
+        Index("ix_incidents_priority_created_at", "priority_id", "created_at", "id"),
+        Index("ix_incidents_assignee_created_at", "assignee_id", "created_at", "id"),
+        Index("ix_incidents_reporter_id", "reporter_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
+    # インシデント番号（例：INC-YYYY-NNNN）。番号導入前のデータは NULL
+    incident_number = Column(String(20), unique=True, nullable=True, index=True)
     title = Column(String(200), nullable=False)
     description = Column(Text, nullable=False)
 
@@ -94,7 +108,8 @@ class Incident(Base):  # Baseを継承
         Integer, ForeignKey("users.id"), nullable=False
     )  # Userモデルのusersテーブルを参照
 
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # キーセットページネーションのキー（NULL はカーソル条件に一致しないため必須）
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # リレーションシップ (back_populatesを使用)
@@ -136,6 +151,7 @@ class Incident(Base):  # Baseを継承
     def to_dict(self, include_details=False):
         data = {
             "id": self.id,
+            "incident_number": self.incident_number,
             "title": self.title,
             "description": self.description,
             "status_id": self.status_id,
@@ -152,12 +168,8 @@ class Incident(Base):  # Baseを継承
             ),  # reporterのusernameを表示
             "created_at": self.created_at.isoformat(),
             "updated_at": self.updated_at.isoformat(),
-            "comments_count": (
-                len(self.comments) if self.comments else 0
-            ),  # lazy='dynamic'ではないのでlen()を使用
-            "attachments_count": (
-                len(self.attachments) if self.attachments else 0
-            ),  # lazy='dynamic'ではないのでlen()を使用
+            "comments_count": self._related_count("comments"),
+            "attachments_count": self._related_count("attachments"),
         }
         if include_details:
             data["comments"] = [
@@ -168,6 +180,13 @@ class Incident(Base):  # Baseを継承
             ]  # .all() は不要
         return data
 
+    def _related_count(self, relation):
+        """関連件数（読み込み済みのコレクションがあればその件数、なければ SQL 側の集計値）"""
+        loaded = self.__dict__.get(relation)
+        if loaded is not None:
+            return len(loaded)
+        return getattr(self, f"{relation}_count") or 0
+
 
 class Comment(Base):  # Baseを継承
     """コメントモデル"""
@@ -176,10 +195,10 @@ class Comment(Base):  # Baseを継承
 
     id = Column(Integer, primary_key=True, index=True)
     incident_id = Column(
-        Integer, ForeignKey("incidents.id"), nullable=True
+        Integer, ForeignKey("incidents.id"), nullable=True, index=True
     )  # インシデントへのFK (Nullable)
     problem_id = Column(
-        Integer, ForeignKey("problems.id"), nullable=True
+        Integer, ForeignKey("problems.id"), nullable=True, index=True
     )  # 問題へのFK (Nullable)
     user_id = Column(
         Integer, ForeignKey("users.id"), nullable=False
@@ -220,14 +239,15 @@ class Attachment(Base):  # Baseを継承
 
     id = Column(Integer, primary_key=True, index=True)
     incident_id = Column(
-        Integer, ForeignKey("incidents.id"), nullable=True
+        Integer, ForeignKey("incidents.id"), nullable=True, index=True
     )  # インシデントへのFK (Nullable)
     problem_id = Column(
-        Integer, ForeignKey("problems.id"), nullable=True
+        Integer, ForeignKey("problems.id"), nullable=True, index=True
     )  # 問題へのFK (Nullable)
     filename = Column(String(255), nullable=False)
     filepath = Column(String(512), nullable=False)  # ファイルの保存パス
     filesize = Column(Integer, nullable=True)  # ファイルサイズ (バイト単位)
+    content_hash = Column(String(64), nullable=True, index=True)  # SHA-256 (16進)
     uploaded_by_id = Column(
         Integer, ForeignKey("users.id"), nullable=False
     )  # Userモデルのusersテーブルを参照
@@ -253,9 +273,27 @@ class Attachment(Base):  # Baseを継承
             "filename": self.filename,
             "filepath": self.filepath,  # APIレスポンスに含めるか検討。セキュリティリスクの可能性。
             "filesize": self.filesize,
+            "content_hash": self.content_hash,
             "uploaded_by_id": self.uploaded_by_id,
             "uploaded_by": (
                 self.uploaded_by.username if self.uploaded_by else None
             ),  # アップロードしたユーザーのusernameを表示
             "created_at": self.created_at.isoformat(),
         }
+
+
+# 一覧表示用の関連件数（相関サブクエリ。loading プロファイルで undefer して一括取得する）
+Incident.comments_count = column_property(
+    select(func.count(Comment.id))
+    .where(Comment.incident_id == Incident.id)
+    .correlate_except(Comment)
+    .scalar_subquery(),
+    deferred=True,
+)
+Incident.attachments_count = column_property(
+    select(func.count(Attachment.id))
+    .where(Attachment.incident_id == Incident.id)
+    .correlate_except(Attachment)
+    .scalar_subquery(),
+    deferred=True,
+)
@@ -0,0 +1,74 @@
+"""
+リレーション読み込みプロファイル
+一覧（list）と詳細（detail）ごとに、to_dict やレスポンススキーマが参照する
+リレーションをまとめて読み込むオプションを定義する（N+1 クエリ防止）
+"""
+
+from typing import Dict, Tuple
+
+from sqlalchemy.orm import joinedload, selectinload, undefer
+from sqlalchemy.orm.interfaces import LoaderOption
+
+from .change import Change, ChangeComment, ChangeTask
+from .incident import Attachment, Comment, Incident
+from .problem import Problem
+from .user import User
+
+LIST = "list"
+DETAIL = "detail"
+
+# 多対一は joinedload（行数が増えない）、コレクションは selectinload（IN で一括取得）
+_INCIDENT_LIST = (
+    joinedload(Incident.status),
+    joinedload(Incident.priority),
+    joinedload(Incident.assignee),
+    joinedload(Incident.reporter),
+    undefer(Incident.comments_count),
+    undefer(Incident.attachments_count),
+)
+_PROBLEM_LIST = (
+    joinedload(Problem.status),
+    joinedload(Problem.priority),
+    joinedload(Problem.category),
+    joinedload(Problem.reporter),
+    joinedload(Problem.assignee),
+)
+_CHANGE_LIST = (
+    joinedload(Change.status),
+    joinedload(Change.priority),
+    joinedload(Change.requester),
+    joinedload(Change.assignee),
+)
+
+LOADING_PROFILES: Dict[type, Dict[str, Tuple[LoaderOption, ...]]] = {
+    Incident: {
+        LIST: _INCIDENT_LIST,
+        DETAIL: _INCIDENT_LIST[:4]
+        + (
+            selectinload(Incident.comments).joinedload(Comment.user),
+            selectinload(Incident.attachments).joinedload(Attachment.uploaded_by),
+        ),
+    },
+    Problem: {
+        LIST: _PROBLEM_LIST,
+        DETAIL: _PROBLEM_LIST,
+    },
+    Change: {
+        LIST: _CHANGE_LIST,
+        DETAIL: _CHANGE_LIST
+        + (
+            joinedload(Change.approver),
+            selectinload(Change.tasks).joinedload(ChangeTask.assignee),
+            selectinload(Change.comments).joinedload(ChangeComment.user),
+        ),
+    },
+    User: {
+        LIST: (),
+        DETAIL: (),
+    },
+}
+
+
+def loading_options(model: type, profile: str = LIST) -> Tuple[LoaderOption, ...]:
+    """モデルとプロファイルに対応する読み込みオプション"""
+    return LOADING_PROFILES[model][profile]
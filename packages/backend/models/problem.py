@@ -1,6 +1,15 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Table, Text
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Table,
+    Text,
+)
 from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.orm import relationship
 
@@ -12,7 +21,9 @@ from packages.backend.database import Base
 class ProblemIncidentLink(Base):
     __tablename__ = "problem_incident_links"
     problem_id = Column(Integer, ForeignKey("problems.id"), primary_key=True)
-    incident_id = Column(Integer, ForeignKey("incidents.id"), primary_key=True)
+    incident_id = Column(
+        Integer, ForeignKey("incidents.id"), primary_key=True, index=True
+    )  # インシデント側からの逆引き用
     linked_at = Column(DateTime, default=datetime.utcnow)
 
     # 親へのリレーション
@@ -86,7 +97,7 @@ class RootCauseAnalysis(Base):
     __tablename__ = "root_cause_analyses"
 
     id = Column(Integer, primary_key=True, index=True)
-    problem_id = Column(Integer, ForeignKey("problems.id"), nullable=False)
+    problem_id = Column(Integer, ForeignKey("problems.id"), nullable=False, index=True)
     description = Column(Text, nullable=False)
     identified_at = Column(DateTime, default=datetime.utcnow)  # 特定日
     identified_by_id = Column(
@@ -110,7 +121,7 @@ class Workaround(Base):
     __tablename__ = "workarounds"
 
     id = Column(Integer, primary_key=True, index=True)
-    problem_id = Column(Integer, ForeignKey("problems.id"), nullable=False)
+    problem_id = Column(Integer, ForeignKey("problems.id"), nullable=False, index=True)
     description = Column(Text, nullable=False)
     implemented_at = Column(DateTime, nullable=True)  # 実施日
     implemented_by_id = Column(
@@ -133,8 +144,20 @@ class Problem(Base):
     """問題モデル"""
 
     __tablename__ = "problems"
+    # キーセットページネーション用 (created_at, id) 複合インデックスと、
+    # 一覧の絞り込み条件 + 作成日時の降順に対応する複合インデックス
+    __table_args__ = (
+        Index("ix_problems_created_at_id", "created_at", "id"),
+        Index("ix_problems_status_created_at", "status_id", "created_at", "id"),
+        Index("ix_problems_priority_created_at", "priority_id", "created_at", "id"),
+        Index("ix_problems_category_created_at", "category_id", "created_at", "id"),
+        Index("ix_problems_assignee_created_at", "assignee_id", "created_at", "id"),
+        Index("ix_problems_reporter_created_at", "reporter_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
+    # 問題番号（例：PRB-YYYY-NNNN）。番号導入前のデータは NULL
+    problem_number = Column(String(20), unique=True, nullable=True, index=True)
     title = Column(String(200), nullable=False)
     description = Column(Text, nullable=False)
     impact_description = Column(Text, nullable=True)  # 影響範囲の説明
@@ -153,7 +176,8 @@ class Problem(Base):
         Integer, ForeignKey("users.id"), nullable=True
     )  # Userモデルのusersテーブルを参照
 
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # キーセットページネーションのキー（NULL はカーソル条件に一致しないため必須）
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     resolved_at = Column(DateTime, nullable=True)  # 解決日時
 
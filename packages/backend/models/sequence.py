@@ -0,0 +1,24 @@
+"""
+チケット採番モデル定義
+INC/PRB/CHG 番号の接頭辞・年ごとの連番を保持する
+"""
+
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, String
+
+from packages.backend.database import Base
+
+
+class TicketSequence(Base):
+    """チケット番号シーケンス（接頭辞・年ごとに1行）"""
+
+    __tablename__ = "ticket_sequences"
+
+    prefix = Column(String(10), primary_key=True)  # 例: "INC", "PRB", "CHG"
+    year = Column(Integer, primary_key=True)
+    last_value = Column(Integer, nullable=False, default=0)  # 払い出し済みの最大値
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<TicketSequence {self.prefix}-{self.year}: {self.last_value}>"
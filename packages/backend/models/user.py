@@ -10,6 +10,7 @@ from sqlalchemy import (
     Column,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Table,
@@ -41,6 +42,8 @@ class User(Base):
     """ユーザーモデル（ISO 27001準拠）"""
 
     __tablename__ = "users"
+    # キーセットページネーション用 (created_at, id) 複合インデックス
+    __table_args__ = (Index("ix_users_created_at_id", "created_at", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String(64), unique=True, nullable=False, index=True)
@@ -71,8 +74,8 @@ class User(Base):
     failed_login_attempts = Column(Integer, default=0)
     account_locked_until = Column(DateTime)
 
-    # 監査情報
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # 監査情報（created_at はキーセットページネーションのキーのため必須）
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     created_by = Column(String(64))
     updated_by = Column(String(64))
@@ -123,12 +126,11 @@ class User(Base):
         return check_password_hash(self.password_hash, password)
 
     def has_permission(self, permission_code: str) -> bool:
-        """権限チェック"""
-        for role in self.roles:
-            for perm in role.permissions:
-                if perm.code == permission_code:
-                    return True
-        return False
+        """権限チェック（ロール別の権限ビットマスクで判定）"""
+        from packages.backend.utils.permissions import permission_registry
+
+        bit = permission_registry.permissions.bit(permission_code)
+        return any(permission_registry.role_mask(role) & bit for role in self.roles)
 
     def has_role(self, role_name: str) -> bool:
         """ロールチェック"""
@@ -1,7 +1,7 @@
-import os  # ファイルアップロード用
+import os
 from datetime import datetime
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, make_response, request, send_file
 
 from backend.models import db
 from backend.models.incident import (
@@ -11,18 +11,15 @@ from backend.models.incident import (
     IncidentPriority,
     IncidentStatus,
 )
+from backend.models.loading import DETAIL, LIST, loading_options
 from backend.models.user import User  # Userモデルをインポート
+from backend.utils.attachment_storage import AttachmentTooLarge, attachment_storage
+from backend.utils.reference_data import reference_data
+from backend.utils.search import matching_ids
 
 # Blueprintの作成
 incidents_bp = Blueprint("incidents_bp", __name__, url_prefix="/api/incidents")
 
-# ファイルアップロード設定
-UPLOAD_FOLDER = os.path.join(
-    os.getcwd(), "uploads", "incidents"
-)  # プロジェクトルートからの相対パス
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
-
 
 # --- ヘルパー関数 ---
 def get_current_user_id():
@@ -34,6 +31,16 @@ def get_current_user_id():
     return user.id if user else None
 
 
+def _reference_response(model):
+    """参照データをメモリから ETag 付きで返す（If-None-Match が一致すれば 304）"""
+    table = reference_data.get(db.session, model)
+    response = make_response(table.body)
+    response.mimetype = "application/json"
+    response.set_etag(table.etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
+
+
 # --- APIエンドポイント ---
 
 
@@ -52,7 +59,8 @@ def get_incidents():
     page = request.args.get("page", 1, type=int)
     limit = request.args.get("limit", 10, type=int)
 
-    query = Incident.query
+    # 一覧表示で参照するリレーションと件数をまとめて読み込む
+    query = Incident.query.options(*loading_options(Incident, LIST))
 
     # フィルタリング
     if status_filter:
@@ -69,13 +77,8 @@ def get_incidents():
         if assignee_user:
             query = query.filter(Incident.assignee_id == assignee_user.id)
     if keyword_filter:
-        keyword_like = f"%{keyword_filter}%"
-        query = query.filter(
-            db.or_(
-                Incident.title.ilike(keyword_like),
-                Incident.description.ilike(keyword_like),
-            )
-        )
+        # 全文検索インデックスで絞り込む（タイトル・説明・コメントが対象）
+        query = query.filter(Incident.id.in_(matching_ids("incident", keyword_filter)))
 
     # ページネーション
     paginated_incidents = query.order_by(Incident.created_at.desc()).paginate(
@@ -121,17 +124,17 @@ def create_incident():
         # 実際のシステムでは認証エラーとして処理
         return jsonify({"error": "Reporter user not found or not authenticated"}), 400
 
-    # 優先度IDの取得
-    priority_obj = IncidentPriority.query.filter_by(name=priority_name).first()
-    if not priority_obj:
+    # 優先度IDの取得（参照データレジストリから）
+    priority_id = reference_data.get(db.session, IncidentPriority).id_for(priority_name)
+    if not priority_id:
         return jsonify({"error": f"Invalid priority name: {priority_name}"}), 400
 
     # デフォルトステータスを "新規" またはそれに相当するものに設定
     # ここでは '新規' ステータスが事前にDBに存在することを想定
-    status_obj = IncidentStatus.query.filter_by(
-        name="新規"
-    ).first()  # "新規" は実際のステータス名に合わせる
-    if not status_obj:
+    status_id = reference_data.get(db.session, IncidentStatus).id_for(
+        "新規"
+    )  # "新規" は実際のステータス名に合わせる
+    if not status_id:
         # 見つからない場合はエラー、またはデフォルトステータスを作成する処理
         return (
             jsonify(
@@ -157,8 +160,8 @@ def create_incident():
         new_incident = Incident(
             title=title,
             description=description,
-            priority_id=priority_obj.id,
-            status_id=status_obj.id,  # 新規作成時はデフォルトステータス
+            priority_id=priority_id,
+            status_id=status_id,  # 新規作成時はデフォルトステータス
             reporter_id=reporter_id,
             assignee_id=assignee_id,
         )
@@ -177,7 +180,9 @@ def create_incident():
 def get_incident_detail(incident_id):
     """特定のインシデント詳細を取得"""
     # TODO: 認証が必要
-    incident = Incident.query.get_or_404(incident_id)
+    incident = Incident.query.options(*loading_options(Incident, DETAIL)).get_or_404(
+        incident_id
+    )
     return jsonify(incident.to_dict(include_details=True)), 200
 
 
@@ -196,16 +201,20 @@ def update_incident(incident_id):
         incident.description = data["description"]
 
     if "status" in data:  # ステータス名で更新
-        status_obj = IncidentStatus.query.filter_by(name=data["status"]).first()
-        if status_obj:
-            incident.status_id = status_obj.id
+        status_id = reference_data.get(db.session, IncidentStatus).id_for(
+            data["status"]
+        )
+        if status_id:
+            incident.status_id = status_id
         else:
             return jsonify({"error": f"Invalid status name: {data['status']}"}), 400
 
     if "priority" in data:  # 優先度名で更新
-        priority_obj = IncidentPriority.query.filter_by(name=data["priority"]).first()
-        if priority_obj:
-            incident.priority_id = priority_obj.id
+        priority_id = reference_data.get(db.session, IncidentPriority).id_for(
+            data["priority"]
+        )
+        if priority_id:
+            incident.priority_id = priority_id
         else:
             return jsonify({"error": f"Invalid priority name: {data['priority']}"}), 400
 
@@ -310,20 +319,13 @@ def add_incident_attachment(incident_id):
 
         filename = secure_filename(file.filename)
 
-        # インシデントIDごとのサブディレクトリを作成
-        incident_upload_path = os.path.join(UPLOAD_FOLDER, str(incident_id))
-        if not os.path.exists(incident_upload_path):
-            os.makedirs(incident_upload_path)
-
-        filepath = os.path.join(incident_upload_path, filename)
-
-        # ファイルサイズの取得
-        file.seek(0, os.SEEK_END)
-        filesize = file.tell()
-        file.seek(0)  # ポインタを先頭に戻す
+        stored = None
 
         try:
-            file.save(filepath)
+            # 申告サイズで事前に拒否し、保存中も上限を超えた時点で中断
+            # 実体は内容ハッシュで保存され、同じ内容のファイルは共有される
+            attachment_storage.check_declared_size(request.content_length)
+            stored = attachment_storage.save_stream(file.stream)
 
             # uploaded_by_id は現在のログインユーザーIDから取得
             uploaded_by_id = get_current_user_id()
@@ -338,18 +340,21 @@ def add_incident_attachment(incident_id):
             new_attachment = Attachment(
                 incident_id=incident.id,
                 filename=filename,
-                filepath=filepath,  # 保存パスをDBに記録
-                filesize=filesize,
+                filepath=stored.path,  # 実体ファイルのパスをDBに記録
+                filesize=stored.size,
+                content_hash=stored.sha256,
                 uploaded_by_id=uploaded_by_id,
             )
             db.session.add(new_attachment)
             db.session.commit()
             return jsonify(new_attachment.to_dict()), 201
+        except AttachmentTooLarge as e:
+            return jsonify({"error": str(e)}), 413
         except Exception as e:
             db.session.rollback()
-            # ファイル保存に失敗した場合、保存されたファイルを削除するクリーンアップ処理も検討
-            if os.path.exists(filepath):
-                os.remove(filepath)
+            # 新規に保存した実体はDB登録に失敗した場合に削除（既存の実体は他から参照されている）
+            if stored and not stored.deduplicated:
+                attachment_storage.remove_blob(stored.sha256)
             return (
                 jsonify({"error": "Failed to upload attachment", "details": str(e)}),
                 500,
@@ -358,17 +363,37 @@ def add_incident_attachment(incident_id):
     return jsonify({"error": "File upload failed for unknown reasons"}), 500
 
 
+@incidents_bp.route(
+    "/<int:incident_id>/attachments/<int:attachment_id>/download", methods=["GET"]
+)
+def download_incident_attachment(incident_id, attachment_id):
+    """インシデントの添付ファイルをダウンロード（Range・条件付き要求は Werkzeug が処理）"""
+    # TODO: 認証が必要
+    attachment = Attachment.query.filter_by(
+        id=attachment_id, incident_id=incident_id
+    ).first_or_404()
+    if not os.path.isfile(attachment.filepath):
+        return jsonify({"error": "Attachment file not found"}), 404
+    return send_file(
+        attachment.filepath,
+        as_attachment=True,
+        download_name=attachment.filename,
+        conditional=True,  # Range (206/416) と If-None-Match / If-Range に対応
+        etag=attachment.content_hash or True,
+        last_modified=attachment.created_at,
+        max_age=0,
+    )
+
+
 @incidents_bp.route("/statuses", methods=["GET"])
 def get_incident_statuses():
     """インシデントステータス一覧取得"""
     # TODO: 認証は不要かもしれないが、用途に応じて検討
-    statuses = IncidentStatus.query.order_by(IncidentStatus.id).all()
-    return jsonify([status.to_dict() for status in statuses]), 200
+    return _reference_response(IncidentStatus)
 
 
 @incidents_bp.route("/priorities", methods=["GET"])
 def get_incident_priorities():
     """インシデント優先度一覧取得"""
     # TODO: 認証は不要かもしれないが、用途に応じて検討
-    priorities = IncidentPriority.query.order_by(IncidentPriority.id).all()
-    return jsonify([priority.to_dict() for priority in priorities]), 200
+    return _reference_response(IncidentPriority)
@@ -1,22 +1,28 @@
-import os
-import shutil  # ファイル操作用
+import logging
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
-from sqlalchemy.orm import Session
-
-from backend import models, schemas
-from backend.database import get_db
-from backend.dependencies import get_current_active_user  # ダミーの認証を使用
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from packages.backend import models, schemas
+from packages.backend.async_database import get_async_db
+from packages.backend.dependencies import get_current_active_user  # ダミーの認証を使用
+from packages.backend.utils.attachment_storage import (
+    AttachmentTooLarge,
+    attachment_storage,
+    safe_filename,
+)
+from packages.backend.utils.problem_links import sync_incident_links
+from packages.backend.utils.reference_data import reference_data, reference_response
+from packages.backend.utils.search import matching_ids
 
 # 実際のUserモデルとスキーマを使用する場合は以下のようにする
-# from backend.models.user import User as UserModel
-# from backend.schemas.user import User as UserSchema
+# from packages.backend.models.user import User as UserModel
+# from packages.backend.schemas.user import User as UserSchema
 
-# アップロードディレクトリの設定
-UPLOAD_DIR_PROBLEMS = "uploads/problems"
-if not os.path.exists(UPLOAD_DIR_PROBLEMS):
-    os.makedirs(UPLOAD_DIR_PROBLEMS, exist_ok=True)
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/api/problems",
@@ -25,8 +31,20 @@ router = APIRouter(
 
 
 # --- ヘルパー関数 ---
-def get_problem_or_404(problem_id: int, db: Session):
-    problem = db.query(models.Problem).filter(models.Problem.id == problem_id).first()
+# 詳細レスポンスで参照するリレーション（非同期セッションでは遅延ロードできない）
+PROBLEM_DETAIL_LOADERS = (
+    selectinload(models.Problem.comments),
+    selectinload(models.Problem.attachments),
+    selectinload(models.Problem.root_cause_analyses),
+    selectinload(models.Problem.workarounds),
+    selectinload(models.Problem.incident_links),
+)
+
+
+async def get_problem_or_404(problem_id: int, db: AsyncSession, *options):
+    problem = await db.get(
+        models.Problem, problem_id, options=options, populate_existing=bool(options)
+    )
     if not problem:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -35,13 +53,19 @@ def get_problem_or_404(problem_id: int, db: Session):
     return problem
 
 
+async def reference_exists(db: AsyncSession, model, row_id: int) -> bool:
+    """ステータス・優先度・カテゴリの存在チェック（参照データレジストリを使用）"""
+    table = await reference_data.get_async(db, model)
+    return table.has_id(row_id)
+
+
 # --- 問題 (Problem) のCRUD ---
 
 
 @router.post("", response_model=schemas.Problem, status_code=status.HTTP_201_CREATED)
 async def create_problem(
     problem_in: schemas.ProblemCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(
         get_current_active_user
     ),  # Userスキーマはdependenciesのもの
@@ -59,39 +83,25 @@ async def create_problem(
     - **linked_incident_ids**: 関連付けるインシデントのIDリスト
     """
     # 存在チェック: status_id, priority_id, category_id, assigned_to_id
-    if (
-        not db.query(models.ProblemStatus)
-        .filter(models.ProblemStatus.id == problem_in.status_id)
-        .first()
-    ):
+    if not await reference_exists(db, models.ProblemStatus, problem_in.status_id):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"ProblemStatus with id {problem_in.status_id} not found.",
         )
-    if (
-        not db.query(models.ProblemPriority)
-        .filter(models.ProblemPriority.id == problem_in.priority_id)
-        .first()
-    ):
+    if not await reference_exists(db, models.ProblemPriority, problem_in.priority_id):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"ProblemPriority with id {problem_in.priority_id} not found.",
         )
-    if (
-        problem_in.category_id
-        and not db.query(models.ProblemCategory)
-        .filter(models.ProblemCategory.id == problem_in.category_id)
-        .first()
+    if problem_in.category_id and not await reference_exists(
+        db, models.ProblemCategory, problem_in.category_id
     ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"ProblemCategory with id {problem_in.category_id} not found.",
         )
-    if (
-        problem_in.assigned_to_id
-        and not db.query(models.User)
-        .filter(models.User.id == problem_in.assigned_to_id)
-        .first()
+    if problem_in.assigned_to_id and not await db.get(
+        models.User, problem_in.assigned_to_id
     ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -103,31 +113,21 @@ async def create_problem(
         reported_by_id=current_user.id,
     )
     db.add(db_problem)
-    db.commit()
-    db.refresh(db_problem)
+    await db.flush()  # リンク作成用に ID を確定
 
-    # 関連インシデントの処理
+    # 関連インシデントの処理（問題の作成と同じトランザクションで一括登録）
     if problem_in.linked_incident_ids:
-        for incident_id in problem_in.linked_incident_ids:
-            incident = (
-                db.query(models.Incident)
-                .filter(models.Incident.id == incident_id)
-                .first()
+        missing = await sync_incident_links(
+            db, db_problem.id, problem_in.linked_incident_ids, existing=set()
+        )
+        if missing:
+            logger.warning(
+                f"Incidents with ids {missing} not found when linking to problem {db_problem.id}"
             )
-            if incident:
-                link = models.ProblemIncidentLink(
-                    problem_id=db_problem.id, incident_id=incident_id
-                )
-                db.add(link)
-            else:
-                # 存在しないインシデントIDが指定された場合の警告ログ等をここに追加可能
-                print(
-                    f"Warning: Incident with id {incident_id} not found when linking to problem {db_problem.id}"
-                )
-        db.commit()
-        db.refresh(db_problem)  # リンク後の状態を再読み込み
-
-    return db_problem
+    await db.commit()
+
+    # リンク後の状態を関連データごと再読み込み
+    return await get_problem_or_404(db_problem.id, db, *PROBLEM_DETAIL_LOADERS)
 
 
 @router.get("", response_model=List[schemas.Problem])
@@ -140,7 +140,7 @@ async def read_problems(
     assigned_to_id: Optional[int] = None,
     reported_by_id: Optional[int] = None,
     keyword: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     # current_user: models.User = Depends(get_current_active_user) # 一覧取得は認証なしでも良いケースあり
 ):
     """
@@ -152,80 +152,71 @@ async def read_problems(
     - **category_id**: カテゴリIDでフィルタ
     - **assigned_to_id**: 担当者IDでフィルタ
     - **reported_by_id**:報告者IDでフィルタ
-    - **keyword**: タイトルまたは説明に含まれるキーワードでフィルタ
+    - **keyword**: タイトル・説明・コメント・RCA・回避策に含まれるキーワードでフィルタ
     """
-    query = db.query(models.Problem)
+    query = select(models.Problem)
 
     if status_id is not None:
-        query = query.filter(models.Problem.status_id == status_id)
+        query = query.where(models.Problem.status_id == status_id)
     if priority_id is not None:
-        query = query.filter(models.Problem.priority_id == priority_id)
+        query = query.where(models.Problem.priority_id == priority_id)
     if category_id is not None:
-        query = query.filter(models.Problem.category_id == category_id)
+        query = query.where(models.Problem.category_id == category_id)
     if assigned_to_id is not None:
-        query = query.filter(models.Problem.assigned_to_id == assigned_to_id)
+        query = query.where(models.Problem.assignee_id == assigned_to_id)
     if reported_by_id is not None:
-        query = query.filter(models.Problem.reported_by_id == reported_by_id)
+        query = query.where(models.Problem.reporter_id == reported_by_id)
     if keyword:
-        query = query.filter(
-            (models.Problem.title.ilike(f"%{keyword}%"))
-            | (models.Problem.description.ilike(f"%{keyword}%"))
-        )
+        # 全文検索インデックスで絞り込む（テーブル全体の走査を避ける）
+        query = query.where(models.Problem.id.in_(matching_ids("problem", keyword)))
 
-    problems = (
-        query.order_by(models.Problem.created_at.desc()).offset(skip).limit(limit).all()
+    result = await db.execute(
+        query.order_by(models.Problem.created_at.desc()).offset(skip).limit(limit)
     )
-    return problems
+    return result.scalars().all()
 
 
 @router.get("/{problem_id}", response_model=schemas.Problem)
 async def read_problem(
     problem_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     # current_user: models.User = Depends(get_current_active_user)
 ):
     """
     指定されたIDの問題詳細を取得します。
     関連するコメント、添付ファイル、RCA、回避策も含まれます。
     """
-    db_problem = get_problem_or_404(problem_id, db)
-    # Pydanticスキーマがリレーションを解決してくれる
-    return db_problem
+    # Pydanticスキーマが参照するリレーションはまとめて読み込む
+    return await get_problem_or_404(problem_id, db, *PROBLEM_DETAIL_LOADERS)
 
 
 @router.put("/{problem_id}", response_model=schemas.Problem)
 async def update_problem(
     problem_id: int,
     problem_in: schemas.ProblemUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
     """
     指定されたIDの問題情報を更新します。
     更新可能なフィールドは `ProblemUpdate` スキーマを参照してください。
     """
-    db_problem = get_problem_or_404(problem_id, db)
+    db_problem = await get_problem_or_404(problem_id, db)
 
     update_data = problem_in.model_dump(
         exclude_unset=True, exclude={"linked_incident_ids"}
     )
 
     # 存在チェック: status_id, priority_id, category_id, assigned_to_id
-    if (
-        "status_id" in update_data
-        and not db.query(models.ProblemStatus)
-        .filter(models.ProblemStatus.id == update_data["status_id"])
-        .first()
+    if "status_id" in update_data and not await reference_exists(
+        db, models.ProblemStatus, update_data["status_id"]
     ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"ProblemStatus with id {update_data['status_id']} not found.",
         )
-    if (
-        "priority_id" in update_data
-        and not db.query(models.ProblemPriority)
-        .filter(models.ProblemPriority.id == update_data["priority_id"])
-        .first()
+    if "priority_id" in update_data and not await reference_exists(
+        db, models.ProblemPriority, update_data["priority_id"]
     ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -234,9 +225,9 @@ async def update_problem(
     if (
         "category_id" in update_data
         and update_data["category_id"] is not None
-        and not db.query(models.ProblemCategory)
-        .filter(models.ProblemCategory.id == update_data["category_id"])
-        .first()
+        and not await reference_exists(
+            db, models.ProblemCategory, update_data["category_id"]
+        )
     ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -245,9 +236,7 @@ async def update_problem(
     if (
         "assigned_to_id" in update_data
         and update_data["assigned_to_id"] is not None
-        and not db.query(models.User)
-        .filter(models.User.id == update_data["assigned_to_id"])
-        .first()
+        and not await db.get(models.User, update_data["assigned_to_id"])
     ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -259,46 +248,33 @@ async def update_problem(
 
     # 関連インシデントの更新処理
     if problem_in.linked_incident_ids is not None:
-        # 既存のリンクを一旦全て削除
-        db.query(models.ProblemIncidentLink).filter(
-            models.ProblemIncidentLink.problem_id == problem_id
-        ).delete()
-        # 新しいリンクを追加
-        for incident_id in problem_in.linked_incident_ids:
-            incident = (
-                db.query(models.Incident)
-                .filter(models.Incident.id == incident_id)
-                .first()
+        # 既存のリンクとの差分のみ追加・削除
+        missing = await sync_incident_links(
+            db, problem_id, problem_in.linked_incident_ids
+        )
+        if missing:
+            logger.warning(
+                f"Incidents with ids {missing} not found when updating links for problem {problem_id}"
             )
-            if incident:
-                link = models.ProblemIncidentLink(
-                    problem_id=problem_id, incident_id=incident_id
-                )
-                db.add(link)
-            else:
-                print(
-                    f"Warning: Incident with id {incident_id} not found when updating links for problem {problem_id}"
-                )
 
-    db.commit()
-    db.refresh(db_problem)
-    return db_problem
+    await db.commit()
+    return await get_problem_or_404(problem_id, db, *PROBLEM_DETAIL_LOADERS)
 
 
 @router.delete("/{problem_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_problem(
     problem_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user),  # 権限チェックが必要
 ):
     """
     指定されたIDの問題を削除します。
     関連するRCA、回避策、コメント、添付ファイルもカスケード削除されます（モデル定義による）。
     """
-    db_problem = get_problem_or_404(problem_id, db)
+    db_problem = await get_problem_or_404(problem_id, db)
     # TODO: 権限チェック (例: current_user が報告者または管理者か)
-    db.delete(db_problem)
-    db.commit()
+    await db.delete(db_problem)
+    await db.commit()
     return None  # HTTP 204 No Content
 
 
@@ -313,18 +289,15 @@ async def delete_problem(
 async def create_root_cause_analysis(
     problem_id: int,
     rca_in: schemas.RootCauseAnalysisCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
     """
     特定の問題に根本原因分析を登録します。
     """
-    db_problem = get_problem_or_404(problem_id, db)
-    if (
-        rca_in.identified_by_id
-        and not db.query(models.User)
-        .filter(models.User.id == rca_in.identified_by_id)
-        .first()
+    db_problem = await get_problem_or_404(problem_id, db)
+    if rca_in.identified_by_id and not await db.get(
+        models.User, rca_in.identified_by_id
     ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -340,18 +313,25 @@ async def create_root_cause_analysis(
         db_rca.identified_by_id = current_user.id
 
     db.add(db_rca)
-    db.commit()
-    db.refresh(db_rca)
+    await db.commit()
+    await db.refresh(db_rca)
     return db_rca
 
 
 @router.get("/{problem_id}/rca", response_model=List[schemas.RootCauseAnalysis])
-async def read_root_cause_analyses(problem_id: int, db: Session = Depends(get_db)):
+async def read_root_cause_analyses(
+    problem_id: int, db: AsyncSession = Depends(get_async_db)
+):
     """
     特定の問題の根本原因分析の一覧を取得します。
     """
-    db_problem = get_problem_or_404(problem_id, db)
-    return db_problem.root_cause_analyses
+    await get_problem_or_404(problem_id, db)
+    result = await db.execute(
+        select(models.RootCauseAnalysis).where(
+            models.RootCauseAnalysis.problem_id == problem_id
+        )
+    )
+    return result.scalars().all()
 
 
 # --- 回避策 (Workaround) ---
@@ -365,18 +345,15 @@ async def read_root_cause_analyses(problem_id: int, db: Session = Depends(get_db
 async def create_workaround(
     problem_id: int,
     workaround_in: schemas.WorkaroundCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
     """
     特定の問題に回避策を登録します。
     """
-    db_problem = get_problem_or_404(problem_id, db)
-    if (
-        workaround_in.implemented_by_id
-        and not db.query(models.User)
-        .filter(models.User.id == workaround_in.implemented_by_id)
-        .first()
+    db_problem = await get_problem_or_404(problem_id, db)
+    if workaround_in.implemented_by_id and not await db.get(
+        models.User, workaround_in.implemented_by_id
     ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -391,18 +368,21 @@ async def create_workaround(
         db_workaround.implemented_by_id = current_user.id
 
     db.add(db_workaround)
-    db.commit()
-    db.refresh(db_workaround)
+    await db.commit()
+    await db.refresh(db_workaround)
     return db_workaround
 
 
 @router.get("/{problem_id}/workarounds", response_model=List[schemas.Workaround])
-async def read_workarounds(problem_id: int, db: Session = Depends(get_db)):
+async def read_workarounds(problem_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     特定の問題の回避策の一覧を取得します。
     """
-    db_problem = get_problem_or_404(problem_id, db)
-    return db_problem.workarounds
+    await get_problem_or_404(problem_id, db)
+    result = await db.execute(
+        select(models.Workaround).where(models.Workaround.problem_id == problem_id)
+    )
+    return result.scalars().all()
 
 
 @router.put(
@@ -412,20 +392,18 @@ async def update_workaround(
     problem_id: int,
     workaround_id: int,
     workaround_in: schemas.WorkaroundCreate,  # 更新はCreateスキーマを流用 (部分更新は別途Updateスキーマを作成)
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
     """
     特定の問題の特定の回避策を更新します。
     """
-    db_problem = get_problem_or_404(problem_id, db)
-    db_workaround = (
-        db.query(models.Workaround)
-        .filter(
+    db_problem = await get_problem_or_404(problem_id, db)
+    db_workaround = await db.scalar(
+        select(models.Workaround).where(
             models.Workaround.id == workaround_id,
             models.Workaround.problem_id == problem_id,
         )
-        .first()
     )
     if not db_workaround:
         raise HTTPException(
@@ -437,9 +415,7 @@ async def update_workaround(
     if (
         "implemented_by_id" in update_data
         and update_data["implemented_by_id"] is not None
-        and not db.query(models.User)
-        .filter(models.User.id == update_data["implemented_by_id"])
-        .first()
+        and not await db.get(models.User, update_data["implemented_by_id"])
     ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -449,8 +425,8 @@ async def update_workaround(
     for field, value in update_data.items():
         setattr(db_workaround, field, value)
 
-    db.commit()
-    db.refresh(db_workaround)
+    await db.commit()
+    await db.refresh(db_workaround)
     return db_workaround
 
 
@@ -460,20 +436,18 @@ async def update_workaround(
 async def delete_workaround(
     problem_id: int,
     workaround_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
     """
     特定の問題の特定の回避策を削除します。
     """
-    db_problem = get_problem_or_404(problem_id, db)
-    db_workaround = (
-        db.query(models.Workaround)
-        .filter(
+    db_problem = await get_problem_or_404(problem_id, db)
+    db_workaround = await db.scalar(
+        select(models.Workaround).where(
             models.Workaround.id == workaround_id,
             models.Workaround.problem_id == problem_id,
         )
-        .first()
     )
     if not db_workaround:
         raise HTTPException(
@@ -481,8 +455,8 @@ async def delete_workaround(
             detail=f"Workaround with id {workaround_id} for problem {problem_id} not found",
         )
 
-    db.delete(db_workaround)
-    db.commit()
+    await db.delete(db_workaround)
+    await db.commit()
     return None
 
 
@@ -498,21 +472,21 @@ async def delete_workaround(
 async def add_problem_comment(
     problem_id: int,
     comment_in: schemas.CommentCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
     """
     特定の問題にコメントを追加します。
     """
-    db_problem = get_problem_or_404(problem_id, db)
+    db_problem = await get_problem_or_404(problem_id, db)
     db_comment = models.Comment(
         content=comment_in.content,
         problem_id=db_problem.id,
         user_id=current_user.id,  # ログインユーザーID
     )
     db.add(db_comment)
-    db.commit()
-    db.refresh(db_comment)
+    await db.commit()
+    await db.refresh(db_comment)
     # username を含めるために、User情報を結合して返すか、スキーマ側で対応
     # ここではスキーマが username を Optional で持っているので、明示的に設定はしない
     # 必要なら、db_comment.user をロードして username を取得する
@@ -520,32 +494,28 @@ async def add_problem_comment(
 
 
 @router.get("/{problem_id}/comments", response_model=List[schemas.Comment])
-async def get_problem_comments(problem_id: int, db: Session = Depends(get_db)):
+async def get_problem_comments(
+    problem_id: int, db: AsyncSession = Depends(get_async_db)
+):
     """
     特定の問題のコメント一覧を取得します。
     """
-    db_problem = get_problem_or_404(problem_id, db)
+    db_problem = await get_problem_or_404(problem_id, db)
     # コメントスキーマ側で username を解決できるように、リレーションシップがロードされることを期待
     # 必要であれば joinedload(models.Comment.user) などを使用
-    comments = (
-        db.query(models.Comment)
-        .filter(models.Comment.problem_id == problem_id)
+    result = await db.execute(
+        select(models.Comment)
+        .options(selectinload(models.Comment.user))
+        .where(models.Comment.problem_id == problem_id)
         .order_by(models.Comment.created_at.asc())
-        .all()
     )
-    return comments
+    return result.scalars().all()
 
 
 # --- 添付ファイル (Attachment) ---
 # Incident管理と同様のロジックを参考に実装
 
 
-def get_problem_attachment_dir(problem_id: int):
-    attachment_dir = os.path.join(UPLOAD_DIR_PROBLEMS, str(problem_id))
-    os.makedirs(attachment_dir, exist_ok=True)
-    return attachment_dir
-
-
 @router.post(
     "/{problem_id}/attachments",
     response_model=schemas.Attachment,
@@ -554,23 +524,25 @@ def get_problem_attachment_dir(problem_id: int):
 async def add_problem_attachment(
     problem_id: int,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
     """
     特定の問題にファイルを添付します。
     """
-    db_problem = get_problem_or_404(problem_id, db)
-    attachment_dir = get_problem_attachment_dir(problem_id)
+    db_problem = await get_problem_or_404(problem_id, db)
 
-    # ファイル名を安全にする（werkzeugはFlask用なので、ここでは単純なreplace等で対応するか、ライブラリ導入）
-    # ここでは簡易的にファイル名そのまま or FastAPI の UploadFile.filename を信頼
-    filename = file.filename
-    filepath = os.path.join(attachment_dir, filename)
+    # ディレクトリ成分を除いてパストラバーサルを防ぐ
+    filename = safe_filename(file.filename)
 
     try:
-        with open(filepath, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # チャンク単位で書き込み、SHA-256 とサイズを同時に取得
+        # 実体は内容ハッシュで保存され、同じ内容のファイルは共有される
+        stored = await attachment_storage.save_upload(file)
+    except AttachmentTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -581,30 +553,33 @@ async def add_problem_attachment(
 
     db_attachment = models.Attachment(
         filename=filename,
-        filepath=filepath,  # 相対パスまたは絶対パス。ここでは相対パスを想定。
-        filesize=os.path.getsize(filepath),  # 保存後のファイルサイズを取得
+        filepath=stored.path,  # 内容ハッシュで決まる実体ファイルのパス
+        filesize=stored.size,
+        content_hash=stored.sha256,
         problem_id=db_problem.id,
         uploaded_by_id=current_user.id,
     )
     db.add(db_attachment)
-    db.commit()
-    db.refresh(db_attachment)
+    await db.commit()
+    await db.refresh(db_attachment)
     return db_attachment
 
 
 @router.get("/{problem_id}/attachments", response_model=List[schemas.Attachment])
-async def get_problem_attachments(problem_id: int, db: Session = Depends(get_db)):
+async def get_problem_attachments(
+    problem_id: int, db: AsyncSession = Depends(get_async_db)
+):
     """
     特定の問題の添付ファイル一覧を取得します。
     """
-    db_problem = get_problem_or_404(problem_id, db)
+    db_problem = await get_problem_or_404(problem_id, db)
     # スキーマ側で uploaded_by (username) を解決できるように期待
-    attachments = (
-        db.query(models.Attachment)
-        .filter(models.Attachment.problem_id == problem_id)
-        .all()
+    result = await db.execute(
+        select(models.Attachment)
+        .options(selectinload(models.Attachment.uploaded_by))
+        .where(models.Attachment.problem_id == problem_id)
     )
-    return attachments
+    return result.scalars().all()
 
 
 # --- マスタデータ取得API ---
@@ -613,18 +588,27 @@ async def get_problem_attachments(problem_id: int, db: Session = Depends(get_db)
 @router.get(
     "/statuses/", response_model=List[schemas.ProblemStatus]
 )  # 末尾のスラッシュで /statuses と区別
-async def read_problem_statuses(db: Session = Depends(get_db)):
-    """問題ステータスの一覧を取得します。"""
-    return db.query(models.ProblemStatus).order_by(models.ProblemStatus.id).all()
+async def read_problem_statuses(
+    request: Request, db: AsyncSession = Depends(get_async_db)
+):
+    """問題ステータスの一覧を取得します。（メモリ上のスナップショットを ETag 付きで返す）"""
+    table = await reference_data.get_async(db, models.ProblemStatus)
+    return reference_response(request, table)
 
 
 @router.get("/priorities/", response_model=List[schemas.ProblemPriority])
-async def read_problem_priorities(db: Session = Depends(get_db)):
-    """問題優先度の一覧を取得します。"""
-    return db.query(models.ProblemPriority).order_by(models.ProblemPriority.id).all()
+async def read_problem_priorities(
+    request: Request, db: AsyncSession = Depends(get_async_db)
+):
+    """問題優先度の一覧を取得します。（メモリ上のスナップショットを ETag 付きで返す）"""
+    table = await reference_data.get_async(db, models.ProblemPriority)
+    return reference_response(request, table)
 
 
 @router.get("/categories/", response_model=List[schemas.ProblemCategory])
-async def read_problem_categories(db: Session = Depends(get_db)):
-    """問題カテゴリの一覧を取得します。"""
-    return db.query(models.ProblemCategory).order_by(models.ProblemCategory.id).all()
+async def read_problem_categories(
+    request: Request, db: AsyncSession = Depends(get_async_db)
+):
+    """問題カテゴリの一覧を取得します。（メモリ上のスナップショットを ETag 付きで返す）"""
+    table = await reference_data.get_async(db, models.ProblemCategory)
+    return reference_response(request, table)
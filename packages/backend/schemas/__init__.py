@@ -1,11 +1,4 @@
 # Schemas package initialization
 # Import schemas as needed from individual modules
 
-from .problem import (
-    Problem,
-    ProblemBase,
-    ProblemCreate,
-    ProblemPriority,
-    ProblemStatus,
-    ProblemUpdate,
-)
+from .problem import Problem, ProblemBase, ProblemCreate, ProblemUpdate
@@ -3,95 +3,93 @@
 """
 
 from datetime import datetime
-from enum import Enum
 from typing import List, Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
+# 変更タイプ・リスクはモデルの Enum カラムと同じ値を受け付ける
+from packages.backend.models.change import ChangeRisk, ChangeType
 
-class ChangeStatus(str, Enum):
-    DRAFT = "draft"
-    SUBMITTED = "submitted"
-    APPROVED = "approved"
-    REJECTED = "rejected"
-    IMPLEMENTATION = "implementation"
-    REVIEW = "review"
-    COMPLETE = "complete"
-    CANCELLED = "cancelled"
-
-
-class ChangePriority(str, Enum):
-    LOW = "low"
-    MEDIUM = "medium"
-    HIGH = "high"
-    CRITICAL = "critical"
-
-
-class ChangeRisk(str, Enum):
-    LOW = "low"
-    MEDIUM = "medium"
-    HIGH = "high"
+from .reference import ReferenceItem
+from .user import UserSummary
 
 
 class ChangeBase(BaseModel):
-    title: str
+    title: str = Field(..., max_length=200)
     description: str
     justification: Optional[str] = None
-    priority: ChangePriority = ChangePriority.MEDIUM
-    risk_level: ChangeRisk = ChangeRisk.MEDIUM
-    category: Optional[str] = None
-    impact: Optional[str] = None
+    change_type: Optional[ChangeType] = ChangeType.NORMAL
+    risk_level: Optional[ChangeRisk] = ChangeRisk.MEDIUM
+    planned_start: Optional[datetime] = None
+    planned_end: Optional[datetime] = None
+    impact_description: Optional[str] = None
+    affected_services: Optional[str] = None  # JSON形式
+    affected_users: Optional[int] = 0
     implementation_plan: Optional[str] = None
     rollback_plan: Optional[str] = None
-    testing_plan: Optional[str] = None
-    scheduled_start: Optional[datetime] = None
-    scheduled_end: Optional[datetime] = None
+    test_plan: Optional[str] = None
+    is_emergency: Optional[bool] = False
 
 
 class ChangeCreate(ChangeBase):
     requester_id: int
     assignee_id: Optional[int] = None
+    # 省略時は既定のステータス（申請中）・優先度（中）
+    status_id: Optional[int] = None
+    priority_id: Optional[int] = None
 
 
 class ChangeUpdate(BaseModel):
-    title: Optional[str] = None
+    title: Optional[str] = Field(None, max_length=200)
     description: Optional[str] = None
     justification: Optional[str] = None
-    priority: Optional[ChangePriority] = None
+    change_type: Optional[ChangeType] = None
     risk_level: Optional[ChangeRisk] = None
-    category: Optional[str] = None
-    impact: Optional[str] = None
+    planned_start: Optional[datetime] = None
+    planned_end: Optional[datetime] = None
+    impact_description: Optional[str] = None
+    affected_services: Optional[str] = None
+    affected_users: Optional[int] = None
     implementation_plan: Optional[str] = None
     rollback_plan: Optional[str] = None
-    testing_plan: Optional[str] = None
-    scheduled_start: Optional[datetime] = None
-    scheduled_end: Optional[datetime] = None
-    status: Optional[ChangeStatus] = None
+    test_plan: Optional[str] = None
+    is_emergency: Optional[bool] = None
+    status_id: Optional[int] = None
+    priority_id: Optional[int] = None
     assignee_id: Optional[int] = None
+    approver_id: Optional[int] = None
+    implementer_id: Optional[int] = None
 
 
 class ChangeInDB(ChangeBase):
     id: int
-    change_id: str
-    status: ChangeStatus
+    change_number: str
+    status_id: int
+    priority_id: int
     requester_id: int
     assignee_id: Optional[int] = None
-    created_at: datetime
-    updated_at: datetime
+    approver_id: Optional[int] = None
+    implementer_id: Optional[int] = None
     actual_start: Optional[datetime] = None
     actual_end: Optional[datetime] = None
+    approved_at: Optional[datetime] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
 
     model_config = ConfigDict(from_attributes=True)
 
 
 class Change(ChangeInDB):
-    requester: Optional[dict] = None
-    assignee: Optional[dict] = None
+    status: Optional[ReferenceItem] = None
+    priority: Optional[ReferenceItem] = None
+    requester: Optional[UserSummary] = None
+    assignee: Optional[UserSummary] = None
 
 
 class ChangeList(BaseModel):
     items: List[Change]
-    total: int
-    page: int
+    total: Optional[int] = None  # count=none の場合は None
+    page: Optional[int] = None  # カーソル方式では None
     size: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
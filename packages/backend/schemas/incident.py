@@ -3,76 +3,59 @@
 """
 
 from datetime import datetime
-from enum import Enum
 from typing import List, Optional
 
 from pydantic import BaseModel, ConfigDict, Field
 
-
-class IncidentSeverity(str, Enum):
-    CRITICAL = "critical"
-    HIGH = "high"
-    MEDIUM = "medium"
-    LOW = "low"
-
-
-class IncidentStatus(str, Enum):
-    NEW = "new"
-    INVESTIGATING = "investigating"
-    IN_PROGRESS = "in_progress"
-    RESOLVED = "resolved"
-    CLOSED = "closed"
+from .reference import ReferenceItem
+from .user import UserSummary
 
 
 class IncidentBase(BaseModel):
-    title: str = Field(..., example="Network outage")
-    description: Optional[str] = Field(None, example="Description of the incident")
-    severity: IncidentSeverity = IncidentSeverity.MEDIUM
-    status: IncidentStatus = IncidentStatus.NEW
-    category: Optional[str] = None
-    impact: Optional[str] = None
-    urgency: Optional[str] = None
+    title: str = Field(..., max_length=200, example="Network outage")
+    description: str = Field(..., example="Description of the incident")
 
 
 class IncidentCreate(IncidentBase):
     reporter_id: int
     assignee_id: Optional[int] = None
+    # 省略時は既定のステータス（新規）・優先度（中）
+    status_id: Optional[int] = None
+    priority_id: Optional[int] = None
 
 
 class IncidentUpdate(BaseModel):
-    title: Optional[str] = None
+    title: Optional[str] = Field(None, max_length=200)
     description: Optional[str] = None
-    severity: Optional[IncidentSeverity] = None
-    status: Optional[IncidentStatus] = None
-    category: Optional[str] = None
-    impact: Optional[str] = None
-    urgency: Optional[str] = None
+    status_id: Optional[int] = None
+    priority_id: Optional[int] = None
     assignee_id: Optional[int] = None
-    resolution: Optional[str] = None
 
 
 class IncidentInDB(IncidentBase):
     id: int
-    incident_id: str
+    incident_number: Optional[str] = None  # 番号導入前のデータは None
+    status_id: int
+    priority_id: int
     reporter_id: int
     assignee_id: Optional[int] = None
-    resolution: Optional[str] = None
     created_at: datetime
-    updated_at: datetime
-    resolved_at: Optional[datetime] = None
-    closed_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
 
     model_config = ConfigDict(from_attributes=True)
 
 
 class Incident(IncidentInDB):
-    reporter: Optional[dict] = None
-    assignee: Optional[dict] = None
+    status: Optional[ReferenceItem] = None
+    priority: Optional[ReferenceItem] = None
+    reporter: Optional[UserSummary] = None
+    assignee: Optional[UserSummary] = None
 
 
 class IncidentList(BaseModel):
     items: List[Incident]
-    total: int
-    page: int
+    total: Optional[int] = None  # count=none の場合は None
+    page: Optional[int] = None  # カーソル方式では None
     size: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
@@ -3,78 +3,67 @@
 """
 
 from datetime import datetime
-from enum import Enum
 from typing import List, Optional
 
 from pydantic import BaseModel, ConfigDict, Field
 
-
-class ProblemPriority(str, Enum):
-    LOW = "low"
-    MEDIUM = "medium"
-    HIGH = "high"
-    CRITICAL = "critical"
-
-
-class ProblemStatus(str, Enum):
-    NEW = "new"
-    INVESTIGATING = "investigating"
-    KNOWN_ERROR = "known_error"
-    RESOLVED = "resolved"
-    CLOSED = "closed"
+from .reference import ReferenceItem
+from .user import UserSummary
 
 
 class ProblemBase(BaseModel):
-    title: str = Field(..., example="Database performance issue")
-    description: Optional[str] = Field(None, example="Description of the problem")
-    priority: ProblemPriority = ProblemPriority.MEDIUM
-    status: ProblemStatus = ProblemStatus.NEW
-    category: Optional[str] = None
-    impact: Optional[str] = None
-    root_cause: Optional[str] = None
-    workaround: Optional[str] = None
+    title: str = Field(..., max_length=200, example="Database performance issue")
+    description: str = Field(..., example="Description of the problem")
+    impact_description: Optional[str] = None
+    known_error_status: Optional[str] = Field(None, max_length=100)
+    category_id: Optional[int] = None
 
 
 class ProblemCreate(ProblemBase):
     reporter_id: int
     assignee_id: Optional[int] = None
+    # 省略時は既定のステータス（新規）・優先度（中）
+    status_id: Optional[int] = None
+    priority_id: Optional[int] = None
 
 
 class ProblemUpdate(BaseModel):
-    title: Optional[str] = None
+    title: Optional[str] = Field(None, max_length=200)
     description: Optional[str] = None
-    priority: Optional[ProblemPriority] = None
-    status: Optional[ProblemStatus] = None
-    category: Optional[str] = None
-    impact: Optional[str] = None
-    root_cause: Optional[str] = None
-    workaround: Optional[str] = None
+    impact_description: Optional[str] = None
+    known_error_status: Optional[str] = Field(None, max_length=100)
+    status_id: Optional[int] = None
+    priority_id: Optional[int] = None
+    category_id: Optional[int] = None
     assignee_id: Optional[int] = None
-    solution: Optional[str] = None
 
 
 class ProblemInDB(ProblemBase):
     id: int
-    problem_id: str
+    problem_number: Optional[str] = None  # 番号導入前のデータは None
+    status_id: int
+    priority_id: int
     reporter_id: int
     assignee_id: Optional[int] = None
-    solution: Optional[str] = None
     created_at: datetime
-    updated_at: datetime
+    updated_at: Optional[datetime] = None
     resolved_at: Optional[datetime] = None
-    closed_at: Optional[datetime] = None
 
     model_config = ConfigDict(from_attributes=True)
 
 
 class Problem(ProblemInDB):
-    reporter: Optional[dict] = None
-    assignee: Optional[dict] = None
+    status: Optional[ReferenceItem] = None
+    priority: Optional[ReferenceItem] = None
+    category: Optional[ReferenceItem] = None
+    reporter: Optional[UserSummary] = None
+    assignee: Optional[UserSummary] = None
 
 
 class ProblemList(BaseModel):
     items: List[Problem]
-    total: int
-    page: int
+    total: Optional[int] = None  # count=none の場合は None
+    page: Optional[int] = None  # カーソル方式では None
     size: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
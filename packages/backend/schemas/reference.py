@@ -0,0 +1,12 @@
+"""
+参照データ（ステータス・優先度・カテゴリ）関連のPydanticスキーマ
+"""
+
+from pydantic import BaseModel, ConfigDict
+
+
+class ReferenceItem(BaseModel):
+    id: int
+    name: str
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,22 @@
+"""
+全文検索関連のPydanticスキーマ
+"""
+
+from typing import List
+
+from pydantic import BaseModel, ConfigDict
+
+
+class SearchResult(BaseModel):
+    entity_type: str  # incident / problem / change
+    entity_id: int
+    title: str
+    snippet: str  # 一致箇所を [ ] で囲んだ抜粋
+    score: float  # 関連度（大きいほど上位）
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SearchResponse(BaseModel):
+    query: str
+    results: List[SearchResult]
@@ -54,6 +54,17 @@ class User(UserInDB):
     pass
 
 
+class UserSummary(BaseModel):
+    """チケットの報告者・担当者などに埋め込むユーザー情報"""
+
+    id: int
+    username: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -79,7 +90,8 @@ class UserMe(BaseModel):
 
 class UserList(BaseModel):
     items: List[User]
-    total: int
-    page: int
+    total: Optional[int] = None  # count=none の場合は None
+    page: Optional[int] = None  # カーソル方式では None
     size: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
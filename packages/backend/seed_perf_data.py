@@ -0,0 +1,626 @@
+#!/usr/bin/env python3
+"""
+性能試験用の大量データ投入スクリプト
+インシデント・問題・変更要求とコメント・添付ファイル（メタデータのみ）・監査ログを
+Core の一括 INSERT でバッチ投入する。乱数シードを固定すれば同じデータを再現できる。
+
+例:
+    python packages/backend/seed_perf_data.py --incidents 1000000 --problems 200000 \\
+        --changes 100000 --audit-logs 2000000 --rebuild-search-index
+"""
+
+import argparse
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from itertools import accumulate
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+# プロジェクトルートをPythonパスに追加
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import func, insert, select, text, update
+
+from packages.backend.database import engine
+from packages.backend.init_db import create_tables, seed_reference_data
+from packages.backend.models.change import (
+    Change,
+    ChangeComment,
+    ChangePriority,
+    ChangeRisk,
+    ChangeStatus,
+    ChangeTask,
+    ChangeType,
+)
+from packages.backend.models.incident import (
+    Attachment,
+    Comment,
+    Incident,
+    IncidentPriority,
+    IncidentStatus,
+)
+from packages.backend.models.problem import (
+    Problem,
+    ProblemCategory,
+    ProblemIncidentLink,
+    ProblemPriority,
+    ProblemStatus,
+    RootCauseAnalysis,
+    Workaround,
+)
+from packages.backend.models.sequence import TicketSequence
+from packages.backend.models.user import AuditLog, User
+from packages.backend.utils.attachment_storage import attachment_storage
+from packages.backend.utils.search import rebuild_search_index
+from packages.backend.utils.ticket_numbers import format_ticket_number
+
+# 完了扱いのステータス名（init_db.py のマスターデータ）
+CLOSED_STATUS_NAMES = {"解決済み", "クローズ", "完了", "却下", "取消"}
+
+SYSTEMS = [
+    "メールサーバー",
+    "VPN",
+    "ファイルサーバー",
+    "Active Directory",
+    "基幹DB",
+    "Webポータル",
+    "無線LAN",
+    "プリンタ",
+    "勤怠システム",
+    "バックアップ",
+]
+SYMPTOMS = [
+    "に接続できない",
+    "の応答が遅い",
+    "が停止",
+    "でエラーが発生",
+    "にログインできない",
+    "の容量不足",
+    "で証明書エラー",
+    "の同期失敗",
+]
+DETAILS = [
+    "複数の利用者から報告あり。",
+    "朝の始業時間帯に集中して発生。",
+    "再起動で一時的に回復するが再発する。",
+    "特定拠点のみで発生している。",
+    "監視アラートで検知。",
+    "直前に設定変更が行われていた。",
+]
+AUDIT_ACTIONS = [
+    ("login", "user"),
+    ("logout", "user"),
+    ("create", "incident"),
+    ("update", "incident"),
+    ("update", "problem"),
+    ("approve", "change"),
+    ("download", "attachment"),
+]
+
+
+@dataclass
+class SeedConfig:
+    """投入件数と分布の設定"""
+
+    users: int = 200
+    incidents: int = 10000
+    problems: int = 2000
+    changes: int = 1000
+    audit_logs: int = 20000
+    comments_per_ticket: float = 3.0  # チケットあたりのコメント数の平均
+    attachment_ratio: float = 0.2  # 添付ファイルを持つインシデントの割合
+    links_per_problem: int = 3  # 問題に紐づくインシデント数の上限
+    open_ratio: float = 0.15  # 未完了ステータスの割合
+    priority_weights: Sequence[float] = (1, 3, 10, 6)  # 優先度（ID順）の重み
+    assignee_skew: float = 1.1  # 担当者の偏り（Zipf 指数。0 で一様）
+    days: int = 730  # 作成日時を分布させる日数
+    batch_size: int = 5000
+    seed: int = 42
+
+
+@dataclass
+class _Lookup:
+    open_ids: List[int]
+    closed_ids: List[int]
+    priority_ids: List[int]
+    priority_weights: List[float] = field(default_factory=list)
+
+
+class PerfDataSeeder:
+    """親テーブルのバッチごとに子テーブルを生成し、外部キー順に投入する"""
+
+    def __init__(self, connection, config: SeedConfig):
+        self.connection = connection
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.now = datetime.utcnow().replace(microsecond=0)
+        self.start = self.now - timedelta(days=config.days)
+        self.counts: Dict[str, int] = {}
+        self.next_ids = {
+            model.__tablename__: (connection.scalar(select(func.max(model.id))) or 0)
+            + 1
+            for model in (
+                User,
+                Incident,
+                Comment,
+                Attachment,
+                Problem,
+                RootCauseAnalysis,
+                Workaround,
+                Change,
+                ChangeTask,
+                ChangeComment,
+                AuditLog,
+            )
+        }
+
+    # --- 共通 ---
+
+    def _ids(self, model, count: int) -> range:
+        table = model.__tablename__
+        start = self.next_ids[table]
+        self.next_ids[table] = start + count
+        return range(start, start + count)
+
+    def _insert(self, model, rows: List[dict]) -> None:
+        size = self.config.batch_size
+        for start in range(0, len(rows), size):
+            self.connection.execute(insert(model.__table__), rows[start : start + size])
+        self.counts[model.__tablename__] = self.counts.get(
+            model.__tablename__, 0
+        ) + len(rows)
+
+    def _created_at(self, index: int, total: int) -> datetime:
+        # ID 順に作成日時が進むように並べ、少しずらす
+        span = (self.now - self.start).total_seconds()
+        offset = span * (index + self.rng.random()) / max(total, 1)
+        return self.start + timedelta(seconds=offset)
+
+    def _lookup(self, status_model, priority_model) -> _Lookup:
+        statuses = self.connection.execute(
+            select(status_model.id, status_model.name).order_by(status_model.id)
+        ).all()
+        priority_ids = list(
+            self.connection.scalars(
+                select(priority_model.id).order_by(priority_model.id)
+            )
+        )
+        if not statuses or not priority_ids:
+            raise RuntimeError(f"{status_model.__tablename__} が空です")
+        open_ids = [s.id for s in statuses if s.name not in CLOSED_STATUS_NAMES]
+        closed_ids = [s.id for s in statuses if s.name in CLOSED_STATUS_NAMES]
+        weights = list(self.config.priority_weights)[: len(priority_ids)]
+        weights += [1.0] * (len(priority_ids) - len(weights))
+        return _Lookup(
+            open_ids or closed_ids,
+            closed_ids or open_ids,
+            priority_ids,
+            list(accumulate(weights)),
+        )
+
+    def _status(self, lookup: _Lookup):
+        is_open = self.rng.random() < self.config.open_ratio
+        return self.rng.choice(lookup.open_ids if is_open else lookup.closed_ids), (
+            not is_open
+        )
+
+    def _priority(self, lookup: _Lookup) -> int:
+        return self.rng.choices(
+            lookup.priority_ids, cum_weights=lookup.priority_weights
+        )[0]
+
+    def _user(self) -> int:
+        return self.rng.choices(self.user_ids, cum_weights=self.user_weights)[0]
+
+    def _child_count(self) -> int:
+        mean = self.config.comments_per_ticket
+        return min(int(self.rng.expovariate(1 / mean)), 50) if mean > 0 else 0
+
+    def _title(self) -> str:
+        return self.rng.choice(SYSTEMS) + self.rng.choice(SYMPTOMS)
+
+    def _text(self, sentences: int = 2) -> str:
+        return "".join(self.rng.choice(DETAILS) for _ in range(sentences))
+
+    def _after(self, created_at: datetime, max_hours: int = 72) -> datetime:
+        return min(
+            created_at + timedelta(minutes=self.rng.randint(1, max_hours * 60)),
+            self.now,
+        )
+
+    def _batches(self, total: int):
+        for start in range(0, total, self.config.batch_size):
+            yield start, min(self.config.batch_size, total - start)
+
+    # --- テーブルごとの生成 ---
+
+    def seed_users(self) -> None:
+        rows = []
+        for user_id in self._ids(User, self.config.users):
+            rows.append(
+                {
+                    "id": user_id,
+                    "username": f"perf_user{user_id}",
+                    "email": f"perf_user{user_id}@example.com",
+                    "password_hash": "!",  # ログイン不可
+                    "department": self.rng.choice(
+                        ["情報システム部", "総務部", "営業部"]
+                    ),
+                    "is_active": True,
+                    "created_at": self.start,
+                    "updated_at": self.start,
+                }
+            )
+        self._insert(User, rows)
+        self.connection.commit()
+
+        self.user_ids = list(self.connection.scalars(select(User.id).order_by(User.id)))
+        # 少数の担当者に負荷が偏る分布（Zipf）
+        skew = self.config.assignee_skew
+        self.user_weights = list(
+            accumulate(1 / (rank + 1) ** skew for rank in range(len(self.user_ids)))
+        )
+        self.rng.shuffle(self.user_ids)
+
+    def seed_incidents(self) -> None:
+        lookup = self._lookup(IncidentStatus, IncidentPriority)
+        total = self.config.incidents
+        first_id = self.next_ids["incidents"]
+        for offset, count in self._batches(total):
+            incidents, comments, attachments = [], [], []
+            for index, incident_id in zip(
+                range(offset, offset + count), self._ids(Incident, count)
+            ):
+                created_at = self._created_at(index, total)
+                status_id, closed = self._status(lookup)
+                reporter_id = self._user()
+                incidents.append(
+                    {
+                        "id": incident_id,
+                        "title": self._title(),
+                        "description": self._text(3),
+                        "status_id": status_id,
+                        "priority_id": self._priority(lookup),
+                        "reporter_id": reporter_id,
+                        "assignee_id": self._user(),
+                        "created_at": created_at,
+                        "updated_at": (
+                            self._after(created_at) if closed else created_at
+                        ),
+                    }
+                )
+                for _ in range(self._child_count()):
+                    comments.append(
+                        {
+                            "incident_id": incident_id,
+                            "user_id": self._user(),
+                            "content": self._text(1),
+                            "created_at": self._after(created_at),
+                        }
+                    )
+                if self.rng.random() < self.config.attachment_ratio:
+                    attachments.append(self._attachment(created_at, reporter_id))
+                    attachments[-1]["incident_id"] = incident_id
+            self._insert(Incident, incidents)
+            self._insert(Comment, self._with_ids(Comment, comments))
+            self._insert(Attachment, self._with_ids(Attachment, attachments))
+            self.connection.commit()
+        self.incident_range = range(first_id, first_id + total)
+
+    def _attachment(self, created_at: datetime, uploaded_by_id: int) -> dict:
+        content_hash = "%064x" % self.rng.getrandbits(256)
+        return {
+            "filename": self.rng.choice(["error.log", "screenshot.png", "dump.zip"]),
+            "filepath": attachment_storage.blob_path(content_hash),
+            "filesize": min(int(self.rng.lognormvariate(11, 2)), 2**31 - 1),
+            "content_hash": content_hash,
+            "uploaded_by_id": uploaded_by_id,
+            "created_at": self._after(created_at, 24),
+        }
+
+    def _with_ids(self, model, rows: List[dict]) -> List[dict]:
+        for row, row_id in zip(rows, self._ids(model, len(rows))):
+            row["id"] = row_id
+        return rows
+
+    def seed_problems(self) -> None:
+        lookup = self._lookup(ProblemStatus, ProblemPriority)
+        category_ids = list(self.connection.scalars(select(ProblemCategory.id)))
+        total = self.config.problems
+        for offset, count in self._batches(total):
+            problems, comments, rcas, workarounds, links = [], [], [], [], []
+            for index, problem_id in zip(
+                range(offset, offset + count), self._ids(Problem, count)
+            ):
+                created_at = self._created_at(index, total)
+                status_id, closed = self._status(lookup)
+                problems.append(
+                    {
+                        "id": problem_id,
+                        "title": self._title() + "（再発）",
+                        "description": self._text(3),
+                        "impact_description": self._text(1),
+                        "status_id": status_id,
+                        "priority_id": self._priority(lookup),
+                        "category_id": (
+                            self.rng.choice(category_ids) if category_ids else None
+                        ),
+                        "reporter_id": self._user(),
+                        "assignee_id": self._user(),
+                        "created_at": created_at,
+                        "updated_at": created_at,
+                        "resolved_at": self._after(created_at, 720) if closed else None,
+                    }
+                )
+                for _ in range(self._child_count()):
+                    comments.append(
+                        {
+                            "problem_id": problem_id,
+                            "user_id": self._user(),
+                            "content": self._text(1),
+                            "created_at": self._after(created_at),
+                        }
+                    )
+                if self.rng.random() < 0.6:
+                    rcas.append(
+                        {
+                            "problem_id": problem_id,
+                            "description": self._text(2),
+                            "identified_by_id": self._user(),
+                            "created_at": created_at,
+                        }
+                    )
+                if self.rng.random() < 0.5:
+                    workarounds.append(
+                        {
+                            "problem_id": problem_id,
+                            "description": self._text(1),
+                            "implemented_by_id": self._user(),
+                            "created_at": created_at,
+                        }
+                    )
+                if self.incident_range:
+                    linked = {
+                        self.rng.choice(self.incident_range)
+                        for _ in range(
+                            self.rng.randint(1, self.config.links_per_problem)
+                        )
+                    }
+                    links.extend(
+                        {
+                            "problem_id": problem_id,
+                            "incident_id": incident_id,
+                            "linked_at": created_at,
+                        }
+                        for incident_id in linked
+                    )
+            self._insert(Problem, problems)
+            self._insert(Comment, self._with_ids(Comment, comments))
+            self._insert(RootCauseAnalysis, self._with_ids(RootCauseAnalysis, rcas))
+            self._insert(Workaround, self._with_ids(Workaround, workarounds))
+            self._insert(ProblemIncidentLink, links)
+            self.connection.commit()
+
+    def seed_changes(self) -> None:
+        lookup = self._lookup(ChangeStatus, ChangePriority)
+        total = self.config.changes
+        years: Dict[int, int] = {}
+        for offset, count in self._batches(total):
+            changes, tasks, comments = [], [], []
+            for index, change_id in zip(
+                range(offset, offset + count), self._ids(Change, count)
+            ):
+                created_at = self._created_at(index, total)
+                status_id, _ = self._status(lookup)
+                years[created_at.year] = max(years.get(created_at.year, 0), change_id)
+                planned_start = self._after(created_at, 240)
+                changes.append(
+                    {
+                        "id": change_id,
+                        # ID を連番に使う（既存の採番値は ID 未満なので重複しない）
+                        "change_number": format_ticket_number(
+                            "CHG", created_at.year, change_id
+                        ),
+                        "title": self._title() + "の対応",
+                        "description": self._text(2),
+                        "change_type": self.rng.choice(list(ChangeType)),
+                        "risk_level": self.rng.choice(list(ChangeRisk)),
+                        "status_id": status_id,
+                        "priority_id": self._priority(lookup),
+                        "requester_id": self._user(),
+                        "assignee_id": self._user(),
+                        "approver_id": self._user(),
+                        "planned_start": planned_start,
+                        "planned_end": planned_start + timedelta(hours=2),
+                        "implementation_plan": self._text(2),
+                        "rollback_plan": self._text(1),
+                        "created_at": created_at,
+                        "updated_at": created_at,
+                    }
+                )
+                for _ in range(self.rng.randint(1, 4)):
+                    tasks.append(
+                        {
+                            "change_id": change_id,
+                            "title": self.rng.choice(["事前確認", "作業", "事後確認"]),
+                            "assignee_id": self._user(),
+                            "created_at": created_at,
+                        }
+                    )
+                for _ in range(self._child_count()):
+                    comments.append(
+                        {
+                            "change_id": change_id,
+                            "user_id": self._user(),
+                            "content": self._text(1),
+                            "created_at": self._after(created_at),
+                        }
+                    )
+            self._insert(Change, changes)
+            self._insert(ChangeTask, self._with_ids(ChangeTask, tasks))
+            self._insert(ChangeComment, self._with_ids(ChangeComment, comments))
+            self.connection.commit()
+        self._advance_sequences("CHG", years)
+
+    def _advance_sequences(self, prefix: str, years: Dict[int, int]) -> None:
+        """以降の採番が投入済みの番号と重ならないようにシーケンスを進める"""
+        table = TicketSequence.__table__
+        for year, last_value in years.items():
+            current = self.connection.scalar(
+                select(table.c.last_value).where(
+                    table.c.prefix == prefix, table.c.year == year
+                )
+            )
+            if current is None:
+                self.connection.execute(
+                    insert(table).values(
+                        prefix=prefix, year=year, last_value=last_value
+                    )
+                )
+            elif current < last_value:
+                self.connection.execute(
+                    update(table)
+                    .where(table.c.prefix == prefix, table.c.year == year)
+                    .values(last_value=last_value)
+                )
+        self.connection.commit()
+
+    def seed_audit_logs(self) -> None:
+        total = self.config.audit_logs
+        for offset, count in self._batches(total):
+            rows = []
+            for index, log_id in zip(
+                range(offset, offset + count), self._ids(AuditLog, count)
+            ):
+                action, resource_type = self.rng.choice(AUDIT_ACTIONS)
+                rows.append(
+                    {
+                        "id": log_id,
+                        "user_id": self._user(),
+                        "action": action,
+                        "resource_type": resource_type,
+                        "resource_id": str(self.rng.randint(1, 10**6)),
+                        "ip_address": f"10.0.{self.rng.randint(0, 255)}.{self.rng.randint(1, 254)}",
+                        "status": "success" if self.rng.random() < 0.97 else "failure",
+                        "created_at": self._created_at(index, total),
+                    }
+                )
+            self._insert(AuditLog, rows)
+            self.connection.commit()
+
+    def run(self) -> Dict[str, int]:
+        self.seed_users()
+        self.seed_incidents()
+        self.seed_problems()
+        self.seed_changes()
+        self.seed_audit_logs()
+        return self.counts
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    defaults = SeedConfig()
+    parser = argparse.ArgumentParser(description="性能試験用の大量データを投入します")
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--incidents", type=int, default=defaults.incidents)
+    parser.add_argument("--problems", type=int, default=defaults.problems)
+    parser.add_argument("--changes", type=int, default=defaults.changes)
+    parser.add_argument("--audit-logs", type=int, default=defaults.audit_logs)
+    parser.add_argument(
+        "--comments-per-ticket",
+        type=float,
+        default=defaults.comments_per_ticket,
+        help="チケットあたりのコメント数の平均（指数分布）",
+    )
+    parser.add_argument(
+        "--attachment-ratio", type=float, default=defaults.attachment_ratio
+    )
+    parser.add_argument(
+        "--links-per-problem", type=int, default=defaults.links_per_problem
+    )
+    parser.add_argument(
+        "--open-ratio",
+        type=float,
+        default=defaults.open_ratio,
+        help="未完了ステータスにする割合",
+    )
+    parser.add_argument(
+        "--priority-weights",
+        default=",".join(str(w) for w in defaults.priority_weights),
+        help="優先度（ID順）の重み。例: 1,3,10,6",
+    )
+    parser.add_argument(
+        "--assignee-skew",
+        type=float,
+        default=defaults.assignee_skew,
+        help="担当者の偏り（Zipf 指数。0 で一様）",
+    )
+    parser.add_argument("--days", type=int, default=defaults.days)
+    parser.add_argument("--batch-size", type=int, default=defaults.batch_size)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument(
+        "--rebuild-search-index",
+        action="store_true",
+        help="投入後に全文検索インデックスを作り直す（Core の INSERT は差分反映されないため）",
+    )
+    parser.add_argument(
+        "--no-analyze", action="store_true", help="投入後の ANALYZE を省略する"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    config = SeedConfig(
+        users=args.users,
+        incidents=args.incidents,
+        problems=args.problems,
+        changes=args.changes,
+        audit_logs=args.audit_logs,
+        comments_per_ticket=args.comments_per_ticket,
+        attachment_ratio=args.attachment_ratio,
+        links_per_problem=args.links_per_problem,
+        open_ratio=args.open_ratio,
+        priority_weights=[float(w) for w in args.priority_weights.split(",")],
+        assignee_skew=args.assignee_skew,
+        days=args.days,
+        batch_size=args.batch_size,
+        seed=args.seed,
+    )
+
+    create_tables()
+    seed_reference_data()
+
+    started = time.perf_counter()
+    with engine.connect() as connection:
+        if connection.dialect.name == "sqlite":
+            # 投入中のみ fsync を減らす（この接続に限る）
+            connection.exec_driver_sql("PRAGMA synchronous=OFF")
+        counts = PerfDataSeeder(connection, config).run()
+
+        if args.rebuild_search_index:
+            print("Rebuilding search index...")
+            rebuild_search_index(connection)
+            connection.commit()
+        if not args.no_analyze:
+            connection.execute(text("ANALYZE"))
+            connection.commit()
+        if connection.dialect.name == "sqlite":
+            connection.exec_driver_sql("PRAGMA synchronous=NORMAL")
+
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    for table, count in counts.items():
+        print(f"  {table:<24} {count:>12,}")
+    print(
+        f"✓ {total:,} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)"
+    )
+    if not args.rebuild_search_index:
+        print("  (search index not rebuilt; run with --rebuild-search-index)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+添付ファイルのダウンロードレスポンス
+単一の Range 要求（206）と条件付き要求（If-None-Match / If-Modified-Since / If-Range）に対応する。
+ETag には内容ハッシュを使い、本文はチャンク単位で送る（サーバーが ASGI の
+zerocopysend 拡張に対応していれば sendfile に任せる）
+"""
+
+import os
+import stat
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Tuple
+
+import anyio
+from fastapi import Request, Response
+from starlette.responses import FileResponse
+from starlette.types import Receive, Scope, Send
+
+from packages.backend.models.incident import Attachment
+from packages.backend.utils.attachment_storage import ATTACHMENT_CHUNK_SIZE
+
+_ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+
+class RangeNotSatisfiable(Exception):
+    """Range がファイルの範囲外"""
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Range ヘッダーを (開始, 終了) のバイト位置（終了を含む）に変換
+
+    単一範囲のみ扱い、複数範囲や解釈できない値は None（全体を返す）とする
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[len("bytes=") :].strip()
+    if "," in spec or "-" not in spec:
+        return None
+    first, last = (part.strip() for part in spec.split("-", 1))
+    try:
+        if first == "":
+            # 末尾 N バイト
+            length = int(last)
+            if length <= 0 or size == 0:
+                raise RangeNotSatisfiable()
+            return max(size - length, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def _not_modified_since(header: Optional[str], last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    return last_modified.replace(microsecond=0) <= since
+
+
+class AttachmentFileResponse(FileResponse):
+    """ファイル全体または指定範囲を送るレスポンス"""
+
+    chunk_size = ATTACHMENT_CHUNK_SIZE
+
+    def __init__(self, path: str, offset: int, length: int, **kwargs):
+        super().__init__(path, **kwargs)
+        self.offset = offset
+        self.length = length
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        if self.send_header_only or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif _ZEROCOPY_EXTENSION in scope.get("extensions", {}):
+            with open(self.path, "rb") as file:
+                await send(
+                    {
+                        "type": _ZEROCOPY_EXTENSION,
+                        "file": file,
+                        "offset": self.offset,
+                        "count": self.length,
+                        "more_body": False,
+                    }
+                )
+        else:
+            async with await anyio.open_file(self.path, mode="rb") as file:
+                await file.seek(self.offset)
+                remaining = self.length
+                while remaining:
+                    chunk = await file.read(min(self.chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    await send(
+                        {
+                            "type": "http.response.body",
+                            "body": chunk,
+                            "more_body": remaining > 0,
+                        }
+                    )
+        if self.background is not None:
+            await self.background()
+
+
+def attachment_etag(attachment: Attachment, stat_result: os.stat_result) -> str:
+    """内容ハッシュの強い ETag（ハッシュのない旧データはサイズと更新時刻から作る）"""
+    if attachment.content_hash:
+        return f'"{attachment.content_hash}"'
+    return f'"{int(stat_result.st_mtime)}-{stat_result.st_size}"'
+
+
+def attachment_response(request: Request, attachment: Attachment) -> Response:
+    """添付ファイルのダウンロードレスポンスを作る（ファイルがなければ FileNotFoundError）"""
+    stat_result = os.stat(attachment.filepath)
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise FileNotFoundError(attachment.filepath)
+    size = stat_result.st_size
+    etag = attachment_etag(attachment, stat_result)
+    # 内容アドレス方式では実体の更新時刻が変わるため、登録日時を Last-Modified とする
+    last_modified = (attachment.created_at or datetime.utcnow()).replace(
+        tzinfo=timezone.utc
+    )
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(last_modified.timestamp(), usegmt=True),
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, no-cache",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, etag)
+    else:
+        not_modified = _not_modified_since(
+            request.headers.get("if-modified-since"), last_modified
+        )
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if if_range is None or if_range.strip() in (etag, headers["Last-Modified"]):
+        try:
+            byte_range = parse_range(request.headers.get("range"), size)
+        except RangeNotSatisfiable:
+            headers["Content-Range"] = f"bytes */{size}"
+            return Response(status_code=416, headers=headers)
+
+    status_code, offset, length = 200, 0, size
+    if byte_range is not None:
+        start, end = byte_range
+        status_code, offset, length = 206, start, end - start + 1
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(length)
+    return AttachmentFileResponse(
+        attachment.filepath,
+        offset,
+        length,
+        status_code=status_code,
+        headers=headers,
+        filename=attachment.filename,
+        stat_result=stat_result,
+        method=request.method,
+    )
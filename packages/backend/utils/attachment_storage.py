@@ -0,0 +1,294 @@
+"""
+添付ファイル保存サービス（内容アドレス方式）
+アップロードをチャンク単位で一時ファイルに書き込みながら SHA-256 を計算し、
+サイズ上限を超えた時点で中断する。完了後は uploads/blobs/ab/cd/<hash> に配置し、
+同じ内容のファイルは1つの実体を共有する（参照数は Attachment 行から数える）
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Optional, Set
+
+from fastapi import UploadFile
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, object_session
+
+from packages.backend.models.incident import Attachment
+
+# 添付ファイルの最大サイズ（バイト）
+ATTACHMENT_MAX_BYTES = int(os.getenv("ATTACHMENT_MAX_BYTES", str(100 * 1024 * 1024)))
+# 1回に読み書きするサイズ（バイト）
+ATTACHMENT_CHUNK_SIZE = int(os.getenv("ATTACHMENT_CHUNK_SIZE", str(1024 * 1024)))
+# 実体ファイルの保存先
+ATTACHMENT_BLOB_DIR = os.getenv(
+    "ATTACHMENT_BLOB_DIR", os.path.join(os.getcwd(), "uploads", "blobs")
+)
+# 直近に再利用された実体は参照数 0 でも削除しない（同時アップロードとの競合対策）
+ATTACHMENT_GC_GRACE = float(os.getenv("ATTACHMENT_GC_GRACE", "300"))
+# 未参照の実体を定期的に回収する間隔（秒）。0 以下なら定期回収しない
+ATTACHMENT_GC_INTERVAL = float(os.getenv("ATTACHMENT_GC_INTERVAL", "3600"))
+
+logger = logging.getLogger(__name__)
+
+_RELEASED_KEY = "_released_blob_hashes"
+_ORPHANS_KEY = "_orphan_blob_hashes"
+
+
+class AttachmentTooLarge(Exception):
+    """サイズ上限を超えた"""
+
+    def __init__(self, limit: int):
+        super().__init__(f"Attachment exceeds the {limit} byte limit")
+        self.limit = limit
+
+
+@dataclass(frozen=True)
+class StoredFile:
+    """保存結果"""
+
+    path: str
+    size: int
+    sha256: str
+    deduplicated: bool = False  # 既存の実体を再利用した
+
+
+def safe_filename(filename: Optional[str]) -> str:
+    """ディレクトリ成分と先頭のドットを除いたファイル名（日本語名はそのまま残す）"""
+    name = os.path.basename((filename or "").replace("\\", "/")).strip().lstrip(".")
+    return name or "attachment"
+
+
+class _Writer:
+    """一時ファイルへの書き込みとハッシュ計算"""
+
+    def __init__(self, directory: str, max_bytes: int):
+        os.makedirs(directory, exist_ok=True)
+        fd, self.temp_path = tempfile.mkstemp(
+            dir=directory, prefix="upload-", suffix=".part"
+        )
+        self.file = os.fdopen(fd, "wb")
+        self.hasher = hashlib.sha256()
+        self.size = 0
+        self.max_bytes = max_bytes
+
+    def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise AttachmentTooLarge(self.max_bytes)
+        self.hasher.update(chunk)
+        self.file.write(chunk)
+
+    def close(self) -> None:
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+
+    def discard(self) -> None:
+        self.file.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+class AttachmentStorage:
+    """内容アドレス方式の実体ファイル保存（FastAPI 用の非同期版と Flask 用の同期版）"""
+
+    def __init__(
+        self,
+        root: str = ATTACHMENT_BLOB_DIR,
+        max_bytes: int = ATTACHMENT_MAX_BYTES,
+        chunk_size: int = ATTACHMENT_CHUNK_SIZE,
+        gc_grace: float = ATTACHMENT_GC_GRACE,
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.gc_grace = gc_grace
+
+    def blob_path(self, sha256: str) -> str:
+        """ハッシュに対応する実体ファイルのパス（ab/cd/<hash>）"""
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256)
+
+    def has_blob(self, sha256: str) -> bool:
+        return os.path.exists(self.blob_path(sha256))
+
+    def touch(self, sha256: str) -> bool:
+        """実体の再利用を記録（GC の猶予判定に使用）。実体がなければ False"""
+        try:
+            os.utime(self.blob_path(sha256))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def check_declared_size(self, size: Optional[int]) -> None:
+        """Content-Length 等の申告サイズで事前に拒否"""
+        if size is not None and size > self.max_bytes:
+            raise AttachmentTooLarge(self.max_bytes)
+
+    async def save_upload(self, upload: UploadFile) -> StoredFile:
+        """UploadFile を保存（ファイル I/O はスレッドで実行）"""
+        self.check_declared_size(getattr(upload, "size", None))
+        writer = await asyncio.to_thread(self._writer)
+        try:
+            while True:
+                chunk = await upload.read(self.chunk_size)
+                if not chunk:
+                    break
+                await asyncio.to_thread(writer.write, chunk)
+            return await asyncio.to_thread(self._store, writer)
+        except BaseException:
+            await asyncio.to_thread(writer.discard)
+            raise
+
+    def save_stream(self, stream: BinaryIO) -> StoredFile:
+        """ファイルライクオブジェクトを保存"""
+        writer = self._writer()
+        try:
+            while True:
+                chunk = stream.read(self.chunk_size)
+                if not chunk:
+                    break
+                writer.write(chunk)
+            return self._store(writer)
+        except BaseException:
+            writer.discard()
+            raise
+
+    def remove_blob(self, sha256: str) -> None:
+        try:
+            os.remove(self.blob_path(sha256))
+        except FileNotFoundError:
+            pass
+
+    def collect(self, sha256: str, released_at: float) -> bool:
+        """参照がなくなった実体を削除（released_at 以降に再利用されていれば残す）"""
+        path = self.blob_path(sha256)
+        try:
+            if os.path.getmtime(path) > released_at - self.gc_grace:
+                return False
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def sweep(self, db: Session) -> int:
+        """どの Attachment からも参照されていない実体を削除（定期メンテナンス用）"""
+        referenced = set(
+            db.scalars(
+                select(Attachment.content_hash)
+                .where(Attachment.content_hash.isnot(None))
+                .distinct()
+            )
+        )
+        removed = 0
+        now = time.time()
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if name.endswith(".part") or name in referenced:
+                    continue
+                if self.collect(name, now):
+                    removed += 1
+        return removed
+
+    def _writer(self) -> _Writer:
+        # 同一ファイルシステム上に一時ファイルを作り、rename で配置する
+        return _Writer(os.path.join(self.root, "tmp"), self.max_bytes)
+
+    def _store(self, writer: _Writer) -> StoredFile:
+        writer.close()
+        sha256 = writer.hasher.hexdigest()
+        path = self.blob_path(sha256)
+        deduplicated = self.touch(sha256)
+        if deduplicated:
+            os.remove(writer.temp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(writer.temp_path, path)
+        return StoredFile(
+            path=path, size=writer.size, sha256=sha256, deduplicated=deduplicated
+        )
+
+
+attachment_storage = AttachmentStorage()
+
+
+async def sweep_periodically(
+    session_factory: Callable[[], Session], interval: float = ATTACHMENT_GC_INTERVAL
+) -> None:
+    """interval 秒ごとに未参照の実体を回収する
+
+    コミット時の回収は猶予期間内の実体を残したまま再試行しないため、
+    それらはこの定期回収で猶予期間が過ぎた後に削除される。
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            removed = await asyncio.to_thread(_sweep, session_factory)
+        except Exception as e:
+            logger.error(f"Attachment blob sweep failed: {e}")
+            continue
+        if removed:
+            logger.info(f"Removed {removed} unreferenced attachment blobs")
+
+
+def _sweep(session_factory: Callable[[], Session]) -> int:
+    db = session_factory()
+    try:
+        return attachment_storage.sweep(db)
+    finally:
+        db.close()
+
+
+# --- 参照数 0 になった実体の回収 ---
+# 削除・ハッシュ変更された Attachment のハッシュを flush 時に集め、同じトランザクション内で
+# 残りの参照を数える。参照がなければコミット後に実体を削除する（ロールバック時は何もしない）
+
+
+def _release(target, sha256: Optional[str]) -> None:
+    session = object_session(target)
+    if sha256 and session is not None:
+        session.info.setdefault(_RELEASED_KEY, set()).add(sha256)
+
+
+@event.listens_for(Attachment, "after_delete")
+def _attachment_deleted(mapper, connection, target):
+    _release(target, target.content_hash)
+
+
+@event.listens_for(Attachment, "after_update")
+def _attachment_updated(mapper, connection, target):
+    for sha256 in inspect(target).attrs.content_hash.history.deleted:
+        _release(target, sha256)
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _find_orphan_blobs(session, flush_context):
+    released: Set[str] = session.info.pop(_RELEASED_KEY, None)
+    if not released:
+        return
+    referenced = set(
+        session.scalars(
+            select(Attachment.content_hash)
+            .where(Attachment.content_hash.in_(released))
+            .distinct()
+        )
+    )
+    orphans = session.info.setdefault(_ORPHANS_KEY, {})
+    for sha256 in released - referenced:
+        orphans[sha256] = time.time()
+
+
+@event.listens_for(Session, "after_commit")
+def _collect_orphan_blobs(session):
+    for sha256, released_at in session.info.pop(_ORPHANS_KEY, {}).items():
+        attachment_storage.collect(sha256, released_at)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_orphan_blobs(session):
+    session.info.pop(_RELEASED_KEY, None)
+    session.info.pop(_ORPHANS_KEY, None)
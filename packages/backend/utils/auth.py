@@ -9,11 +9,20 @@ import bcrypt
 import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 
-from packages.backend.database import get_db
-from packages.backend.models.user import User
+from packages.backend.async_database import get_async_db
+from packages.backend.models.user import Role, User
 from packages.backend.schemas.user import TokenData
+from packages.backend.utils.password_hashing import (
+    BCRYPT_ROUNDS,
+    PasswordHasherBusy,
+    password_hasher,
+)
+from packages.backend.utils.permissions import permission_registry
+from packages.backend.utils.principal_cache import Principal, principal_cache
 
 # JWT設定
 SECRET_KEY = "your-secret-key-change-this-in-production"
@@ -32,10 +41,42 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     """パスワードをハッシュ化"""
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """ハッシュの work factor が現在の設定と異なるか判定"""
+    try:
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+async def _run_password_job(operation: str, func, *args):
+    """ハッシュ処理を専用プールで実行（混雑時は 503）"""
+    try:
+        return await password_hasher.run(operation, func, *args)
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service is busy",
+            headers={"Retry-After": "1"},
+        )
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """パスワードを検証（イベントループをブロックしない）"""
+    return await _run_password_job(
+        "verify", verify_password, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    """パスワードをハッシュ化（イベントループをブロックしない）"""
+    return await _run_password_job("hash", get_password_hash, password)
+
+
 def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
     """ユーザー認証"""
     user = db.query(User).filter(User.username == username).first()
@@ -46,6 +87,19 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Use
     return user
 
 
+async def authenticate_user_async(
+    db: AsyncSession, username: str, password: str
+) -> Optional[User]:
+    """ユーザー認証（async ハンドラ用）"""
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalars().first()
+    if not user:
+        return None
+    if not await verify_password_async(password, user.password_hash):
+        return None
+    return user
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """JWTトークンを作成"""
     to_encode = data.copy()
@@ -83,23 +137,38 @@ def verify_token(token: str) -> TokenData:
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
-) -> User:
-    """現在のユーザーを取得"""
+    db: AsyncSession = Depends(get_async_db),
+) -> Principal:
+    """現在のユーザーを取得
+
+    解決済みのプリンシパルをトークンの sub ごとにキャッシュし、
+    キャッシュヒット時はデータベースにアクセスしない。
+    """
     token_data = verify_token(credentials.credentials)
-    user = db.query(User).filter(User.username == token_data.username).first()
+    principal = principal_cache.get(token_data.username)
+    if principal is not None:
+        return principal
+
+    result = await db.execute(
+        select(User)
+        .options(selectinload(User.roles).selectinload(Role.permissions))
+        .where(User.username == token_data.username)
+    )
+    user = result.scalars().first()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return user
+    principal = Principal.from_user(user)
+    principal_cache.put(token_data.username, principal)
+    return principal
 
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: Principal = Depends(get_current_user),
+) -> Principal:
     """アクティブな現在のユーザーを取得"""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -108,10 +177,25 @@ async def get_current_active_user(
 
 def require_permissions(required_roles: list):
     """特定のロールを要求するデコレータ"""
+    # 要求ロールは定義時に一度だけビットマスク化し、判定は AND 1回で行う
+    required_mask = permission_registry.roles.mask_for(required_roles)
+
+    def decorator(current_user: Principal = Depends(get_current_active_user)):
+        if not current_user.role_mask & required_mask:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions"
+            )
+        return current_user
+
+    return decorator
+
+
+def require_permission_codes(required_codes: list):
+    """特定の権限コードをすべて要求するデコレータ"""
+    required_mask = permission_registry.permissions.mask_for(required_codes)
 
-    def decorator(current_user: User = Depends(get_current_active_user)):
-        user_roles = [role.name for role in current_user.roles]
-        if not any(role in user_roles for role in required_roles):
+    def decorator(current_user: Principal = Depends(get_current_active_user)):
+        if current_user.permission_mask & required_mask != required_mask:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions"
             )
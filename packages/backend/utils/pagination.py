@@ -0,0 +1,117 @@
+"""
+一覧APIのページネーションユーティリティ
+オフセット方式と (created_at, id) キーのキーセット（カーソル）方式に対応
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """(created_at, id) から不透明なカーソルトークンを生成"""
+    payload = json.dumps(
+        {"c": created_at.isoformat(), "i": row_id}, separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """カーソルトークンを (created_at, id) に復元"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(payload["c"]), int(payload["i"])
+    except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def keyset_page(
+    query: Query, model: Any, cursor: str, limit: int
+) -> Tuple[List[Any], Optional[str]]:
+    """キーセット方式で1ページ分を取得
+
+    created_at 降順・id 降順で並べ、カーソル位置より後ろの行を
+    インデックス範囲検索で取得する。スキップ行を読み捨てないため、
+    深いページでもレイテンシが一定になる。
+
+    Args:
+        query: 絞り込み済みのクエリ
+        model: created_at / id 列を持つモデル（created_at は NOT NULL。NULL の行は
+            カーソル条件に一致せず、2ページ目以降に現れないため）
+        cursor: 前ページの next_cursor（空文字列なら先頭ページ）
+        limit: 取得件数
+
+    Returns:
+        (行リスト, 次ページのカーソル or None)
+    """
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        query = query.filter(
+            or_(
+                model.created_at < created_at,
+                and_(model.created_at == created_at, model.id < last_id),
+            )
+        )
+
+    # 1件多く取得して次ページの有無を判定
+    rows = (
+        query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+    )
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.created_at, last.id)
+
+
+def paginate(
+    query: Query,
+    model: Any,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    total: Optional[int] = None,
+) -> Dict[str, Any]:
+    """一覧エンベロープ（items/total/page/size/pages/next_cursor）を構築
+
+    cursor が指定された場合（空文字列を含む）はキーセット方式、
+    それ以外は従来どおりのオフセット方式で取得する。
+    total は呼び出し側で算出した総件数（不要なら None）。
+    """
+    if limit < 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="limit must be positive"
+        )
+
+    pages = (total + limit - 1) // limit if total is not None else None
+
+    if cursor is not None:
+        items, next_cursor = keyset_page(query, model, cursor, limit)
+        return {
+            "items": items,
+            "total": total,
+            "page": None,
+            "size": limit,
+            "pages": pages,
+            "next_cursor": next_cursor,
+        }
+
+    items = query.offset(skip).limit(limit).all()
+    return {
+        "items": items,
+        "total": total,
+        "page": skip // limit + 1,
+        "size": limit,
+        "pages": pages,
+        "next_cursor": None,
+    }
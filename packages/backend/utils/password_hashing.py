@@ -0,0 +1,112 @@
+"""
+パスワードハッシュ処理用の専用スレッドプール
+bcrypt の計算をイベントループ外で実行し、同時実行数と待ち行列の長さを制限する
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# bcrypt の work factor（ログ2のラウンド数）
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# ハッシュ計算を行うスレッド数
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+# 実行待ちとして受け付ける最大件数（超過分は即時拒否）
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+
+# Prometheusメトリクス定義
+HASH_QUEUE_DEPTH = Gauge(
+    "password_hash_queue_depth", "Password hash jobs waiting for a worker"
+)
+HASH_IN_FLIGHT = Gauge("password_hash_in_flight", "Password hash jobs running")
+HASH_QUEUE_WAIT = Histogram(
+    "password_hash_queue_wait_seconds",
+    "Time password hash jobs spend waiting for a worker",
+    buckets=[0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5],
+)
+HASH_DURATION = Histogram(
+    "password_hash_duration_seconds",
+    "Password hash job execution time",
+    ["operation"],
+    buckets=[0.01, 0.05, 0.1, 0.2, 0.3, 0.5, 1, 2],
+)
+HASH_REJECTED = Counter(
+    "password_hash_rejected_total",
+    "Password hash jobs rejected because the queue was full",
+)
+
+
+class PasswordHasherBusy(Exception):
+    """待ち行列が上限に達している"""
+
+
+class PasswordHasher:
+    """件数上限付きのハッシュ計算用エグゼキュータ"""
+
+    def __init__(
+        self,
+        workers: int = PASSWORD_HASH_WORKERS,
+        max_queue: int = PASSWORD_HASH_MAX_QUEUE,
+    ):
+        self.workers = max(workers, 1)
+        self.max_queue = max(max_queue, 0)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="password-hash"
+        )
+        self._pending = 0  # 受付済み（実行中 + 待ち）
+        self._running = 0
+        self._lock = threading.Lock()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._pending - self._running
+
+    async def run(self, operation: str, func: Callable[..., Any], *args: Any) -> Any:
+        """func をプール上で実行し、結果を待つ
+
+        Raises:
+            PasswordHasherBusy: 待ち行列が上限を超えている場合
+        """
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                HASH_REJECTED.inc()
+                raise PasswordHasherBusy()
+            self._pending += 1
+            self._update_gauges()
+
+        submitted_at = time.perf_counter()
+
+        def job():
+            started_at = time.perf_counter()
+            HASH_QUEUE_WAIT.observe(started_at - submitted_at)
+            with self._lock:
+                self._running += 1
+                self._update_gauges()
+            try:
+                return func(*args)
+            finally:
+                HASH_DURATION.labels(operation=operation).observe(
+                    time.perf_counter() - started_at
+                )
+                with self._lock:
+                    self._running -= 1
+                    self._pending -= 1
+                    self._update_gauges()
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, job)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    def _update_gauges(self) -> None:
+        HASH_QUEUE_DEPTH.set(self._pending - self._running)
+        HASH_IN_FLIGHT.set(self._running)
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,116 @@
+"""
+権限ビットセット
+権限コード・ロール名を整数のビット位置に対応付け、認可判定をビット演算で行う
+"""
+
+import threading
+from typing import Dict, Iterable, List
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from packages.backend.models.user import Permission, Role, role_permissions
+
+
+class BitRegistry:
+    """文字列をビット位置に対応付ける表（プロセス内で位置は不変）"""
+
+    def __init__(self):
+        self._bits: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._lock = threading.Lock()
+
+    def bit(self, name: str) -> int:
+        """名前に対応するビット値を返す（未登録なら新しい位置を割り当てる）"""
+        value = self._bits.get(name)
+        if value is not None:
+            return value
+        with self._lock:
+            value = self._bits.get(name)
+            if value is None:
+                value = 1 << len(self._names)
+                self._names.append(name)
+                self._bits[name] = value
+            return value
+
+    def mask_for(self, names: Iterable[str]) -> int:
+        mask = 0
+        for name in names:
+            mask |= self.bit(name)
+        return mask
+
+    def names_for(self, mask: int) -> List[str]:
+        """ビットマスクを名前の一覧に戻す"""
+        return [name for i, name in enumerate(self._names) if mask >> i & 1]
+
+
+class PermissionRegistry:
+    """権限コードのビット位置とロールごとの権限ビットマスク"""
+
+    def __init__(self):
+        self.permissions = BitRegistry()
+        self.roles = BitRegistry()
+        self._role_masks: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def load(self, db: Session) -> None:
+        """全権限コードとロール別ビットマスクを読み込む（起動時に実行）"""
+        for (code,) in db.query(Permission.code).order_by(Permission.id):
+            self.permissions.bit(code)
+        for (name,) in db.query(Role.name).order_by(Role.id):
+            self.roles.bit(name)
+
+        masks: Dict[int, int] = {}
+        rows = db.query(role_permissions.c.role_id, Permission.code).join(
+            Permission, Permission.id == role_permissions.c.permission_id
+        )
+        for role_id, code in rows:
+            masks[role_id] = masks.get(role_id, 0) | self.permissions.bit(code)
+        with self._lock:
+            self._role_masks = masks
+
+    def role_mask(self, role: Role) -> int:
+        """ロールの権限ビットマスク（未計算ならロールの権限から算出して保持）"""
+        mask = self._role_masks.get(role.id) if role.id is not None else None
+        if mask is None:
+            mask = self.permissions.mask_for(perm.code for perm in role.permissions)
+            if role.id is not None:
+                with self._lock:
+                    self._role_masks[role.id] = mask
+        return mask
+
+    def invalidate_roles(self) -> None:
+        """ロール別ビットマスクを破棄（次回参照時に再計算）"""
+        with self._lock:
+            self._role_masks = {}
+
+
+permission_registry = PermissionRegistry()
+
+
+# --- ORMイベントによる無効化 ---
+# principal_cache と同様に flush 時とコミット後の両方で破棄する
+
+_STALE_KEY = "_role_masks_stale"
+
+
+@event.listens_for(Role, "after_update")
+@event.listens_for(Role, "after_delete")
+@event.listens_for(Permission, "after_update")
+@event.listens_for(Permission, "after_delete")
+def _role_or_permission_changed(mapper, connection, target):
+    permission_registry.invalidate_roles()
+    session = object_session(target)
+    if session is not None:
+        session.info[_STALE_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_role_masks(session):
+    if session.info.pop(_STALE_KEY, False):
+        permission_registry.invalidate_roles()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_role_mask_invalidation(session):
+    session.info.pop(_STALE_KEY, None)
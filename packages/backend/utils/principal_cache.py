@@ -0,0 +1,191 @@
+"""
+認証済みユーザー（プリンシパル）キャッシュ
+トークンの sub をキーに、ユーザーID・有効フラグ・ロール・権限ビットマスクを保持する
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import FrozenSet, Optional, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from packages.backend.models.user import Permission, Role, User
+from packages.backend.utils.permissions import permission_registry
+
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "1024"))
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+
+_PENDING_KEY = "_principal_invalidations"
+_CLEAR_ALL = object()
+
+# プリンシパルに含まれる User の属性（これ以外の更新ではキャッシュを破棄しない）
+_PRINCIPAL_ATTRS = (
+    "username",
+    "email",
+    "first_name",
+    "last_name",
+    "department",
+    "job_title",
+    "is_active",
+    "roles",
+)
+
+
+@dataclass(frozen=True)
+class Principal:
+    """リクエスト処理で参照する認証済みユーザー情報（不変）"""
+
+    id: int
+    username: str
+    email: str
+    first_name: Optional[str]
+    last_name: Optional[str]
+    department: Optional[str]
+    job_title: Optional[str]
+    is_active: bool
+    roles: FrozenSet[str]
+    role_mask: int  # permission_registry.roles のビットマスク
+    permission_mask: int  # permission_registry.permissions のビットマスク
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        roles = user.roles or []
+        permission_mask = 0
+        for role in roles:
+            permission_mask |= permission_registry.role_mask(role)
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            department=user.department,
+            job_title=user.job_title,
+            is_active=bool(user.is_active),
+            roles=frozenset(role.name for role in roles),
+            role_mask=permission_registry.roles.mask_for(role.name for role in roles),
+            permission_mask=permission_mask,
+        )
+
+    @property
+    def permissions(self) -> FrozenSet[str]:
+        return frozenset(
+            permission_registry.permissions.names_for(self.permission_mask)
+        )
+
+    def has_role(self, role_name: str) -> bool:
+        return bool(self.role_mask & permission_registry.roles.bit(role_name))
+
+    def has_permission(self, permission_code: str) -> bool:
+        return bool(
+            self.permission_mask & permission_registry.permissions.bit(permission_code)
+        )
+
+
+class PrincipalCache:
+    """件数上限付き TTL/LRU キャッシュ（スレッドセーフ）"""
+
+    def __init__(
+        self, maxsize: int = PRINCIPAL_CACHE_SIZE, ttl: float = PRINCIPAL_CACHE_TTL
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[Principal, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, subject: str) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None:
+                return None
+            principal, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[subject]
+                return None
+            self._entries.move_to_end(subject)
+            return principal
+
+    def put(self, subject: str, principal: Principal) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[subject] = (principal, time.monotonic() + self.ttl)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, subject: str) -> None:
+        with self._lock:
+            self._entries.pop(subject, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+principal_cache = PrincipalCache()
+
+
+# --- ORMイベントによる無効化 ---
+# flush 時に即時破棄し、コミット後にもう一度破棄する
+# （flush〜commit の間に旧データで再キャッシュされるのを防ぐ）
+
+
+def _schedule_invalidation(target, subject) -> None:
+    if subject is _CLEAR_ALL:
+        principal_cache.clear()
+    else:
+        principal_cache.invalidate(subject)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).add(subject)
+
+
+def _usernames(user: User):
+    """現在および変更前のユーザー名"""
+    history = inspect(user).attrs.username.history
+    return {user.username, *(name for name in history.deleted if name)}
+
+
+@event.listens_for(User, "after_update")
+def _user_updated(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[attr].history.has_changes() for attr in _PRINCIPAL_ATTRS):
+        for username in _usernames(target):
+            _schedule_invalidation(target, username)
+
+
+@event.listens_for(User, "after_delete")
+def _user_deleted(mapper, connection, target):
+    for username in _usernames(target):
+        _schedule_invalidation(target, username)
+
+
+@event.listens_for(Role, "after_update")
+@event.listens_for(Role, "after_delete")
+@event.listens_for(Permission, "after_update")
+@event.listens_for(Permission, "after_delete")
+def _role_or_permission_changed(mapper, connection, target):
+    # ロール・権限の変更は多数のユーザーに影響するため全件破棄
+    _schedule_invalidation(target, _CLEAR_ALL)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_principal_invalidations(session):
+    for subject in session.info.pop(_PENDING_KEY, ()):
+        if subject is _CLEAR_ALL:
+            principal_cache.clear()
+        else:
+            principal_cache.invalidate(subject)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_principal_invalidations(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,59 @@
+"""
+問題とインシデントのリンクの同期
+リクエストで指定されたインシデントIDの一覧に合わせて problem_incident_links を更新する。
+"""
+
+from typing import List, Optional, Set
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from packages.backend.models.incident import Incident
+from packages.backend.models.problem import ProblemIncidentLink
+
+
+async def sync_incident_links(
+    db: AsyncSession,
+    problem_id: int,
+    incident_ids: List[int],
+    existing: Optional[Set[int]] = None,
+) -> List[int]:
+    """問題に紐づくインシデントを incident_ids に一致させる
+
+    存在確認は IN 句1回で行い、既存リンクとの差分だけを一括 INSERT / DELETE する。
+    存在しないインシデントIDはリンクせず、その一覧を返す。
+
+    Args:
+        existing: 既存リンクのインシデントID（新規作成時は空集合を渡して検索を省略）
+    """
+    link = ProblemIncidentLink
+    requested = set(incident_ids)
+    found = set()
+    if requested:
+        found = set(
+            await db.scalars(select(Incident.id).where(Incident.id.in_(requested)))
+        )
+    if existing is None:
+        existing = set(
+            await db.scalars(
+                select(link.incident_id).where(link.problem_id == problem_id)
+            )
+        )
+
+    to_add = found - existing
+    to_remove = existing - found
+    if to_remove:
+        await db.execute(
+            delete(link).where(
+                link.problem_id == problem_id, link.incident_id.in_(to_remove)
+            )
+        )
+    if to_add:
+        await db.execute(
+            insert(link),
+            [
+                {"problem_id": problem_id, "incident_id": incident_id}
+                for incident_id in sorted(to_add)
+            ],
+        )
+    return sorted(requested - found)
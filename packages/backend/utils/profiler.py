@@ -0,0 +1,196 @@
+"""
+プロセス内サンプリングプロファイラ
+別スレッドから sys._current_frames() で全スレッドのスタックを一定間隔で採取し、
+collapsed 形式（flamegraph.pl / speedscope で読める）または speedscope JSON で出力する。
+外部エージェントを使わず、稼働中のワーカーで数秒だけ実行する用途を想定している。
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+# 採取間隔（秒）と1回の採取の上限時間
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+# 保持するリクエスト単位のプロファイル数
+PROFILE_STORE_SIZE = int(os.getenv("PROFILE_STORE_SIZE", "20"))
+
+MAX_STACK_DEPTH = 128
+
+_Frame = Tuple[str, str, int]  # (関数名, ファイル名, 定義行)
+
+
+class ProfileFormat(str, Enum):
+    COLLAPSED = "collapsed"  # flamegraph.pl / speedscope で読める折りたたみ形式
+    SPEEDSCOPE = "speedscope"  # speedscope の JSON
+
+
+class ProfilerBusy(RuntimeError):
+    """別のプロファイルを採取中"""
+
+
+class SamplingProfiler:
+    """スタックのサンプリング（start/stop または with 文で使う）"""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = max(interval, 0.001)
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at = 0.0
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SamplingProfiler":
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._run, name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self.started_at
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                self.stacks[_stack(names.get(thread_id, str(thread_id)), frame)] += 1
+            self.samples += 1
+
+    # --- 出力 ---
+
+    def collapsed(self) -> str:
+        """collapsed 形式（"root;...;leaf 回数" を1行ずつ）"""
+        lines = [
+            ";".join(_label(frame) for frame in stack) + f" {count}"
+            for stack, count in self.stacks.most_common()
+        ]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def speedscope(self, name: str = "profile") -> Dict[str, Any]:
+        """speedscope の sampled プロファイル形式"""
+        frames: List[Dict[str, Any]] = []
+        index: Dict[_Frame, int] = {}
+        samples, weights = [], []
+        for stack, count in self.stacks.most_common():
+            sample = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    frames.append(
+                        {"name": frame[0], "file": frame[1], "line": frame[2]}
+                    )
+                sample.append(index[frame])
+            samples.append(sample)
+            weights.append(count * self.interval)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "itsm-sampling-profiler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+        }
+
+
+def _stack(thread_name: str, frame) -> Tuple[_Frame, ...]:
+    """ルート（スレッド名）から末端までのフレーム列"""
+    stack: List[_Frame] = []
+    while frame is not None and len(stack) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    stack.append((f"thread:{thread_name}", "", 0))
+    stack.reverse()
+    return tuple(stack)
+
+
+def _label(frame: _Frame) -> str:
+    name, filename, line = frame
+    if not filename:
+        return name.replace(";", ":")
+    return f"{name} ({os.path.basename(filename)}:{line})".replace(";", ":")
+
+
+def render(
+    profiler: SamplingProfiler, output_format: ProfileFormat, name: str = "profile"
+):
+    """指定形式で出力（collapsed は文字列、speedscope は dict）"""
+    if output_format == ProfileFormat.SPEEDSCOPE:
+        return profiler.speedscope(name)
+    return profiler.collapsed()
+
+
+# --- 同時実行の制御と採取結果の保持 ---
+# サンプリングは全スレッドを対象にするため、同時に採取するのは1つまで
+
+_profiling = threading.Lock()
+
+
+def start_exclusive(interval: float = PROFILE_INTERVAL) -> SamplingProfiler:
+    """採取を開始（他で採取中なら ProfilerBusy）。終了は stop_exclusive で行う"""
+    if not _profiling.acquire(blocking=False):
+        raise ProfilerBusy("Another profile is being captured")
+    try:
+        return SamplingProfiler(interval).start()
+    except BaseException:
+        _profiling.release()
+        raise
+
+
+def stop_exclusive(profiler: SamplingProfiler) -> SamplingProfiler:
+    try:
+        return profiler.stop()
+    finally:
+        _profiling.release()
+
+
+class ProfileStore:
+    """リクエスト単位のプロファイルを件数上限付きで保持（古いものから破棄）"""
+
+    def __init__(self, maxsize: int = PROFILE_STORE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, SamplingProfiler]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile_id: str, profiler: SamplingProfiler) -> None:
+        with self._lock:
+            self._entries[profile_id] = profiler
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[SamplingProfiler]:
+        with self._lock:
+            return self._entries.get(profile_id)
+
+
+profile_store = ProfileStore()
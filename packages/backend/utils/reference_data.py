@@ -0,0 +1,166 @@
+"""
+参照データ（ステータス・優先度・カテゴリ）のプロセス内レジストリ
+起動時に読み込み、ORM経由の変更はコミット時に破棄して次回参照時に再読み込みする
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from packages.backend.models.change import ChangePriority, ChangeStatus
+from packages.backend.models.incident import IncidentPriority, IncidentStatus
+from packages.backend.models.problem import (
+    ProblemCategory,
+    ProblemPriority,
+    ProblemStatus,
+)
+
+# 他プロセスでの変更を取り込むまでの最大秒数
+REFERENCE_DATA_TTL = float(os.getenv("REFERENCE_DATA_TTL", "300"))
+
+REFERENCE_MODELS = (
+    IncidentStatus,
+    IncidentPriority,
+    ProblemStatus,
+    ProblemPriority,
+    ProblemCategory,
+    ChangeStatus,
+    ChangePriority,
+)
+
+_PENDING_KEY = "_reference_data_changes"
+
+
+def _serialize(row) -> Dict[str, Any]:
+    """API が返す形の1行（to_dict を持つモデルはそれを、なければ全カラムを使う）"""
+    if hasattr(row, "to_dict"):
+        return row.to_dict()
+    data = {}
+    for attr in inspect(row).mapper.column_attrs:
+        value = getattr(row, attr.key)
+        data[attr.key] = value.isoformat() if isinstance(value, datetime) else value
+    return data
+
+
+class ReferenceTable:
+    """1テーブル分のスナップショット（読み込み後は変更しない）"""
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self.rows = rows
+        self.loaded_at = time.monotonic()
+        self._by_id = {row["id"]: row for row in rows}
+        self._by_name = {row["name"]: row for row in rows}
+        self.body = json.dumps(rows, ensure_ascii=False).encode("utf-8")
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+
+    def has_id(self, row_id: Optional[int]) -> bool:
+        return row_id in self._by_id
+
+    def name_for(self, row_id: Optional[int]) -> Optional[str]:
+        row = self._by_id.get(row_id)
+        return row["name"] if row else None
+
+    def id_for(self, name: Optional[str]) -> Optional[int]:
+        row = self._by_name.get(name)
+        return row["id"] if row else None
+
+
+class ReferenceDataRegistry:
+    """参照データテーブルのスナップショットを保持する（スレッドセーフ）
+
+    キーはテーブル名（Flask 側と FastAPI 側でモデルの import パスが異なっても共有できる）
+    """
+
+    def __init__(self, ttl: float = REFERENCE_DATA_TTL):
+        self.ttl = ttl
+        self._tables: Dict[str, ReferenceTable] = {}
+        self._lock = threading.Lock()
+
+    def load(self, db: Session, models: Iterable[type] = REFERENCE_MODELS) -> None:
+        """参照データを読み込む（起動時に実行）"""
+        for model in models:
+            rows = [_serialize(row) for row in db.query(model).order_by(model.id)]
+            with self._lock:
+                self._tables[model.__tablename__] = ReferenceTable(rows)
+
+    def cached(self, model: type) -> Optional[ReferenceTable]:
+        """有効なスナップショット（未読み込み・期限切れなら None）"""
+        table = self._tables.get(model.__tablename__)
+        if table is None or time.monotonic() - table.loaded_at > self.ttl:
+            return None
+        return table
+
+    def get(self, db: Session, model: type) -> ReferenceTable:
+        """スナップショットを取得（必要なら読み込む）"""
+        table = self.cached(model)
+        if table is None:
+            self.load(db, (model,))
+            table = self._tables[model.__tablename__]
+        return table
+
+    async def get_async(self, db: AsyncSession, model: type) -> ReferenceTable:
+        """非同期セッション用の get（キャッシュ済みならDBにアクセスしない）"""
+        table = self.cached(model)
+        if table is None:
+            table = await db.run_sync(self.get, model)
+        return table
+
+    def invalidate(self, model: Optional[type] = None) -> None:
+        with self._lock:
+            if model is None:
+                self._tables.clear()
+            else:
+                self._tables.pop(model.__tablename__, None)
+
+
+reference_data = ReferenceDataRegistry()
+
+
+def reference_response(request: Request, table: ReferenceTable) -> Response:
+    """スナップショットを ETag 付きで返す（If-None-Match が一致すれば 304）"""
+    etag = f'"{table.etag}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=table.body, media_type=JSONResponse.media_type, headers=headers
+    )
+
+
+# --- ORMイベントによる無効化 ---
+# principal_cache と同様に flush 時とコミット後の両方で破棄する
+
+
+def _reference_changed(mapper, connection, target):
+    model = mapper.class_
+    reference_data.invalidate(model)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).add(model)
+
+
+for _model in REFERENCE_MODELS:
+    for _event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event_name, _reference_changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_reference_invalidations(session):
+    for model in session.info.pop(_PENDING_KEY, ()):
+        reference_data.invalidate(model)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_reference_invalidations(session):
+    session.info.pop(_PENDING_KEY, None)
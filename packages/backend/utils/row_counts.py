@@ -0,0 +1,132 @@
+"""
+一覧エンベロープ用の行数キャッシュ
+テーブル単位の件数を保持し、ORM経由の追加・削除をコミット時に差分反映する
+"""
+
+import os
+import threading
+import time
+from collections import Counter
+from enum import Enum
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import event, func, text
+from sqlalchemy.orm import Session
+
+# キャッシュの有効期間（秒）。他プロセスや一括更新による誤差をこの間隔で補正する
+ROW_COUNT_CACHE_TTL = float(os.getenv("ROW_COUNT_CACHE_TTL", "60"))
+
+_PENDING_KEY = "_row_count_deltas"
+
+
+class CountMode(str, Enum):
+    EXACT = "exact"  # 毎回 COUNT(*) を実行
+    ESTIMATED = "estimated"  # キャッシュ値（なければ統計値 or COUNT(*)）
+    NONE = "none"  # 件数を返さない
+
+
+class RowCountCache:
+    """テーブル名をキーにした行数キャッシュ（スレッドセーフ）"""
+
+    def __init__(self, ttl: float = ROW_COUNT_CACHE_TTL):
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, table: str) -> Optional[int]:
+        """有効期限内のキャッシュ値を取得"""
+        with self._lock:
+            entry = self._entries.get(table)
+            if entry is None:
+                return None
+            value, loaded_at = entry
+            if time.monotonic() - loaded_at > self.ttl:
+                del self._entries[table]
+                return None
+            return value
+
+    def set(self, table: str, value: int) -> None:
+        with self._lock:
+            self._entries[table] = (max(value, 0), time.monotonic())
+
+    def adjust(self, table: str, delta: int) -> None:
+        """キャッシュ済みの値に差分を反映（未キャッシュなら何もしない）"""
+        with self._lock:
+            entry = self._entries.get(table)
+            if entry is not None:
+                self._entries[table] = (max(entry[0] + delta, 0), entry[1])
+
+    def invalidate(self, table: Optional[str] = None) -> None:
+        with self._lock:
+            if table is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(table, None)
+
+
+row_counts = RowCountCache()
+
+
+def _estimate_from_catalog(db: Session, table: str) -> Optional[int]:
+    """PostgreSQLの統計情報から行数の概算を取得"""
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    estimate = db.execute(
+        text("SELECT reltuples FROM pg_class WHERE relname = :table"),
+        {"table": table},
+    ).scalar()
+    # 未ANALYZEのテーブルは -1 を返す
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
+
+
+def count_rows(db: Session, model: Any, mode: CountMode) -> Optional[int]:
+    """モードに応じてモデルの総件数を返す"""
+    if mode == CountMode.NONE:
+        return None
+
+    table = model.__tablename__
+    if mode == CountMode.ESTIMATED:
+        cached = row_counts.get(table)
+        if cached is not None:
+            return cached
+        estimate = _estimate_from_catalog(db, table)
+        if estimate is not None:
+            row_counts.set(table, estimate)
+            return estimate
+
+    total = db.query(func.count()).select_from(model).scalar()
+    row_counts.set(table, total)
+    return total
+
+
+# --- ORMイベントによる差分更新 ---
+# flush 時点の追加・削除件数をセッションに溜め、コミット成功時にのみ反映する
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_row_count_deltas(session, flush_context):
+    deltas = session.info.setdefault(_PENDING_KEY, Counter())
+    for obj in session.new:
+        table = getattr(obj, "__tablename__", None)
+        if table:
+            deltas[table] += 1
+    for obj in session.deleted:
+        table = getattr(obj, "__tablename__", None)
+        if table:
+            deltas[table] -= 1
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_row_count_deltas(session):
+    deltas = session.info.pop(_PENDING_KEY, None)
+    if deltas:
+        for table, delta in deltas.items():
+            if delta:
+                row_counts.adjust(table, delta)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_row_count_deltas(session):
+    session.info.pop(_PENDING_KEY, None)
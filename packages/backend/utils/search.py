@@ -0,0 +1,473 @@
+"""
+インシデント・問題・変更要求の全文検索インデックス
+SQLite では FTS5（trigram トークナイザ。日本語も部分一致で検索できる）、
+PostgreSQL では tsvector 列と GIN インデックスを使う。
+ORM 経由の書き込みは flush 時に同じトランザクション内でインデックスへ反映する
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from packages.backend.models.change import Change, ChangeComment, ChangeTask
+from packages.backend.models.incident import Comment, Incident
+from packages.backend.models.problem import Problem, RootCauseAnalysis, Workaround
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Computed,
+    Float,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    delete,
+    event,
+    func,
+    insert,
+    inspect,
+    literal,
+    literal_column,
+    or_,
+    select,
+    text,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import ColumnElement
+
+SEARCH_TABLE = "search_index"
+# trigram トークナイザで索引を引ける最小文字数（これより短い語は LIKE で照合）
+MIN_TERM_LENGTH = 3
+# IN 句に渡す ID の最大数
+_BATCH_SIZE = 500
+
+_PENDING_KEY = "_search_index_pending"
+_READY_KEY = "search_index_ready"
+
+# インデックス本体（Base.metadata とは別管理。SQLite では FTS5 仮想テーブルとして作成）
+search_metadata = MetaData()
+search_index = Table(
+    SEARCH_TABLE,
+    search_metadata,
+    # 種別コードとIDから決まる文書ID（SQLite では FTS5 の rowid）
+    Column("rowid", BigInteger, primary_key=True, autoincrement=False),
+    Column("entity_type", String(20), nullable=False),
+    Column("entity_id", Integer, nullable=False),
+    Column("title", Text),
+    Column("body", Text),
+    Column(
+        "document",
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(body, '')), 'B')",
+            persisted=True,
+        ),
+    ),
+    Index("ix_search_index_document", "document", postgresql_using="gin"),
+)
+
+
+@dataclass(frozen=True)
+class SearchSource:
+    """検索対象の種別（本文カラムと、本文に含める子テーブル）"""
+
+    entity_type: str
+    code: int
+    model: type
+    fields: Tuple[str, ...]
+    children: Tuple[Tuple[type, str, Tuple[str, ...]], ...] = ()
+
+    def doc_id(self, entity_id: int) -> int:
+        return entity_id * 8 + self.code
+
+
+SEARCH_SOURCES = (
+    SearchSource(
+        "incident",
+        1,
+        Incident,
+        ("description",),
+        ((Comment, "incident_id", ("content",)),),
+    ),
+    SearchSource(
+        "problem",
+        2,
+        Problem,
+        ("description", "impact_description"),
+        (
+            (Comment, "problem_id", ("content",)),
+            (RootCauseAnalysis, "problem_id", ("description",)),
+            (Workaround, "problem_id", ("description", "effectiveness_notes")),
+        ),
+    ),
+    SearchSource(
+        "change",
+        3,
+        Change,
+        (
+            "description",
+            "justification",
+            "impact_description",
+            "implementation_plan",
+            "rollback_plan",
+            "test_plan",
+            "implementation_result",
+            "lessons_learned",
+        ),
+        (
+            (ChangeComment, "change_id", ("content",)),
+            (ChangeTask, "change_id", ("title", "description")),
+        ),
+    ),
+)
+SOURCES_BY_TYPE = {source.entity_type: source for source in SEARCH_SOURCES}
+
+# テーブル名 -> [(検索種別, 親IDの属性名)]（Flask 側のモデルとも共有できるようテーブル名で引く）
+_TRACKED_TABLES: Dict[str, List[Tuple[SearchSource, str]]] = {}
+for _source in SEARCH_SOURCES:
+    _TRACKED_TABLES.setdefault(_source.model.__tablename__, []).append((_source, "id"))
+    for _child, _parent_attr, _ in _source.children:
+        _TRACKED_TABLES.setdefault(_child.__tablename__, []).append(
+            (_source, _parent_attr)
+        )
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    """検索結果1件"""
+
+    entity_type: str
+    entity_id: int
+    title: str
+    snippet: str
+    score: float
+
+
+# --- 検索語の扱い ---
+
+
+def split_terms(query: str) -> Tuple[List[str], List[str]]:
+    """検索語を (索引で引ける語, 短すぎて LIKE で照合する語) に分ける"""
+    terms = [term for term in re.split(r"\s+", query.strip()) if term]
+    long_terms = [term for term in terms if len(term) >= MIN_TERM_LENGTH]
+    short_terms = [term for term in terms if len(term) < MIN_TERM_LENGTH]
+    return long_terms, short_terms
+
+
+def fts5_query(terms: Sequence[str]) -> str:
+    """各語をフレーズとして引用した FTS5 クエリ（AND 検索。演算子は解釈させない）"""
+    return " ".join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+
+def _like_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+# --- 方言ごとにコンパイルする式 ---
+
+
+class _SearchExpression(ColumnElement):
+    # 検索語によって SQL の形が変わるため、コンパイル結果はキャッシュしない
+    inherit_cache = False
+
+    def __init__(self, query: str):
+        self.query = query
+
+
+class search_match(_SearchExpression):
+    """search_index の行が検索語に一致する条件（型を付けず、WHERE 句にそのまま展開する）"""
+
+    inherit_cache = False
+
+
+class search_rank(_SearchExpression):
+    """関連度（大きいほど上位）"""
+
+    inherit_cache = False
+    type = Float()
+
+
+class search_snippet(_SearchExpression):
+    """一致箇所の抜粋"""
+
+    inherit_cache = False
+    type = Text()
+
+
+@compiles(search_match, "sqlite")
+def _match_sqlite(element, compiler, **kw):
+    long_terms, short_terms = split_terms(element.query)
+    clauses = []
+    if long_terms:
+        clauses.append(literal_column(SEARCH_TABLE).op("MATCH")(fts5_query(long_terms)))
+    for term in short_terms:
+        pattern = _like_pattern(term)
+        clauses.append(
+            or_(
+                search_index.c.title.like(pattern, escape="\\"),
+                search_index.c.body.like(pattern, escape="\\"),
+            )
+        )
+    if not clauses:
+        return compiler.process(literal(False), **kw)
+    return " AND ".join(f"({compiler.process(clause, **kw)})" for clause in clauses)
+
+
+@compiles(search_rank, "sqlite")
+def _rank_sqlite(element, compiler, **kw):
+    if not split_terms(element.query)[0]:
+        return "0.0"
+    # bm25 は小さいほど上位。タイトルの一致を本文の10倍に重み付けする
+    return f"-bm25({SEARCH_TABLE}, 0.0, 0.0, 10.0, 1.0)"
+
+
+@compiles(search_snippet, "sqlite")
+def _snippet_sqlite(element, compiler, **kw):
+    if not split_terms(element.query)[0]:
+        return f"substr({SEARCH_TABLE}.body, 1, 120)"
+    return f"snippet({SEARCH_TABLE}, 3, '[', ']', '…', 16)"
+
+
+def _tsquery(element):
+    return func.websearch_to_tsquery("simple", element.query)
+
+
+@compiles(search_match, "postgresql")
+def _match_postgresql(element, compiler, **kw):
+    return compiler.process(search_index.c.document.op("@@")(_tsquery(element)), **kw)
+
+
+@compiles(search_rank, "postgresql")
+def _rank_postgresql(element, compiler, **kw):
+    return compiler.process(
+        func.ts_rank_cd(search_index.c.document, _tsquery(element)), **kw
+    )
+
+
+@compiles(search_snippet, "postgresql")
+def _snippet_postgresql(element, compiler, **kw):
+    return compiler.process(
+        func.ts_headline(
+            "simple",
+            search_index.c.body,
+            _tsquery(element),
+            "StartSel=[, StopSel=], MaxWords=24, MinWords=8",
+        ),
+        **kw,
+    )
+
+
+# --- 検索 ---
+
+
+def matching_ids(entity_type: str, query: str):
+    """検索語に一致する ID のサブクエリ（一覧 API のキーワード絞り込み用）"""
+    return select(search_index.c.entity_id).where(
+        search_index.c.entity_type == entity_type, search_match(query)
+    )
+
+
+def search_statement(
+    query: str,
+    entity_types: Optional[Iterable[str]] = None,
+    limit: int = 20,
+    offset: int = 0,
+):
+    """関連度順の検索 SELECT 文"""
+    score = search_rank(query).label("score")
+    stmt = select(
+        search_index.c.entity_type,
+        search_index.c.entity_id,
+        search_index.c.title,
+        search_snippet(query).label("snippet"),
+        score,
+    ).where(search_match(query))
+    if entity_types:
+        stmt = stmt.where(search_index.c.entity_type.in_(list(entity_types)))
+    return (
+        stmt.order_by(score.desc(), search_index.c.rowid.desc())
+        .limit(limit)
+        .offset(offset)
+    )
+
+
+def search(
+    db: Session,
+    query: str,
+    entity_types: Optional[Iterable[str]] = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> List[SearchHit]:
+    """全文検索を実行"""
+    if not query.strip():
+        return []
+    rows = db.execute(search_statement(query, entity_types, limit, offset))
+    return [
+        SearchHit(
+            entity_type=row.entity_type,
+            entity_id=row.entity_id,
+            title=row.title or "",
+            snippet=row.snippet or "",
+            score=float(row.score or 0.0),
+        )
+        for row in rows
+    ]
+
+
+# --- インデックスの作成・更新 ---
+
+
+def ensure_search_index(connection) -> None:
+    """検索インデックスのテーブルがなければ作成する
+
+    インデックスが空で検索対象の行が既にある場合（導入前からあるデータベースなど）は
+    既存の行から構築する。そうしないと導入前のチケットがキーワード検索に一致しなくなる。
+    """
+    _create_search_index(connection)
+    if _needs_backfill(connection):
+        _index_all(connection)
+
+
+def _create_search_index(connection) -> None:
+    if connection.dialect.name == "sqlite":
+        connection.execute(
+            text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+                "entity_type UNINDEXED, entity_id UNINDEXED, title, body, "
+                "tokenize='trigram')"
+            )
+        )
+    else:
+        search_metadata.create_all(connection)
+    connection.info[_READY_KEY] = True
+
+
+def _needs_backfill(connection) -> bool:
+    """インデックスが空で、検索対象のテーブルに行があるか"""
+    if connection.execute(select(search_index.c.rowid).limit(1)).first():
+        return False
+    inspector = inspect(connection)
+    return any(
+        inspector.has_table(source.model.__tablename__)
+        and connection.execute(select(source.model.id).limit(1)).first() is not None
+        for source in SEARCH_SOURCES
+    )
+
+
+def search_index_ready(connection) -> bool:
+    """検索インデックスが作成済みか（作成済みと分かった接続ではキャッシュする）"""
+    if not connection.info.get(_READY_KEY):
+        if not inspect(connection).has_table(SEARCH_TABLE):
+            return False
+        connection.info[_READY_KEY] = True
+    return True
+
+
+def _batches(ids: Sequence[int]):
+    for start in range(0, len(ids), _BATCH_SIZE):
+        yield ids[start : start + _BATCH_SIZE]
+
+
+def _build_documents(connection, source: SearchSource, ids: Sequence[int]):
+    model = source.model
+    columns = [getattr(model, name) for name in source.fields]
+    documents: Dict[int, Tuple[str, List[str]]] = {}
+    for row in connection.execute(
+        select(model.id, model.title, *columns).where(model.id.in_(ids))
+    ):
+        documents[row[0]] = (row[1], [value for value in row[2:] if value])
+    for child, parent_attr, fields in source.children:
+        parent_id = getattr(child, parent_attr)
+        child_columns = [getattr(child, name) for name in fields]
+        for row in connection.execute(
+            select(parent_id, *child_columns)
+            .where(parent_id.in_(ids))
+            .order_by(child.id)
+        ):
+            if row[0] in documents:
+                documents[row[0]][1].extend(value for value in row[1:] if value)
+    return documents
+
+
+def reindex(connection, source: SearchSource, ids: Iterable[int]) -> int:
+    """指定IDの文書を作り直す（削除済みの行はインデックスから消える）"""
+    written = 0
+    for batch in _batches(sorted(set(ids))):
+        documents = _build_documents(connection, source, batch)
+        connection.execute(
+            delete(search_index).where(
+                search_index.c.rowid.in_([source.doc_id(i) for i in batch])
+            )
+        )
+        if documents:
+            connection.execute(
+                insert(search_index),
+                [
+                    {
+                        "rowid": source.doc_id(entity_id),
+                        "entity_type": source.entity_type,
+                        "entity_id": entity_id,
+                        "title": title,
+                        "body": "\n".join(parts),
+                    }
+                    for entity_id, (title, parts) in documents.items()
+                ],
+            )
+            written += len(documents)
+    return written
+
+
+def rebuild_search_index(connection) -> int:
+    """検索インデックスを全件作り直す（一括投入後や ORM を経由しない更新の後に実行）"""
+    _create_search_index(connection)
+    connection.execute(delete(search_index))
+    return _index_all(connection)
+
+
+def _index_all(connection) -> int:
+    total = 0
+    for source in SEARCH_SOURCES:
+        ids = list(connection.scalars(select(source.model.id)))
+        total += reindex(connection, source, ids)
+    return total
+
+
+# --- flush 時の差分反映 ---
+# after_flush で変更のあった文書を集め、after_flush_postexec で同じトランザクション内で書き直す
+# （ロールバックされればインデックスの変更も取り消される）
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_documents(session, flush_context):
+    pending: Dict[str, Set[int]] = session.info.setdefault(_PENDING_KEY, {})
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table_name = getattr(type(obj), "__tablename__", None)
+        for source, attr in _TRACKED_TABLES.get(table_name, ()):
+            # 親の付け替えがあれば旧・新両方の文書を更新する
+            history = inspect(obj).attrs[attr].history
+            for entity_id in history.sum():
+                if entity_id is not None:
+                    pending.setdefault(source.entity_type, set()).add(entity_id)
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _reindex_changed_documents(session, flush_context):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    connection = session.connection()
+    if not search_index_ready(connection):
+        return
+    for entity_type, ids in pending.items():
+        reindex(connection, SOURCES_BY_TYPE[entity_type], ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_documents(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,187 @@
+"""
+チケット番号採番ユーティリティ
+INC-YYYY-NNNN 形式の番号を ticket_sequences テーブルから原子的に払い出す
+"""
+
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from packages.backend.models.sequence import TicketSequence
+
+# ワーカープロセスごとに事前確保する番号の数（1 なら都度採番）
+TICKET_SEQUENCE_BLOCK_SIZE = int(os.getenv("TICKET_SEQUENCE_BLOCK_SIZE", "1"))
+
+_PENDING_KEY = "_ticket_number_blocks"
+
+_SequenceKey = Tuple[str, int]
+
+
+def format_ticket_number(prefix: str, year: int, value: int) -> str:
+    """採番値をチケット番号文字列に整形"""
+    return f"{prefix}-{year}-{value:04d}"
+
+
+class TicketNumberAllocator:
+    """接頭辞・年ごとの連番払い出し
+
+    シーケンス行を UPDATE ... RETURNING で加算するため、同時実行しても
+    番号が重複しない。block_size > 1 の場合は余剰分をプロセス内に保持し、
+    以降の採番ではデータベースにアクセスしない。保持は呼び出し元の
+    トランザクションがコミットされた時点で行い、ロールバック時は破棄する。
+    """
+
+    def __init__(self, block_size: int = TICKET_SEQUENCE_BLOCK_SIZE):
+        self.block_size = max(block_size, 1)
+        self._blocks: Dict[_SequenceKey, Deque[List[int]]] = {}
+        self._lock = threading.Lock()
+
+    def reserve(
+        self,
+        db: Session,
+        prefix: str,
+        count: int = 1,
+        column: Optional[Any] = None,
+        year: Optional[int] = None,
+    ) -> List[str]:
+        """チケット番号を count 件払い出す
+
+        Args:
+            db: 呼び出し元のセッション（採番行の更新は同じトランザクションで行う）
+            prefix: 番号の接頭辞
+            count: 払い出す件数（一括インポート向け）
+            column: シーケンス行の初回作成時に発行済みの最大番号を引き継ぐ番号カラム
+            year: 対象年（省略時は現在年）
+        """
+        year = year or datetime.now().year
+        key = (prefix, year)
+        values = self._take_cached(key, count)
+
+        remaining = count - len(values)
+        if remaining > 0:
+            size = max(remaining, self.block_size)
+            last = self._increment(db, prefix, year, size, column)
+            start = last - size + 1
+            values.extend(range(start, start + remaining))
+            if size > remaining:
+                db.info.setdefault(_PENDING_KEY, []).append(
+                    (self, key, start + remaining, last)
+                )
+
+        return [format_ticket_number(prefix, year, value) for value in values]
+
+    def next(self, db: Session, prefix: str, column: Optional[Any] = None) -> str:
+        """チケット番号を1件払い出す"""
+        return self.reserve(db, prefix, 1, column)[0]
+
+    def clear(self) -> None:
+        """プロセス内に保持している番号ブロックを破棄"""
+        with self._lock:
+            self._blocks.clear()
+
+    def _take_cached(self, key: _SequenceKey, count: int) -> List[int]:
+        values: List[int] = []
+        with self._lock:
+            blocks = self._blocks.get(key)
+            while blocks and len(values) < count:
+                block = blocks[0]
+                take = min(block[1] - block[0] + 1, count - len(values))
+                values.extend(range(block[0], block[0] + take))
+                block[0] += take
+                if block[0] > block[1]:
+                    blocks.popleft()
+        return values
+
+    def _store_block(self, key: _SequenceKey, start: int, end: int) -> None:
+        with self._lock:
+            self._blocks.setdefault(key, deque()).append([start, end])
+
+    def _increment(
+        self, db: Session, prefix: str, year: int, size: int, column: Optional[Any]
+    ) -> int:
+        table = TicketSequence.__table__
+        stmt = (
+            update(table)
+            .where(table.c.prefix == prefix, table.c.year == year)
+            .values(last_value=table.c.last_value + size, updated_at=datetime.utcnow())
+            .returning(table.c.last_value)
+        )
+        last = db.execute(stmt).scalar()
+        if last is None:
+            # 初回のみ行を作成。競合した場合は先行した側の行をそのまま使う
+            initial = 0
+            if column is not None:
+                initial = _highest_issued(db, column, prefix, year)
+            db.execute(_insert_ignore(db, prefix, year, initial))
+            last = db.execute(stmt).scalar()
+        return last
+
+
+def _highest_issued(db: Session, column: Any, prefix: str, year: int) -> int:
+    """発行済みの番号のうち接頭辞・年が一致する最大の連番
+
+    削除済みのチケットがあると件数は最大番号を下回るため、件数ではなく
+    番号そのものから求める。連番は桁数が増えうるので長さ → 値の順に並べる。
+    """
+    start = f"{prefix}-{year}-"
+    highest = db.execute(
+        select(column)
+        .where(column.like(f"{start}%"))
+        .order_by(func.length(column).desc(), column.desc())
+        .limit(1)
+    ).scalar()
+    if highest is None:
+        return 0
+    return int(highest[len(start) :])
+
+
+def _insert_ignore(db: Session, prefix: str, year: int, initial: int):
+    """ON CONFLICT DO NOTHING 付きのシーケンス行 INSERT"""
+    dialect = db.get_bind().dialect.name
+    insert = pg_insert if dialect == "postgresql" else sqlite_insert
+    return (
+        insert(TicketSequence.__table__)
+        .values(
+            prefix=prefix,
+            year=year,
+            last_value=initial,
+            updated_at=datetime.utcnow(),
+        )
+        .on_conflict_do_nothing(index_elements=["prefix", "year"])
+    )
+
+
+ticket_numbers = TicketNumberAllocator()
+
+
+def next_ticket_number(db: Session, prefix: str, column: Optional[Any] = None) -> str:
+    """既定のアロケータでチケット番号を1件払い出す"""
+    return ticket_numbers.next(db, prefix, column)
+
+
+def reserve_ticket_numbers(
+    db: Session, prefix: str, count: int, column: Optional[Any] = None
+) -> List[str]:
+    """既定のアロケータでチケット番号を一括で払い出す"""
+    return ticket_numbers.reserve(db, prefix, count, column)
+
+
+# --- トランザクション完了時のブロック確定 ---
+
+
+@event.listens_for(Session, "after_commit")
+def _keep_reserved_blocks(session):
+    for allocator, key, start, end in session.info.pop(_PENDING_KEY, []):
+        allocator._store_block(key, start, end)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_reserved_blocks(session):
+    session.info.pop(_PENDING_KEY, None)
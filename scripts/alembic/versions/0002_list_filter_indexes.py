@@ -0,0 +1,120 @@
+"""list filter indexes
+
+Revision ID: 0002_list_filter_indexes
+Revises: 0001_initial
+Create Date: 2026-10-17 12:00:00.000000
+
+一覧 API の既定の並び順・キーセットページネーション（作成日時の降順）と
+絞り込み条件（ステータス・優先度・担当者など）に対応する複合インデックス、
+子テーブルの外部キーと添付ファイルのハッシュのインデックスを追加する。
+モデル側の __table_args__ / index=True と同じ名前で作成する。
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0002_list_filter_indexes"
+down_revision = "0001_initial"
+branch_labels = None
+depends_on = None
+
+# (インデックス名, テーブル名, カラム)
+INDEXES = [
+    # 既定の並び順（created_at 降順）とキーセットページネーション
+    ("ix_incidents_created_at_id", "incidents", ["created_at", "id"]),
+    ("ix_problems_created_at_id", "problems", ["created_at", "id"]),
+    ("ix_changes_created_at_id", "changes", ["created_at", "id"]),
+    ("ix_users_created_at_id", "users", ["created_at", "id"]),
+    # incidents: status / priority / assignee で絞り込み、created_at の降順で並べる
+    ("ix_incidents_status_created_at", "incidents", ["status_id", "created_at", "id"]),
+    (
+        "ix_incidents_priority_created_at",
+        "incidents",
+        ["priority_id", "created_at", "id"],
+    ),
+    (
+        "ix_incidents_assignee_created_at",
+        "incidents",
+        ["assignee_id", "created_at", "id"],
+    ),
+    ("ix_incidents_reporter_id", "incidents", ["reporter_id"]),
+    # problems: read_problems の5つの絞り込み条件
+    ("ix_problems_status_created_at", "problems", ["status_id", "created_at", "id"]),
+    (
+        "ix_problems_priority_created_at",
+        "problems",
+        ["priority_id", "created_at", "id"],
+    ),
+    (
+        "ix_problems_category_created_at",
+        "problems",
+        ["category_id", "created_at", "id"],
+    ),
+    (
+        "ix_problems_assignee_created_at",
+        "problems",
+        ["assignee_id", "created_at", "id"],
+    ),
+    (
+        "ix_problems_reporter_created_at",
+        "problems",
+        ["reporter_id", "created_at", "id"],
+    ),
+    # changes
+    ("ix_changes_status_created_at", "changes", ["status_id", "created_at", "id"]),
+    ("ix_changes_priority_created_at", "changes", ["priority_id", "created_at", "id"]),
+    ("ix_changes_assignee_created_at", "changes", ["assignee_id", "created_at", "id"]),
+    ("ix_changes_requester_id", "changes", ["requester_id"]),
+    # 子テーブルの外部キー（詳細表示の selectinload と件数サブクエリで使用）
+    ("ix_comments_incident_id", "comments", ["incident_id"]),
+    ("ix_comments_problem_id", "comments", ["problem_id"]),
+    ("ix_attachments_incident_id", "attachments", ["incident_id"]),
+    ("ix_attachments_problem_id", "attachments", ["problem_id"]),
+    # 添付ファイルの重複排除と未参照 blob の回収
+    ("ix_attachments_content_hash", "attachments", ["content_hash"]),
+    ("ix_root_cause_analyses_problem_id", "root_cause_analyses", ["problem_id"]),
+    ("ix_workarounds_problem_id", "workarounds", ["problem_id"]),
+    ("ix_change_tasks_change_id", "change_tasks", ["change_id"]),
+    ("ix_change_comments_change_id", "change_comments", ["change_id"]),
+    # 多対多リンクのインシデント・問題側からの逆引き
+    (
+        "ix_problem_incident_links_incident_id",
+        "problem_incident_links",
+        ["incident_id"],
+    ),
+    (
+        "ix_change_incident_links_incident_id",
+        "change_incident_links",
+        ["incident_id"],
+    ),
+    ("ix_change_problem_links_problem_id", "change_problem_links", ["problem_id"]),
+]
+
+
+def _applicable(inspector, table, columns):
+    """テーブルとカラムが存在する場合のみ対象にする（0001 と ORM 作成のスキーマが混在するため）"""
+    if not inspector.has_table(table):
+        return False
+    existing = {column["name"] for column in inspector.get_columns(table)}
+    return set(columns) <= existing
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns in INDEXES:
+        if not _applicable(inspector, table, columns):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table)}
+        if name not in existing:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    for name, table, _ in reversed(INDEXES):
+        if not inspector.has_table(table):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table)}
+        if name in existing:
+            op.drop_index(name, table_name=table)
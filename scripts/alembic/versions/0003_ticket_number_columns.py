@@ -0,0 +1,53 @@
+"""ticket number columns
+
+Revision ID: 0003_ticket_number_columns
+Revises: 0002_list_filter_indexes
+Create Date: 2026-10-18 12:00:00.000000
+
+作成 API が払い出すチケット番号（INC-YYYY-NNNN / PRB-YYYY-NNNN）を保存する
+incidents.incident_number / problems.problem_number を追加する。
+番号導入前の既存行は NULL のままにする（一意制約は NULL を重複とみなさない）。
+changes.change_number は作成時から存在する。
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0003_ticket_number_columns"
+down_revision = "0002_list_filter_indexes"
+branch_labels = None
+depends_on = None
+
+# (テーブル名, カラム名, インデックス名)
+COLUMNS = [
+    ("incidents", "incident_number", "ix_incidents_incident_number"),
+    ("problems", "problem_number", "ix_problems_problem_number"),
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table, column, index in COLUMNS:
+        if not inspector.has_table(table):
+            continue
+        existing = {col["name"] for col in inspector.get_columns(table)}
+        if column not in existing:
+            op.add_column(table, sa.Column(column, sa.String(20), nullable=True))
+        indexes = {idx["name"] for idx in inspector.get_indexes(table)}
+        if index not in indexes:
+            op.create_index(index, table, [column], unique=True)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table, column, index in reversed(COLUMNS):
+        if not inspector.has_table(table):
+            continue
+        indexes = {idx["name"] for idx in inspector.get_indexes(table)}
+        if index in indexes:
+            op.drop_index(index, table_name=table)
+        existing = {col["name"] for col in inspector.get_columns(table)}
+        if column in existing:
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.drop_column(column)
@@ -0,0 +1,49 @@
+"""attachment content hash
+
+Revision ID: 0004_attachment_content_hash
+Revises: 0003_ticket_number_columns
+Create Date: 2026-10-18 12:30:00.000000
+
+添付ファイルの内容アドレス保存（重複排除）で使う attachments.content_hash
+（SHA-256 の16進文字列）とそのインデックスを追加する。
+既存の添付ファイルは NULL のまま（従来どおり個別のファイルとして扱う）。
+0002 は本カラムが存在する場合のみインデックスを作成するため、ここで補完する。
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0004_attachment_content_hash"
+down_revision = "0003_ticket_number_columns"
+branch_labels = None
+depends_on = None
+
+TABLE = "attachments"
+COLUMN = "content_hash"
+INDEX = "ix_attachments_content_hash"
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(TABLE):
+        return
+    existing = {column["name"] for column in inspector.get_columns(TABLE)}
+    if COLUMN not in existing:
+        op.add_column(TABLE, sa.Column(COLUMN, sa.String(64), nullable=True))
+    indexes = {index["name"] for index in inspector.get_indexes(TABLE)}
+    if INDEX not in indexes:
+        op.create_index(INDEX, TABLE, [COLUMN])
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(TABLE):
+        return
+    indexes = {index["name"] for index in inspector.get_indexes(TABLE)}
+    if INDEX in indexes:
+        op.drop_index(INDEX, table_name=TABLE)
+    existing = {column["name"] for column in inspector.get_columns(TABLE)}
+    if COLUMN in existing:
+        with op.batch_alter_table(TABLE) as batch_op:
+            batch_op.drop_column(COLUMN)
@@ -0,0 +1,66 @@
+"""created_at not null
+
+Revision ID: 0005_created_at_not_null
+Revises: 0004_attachment_content_hash
+Create Date: 2026-10-18 13:00:00.000000
+
+一覧 API のキーセットページネーションは (created_at, id) の降順で並べ、
+created_at < カーソル値 で次ページを絞り込む。created_at が NULL の行は
+この条件に一致せず一覧から漏れるため、対象テーブルの created_at を必須にする。
+既存の NULL は updated_at（なければ現在時刻）で埋める。
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0005_created_at_not_null"
+down_revision = "0004_attachment_content_hash"
+branch_labels = None
+depends_on = None
+
+TABLES = ["incidents", "problems", "changes", "users"]
+
+
+def _created_at(inspector, table):
+    """created_at カラムの定義（テーブル・カラムがなければ None）"""
+    if not inspector.has_table(table):
+        return None
+    for column in inspector.get_columns(table):
+        if column["name"] == "created_at":
+            return column
+    return None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    for table in TABLES:
+        column = _created_at(inspector, table)
+        if column is None or not column["nullable"]:
+            continue
+        names = {c["name"] for c in inspector.get_columns(table)}
+        fallback = (
+            "COALESCE(updated_at, CURRENT_TIMESTAMP)"
+            if "updated_at" in names
+            else "CURRENT_TIMESTAMP"
+        )
+        op.execute(
+            f"UPDATE {table} SET created_at = {fallback} WHERE created_at IS NULL"
+        )
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(
+                "created_at", existing_type=sa.DateTime(), nullable=False
+            )
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table in reversed(TABLES):
+        column = _created_at(inspector, table)
+        if column is None or column["nullable"]:
+            continue
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(
+                "created_at", existing_type=sa.DateTime(), nullable=True
+            )
@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import packages.backend.models.change  # noqa: F401  リレーション解決のため
+from packages.backend.async_database import to_async_url
+from packages.backend.database import Base
+from packages.backend.models.user import User
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("sqlite:///./itsm.db", "sqlite+aiosqlite:///./itsm.db"),
+        (
+            "postgresql://itsm:secret@db:5432/itsm",
+            "postgresql+asyncpg://itsm:secret@db:5432/itsm",
+        ),
+        (
+            "postgresql+psycopg2://itsm:secret@db/itsm",
+            "postgresql+asyncpg://itsm:secret@db/itsm",
+        ),
+    ],
+)
+def test_to_async_url_swaps_driver_and_keeps_credentials(url, expected):
+    assert to_async_url(url) == expected
+
+
+def test_to_async_url_rejects_unsupported_backend():
+    with pytest.raises(ValueError):
+        to_async_url("mysql://root@localhost/itsm")
+
+
+def test_concurrent_sessions_share_the_async_engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'async.db'}")
+    factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with factory() as db:
+            db.add(User(username="alice", email="alice@example.com", password_hash="x"))
+            await db.commit()
+
+        async def lookup():
+            async with factory() as db:
+                return await db.scalar(select(User.username))
+
+        names = await asyncio.gather(*(lookup() for _ in range(5)))
+        await engine.dispose()
+        return names
+
+    assert asyncio.run(scenario()) == ["alice"] * 5
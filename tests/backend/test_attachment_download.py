@@ -0,0 +1,99 @@
+import hashlib
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+import packages.backend.models.change  # noqa: F401  リレーション解決のため
+from packages.backend.models.incident import Attachment
+from packages.backend.utils.attachment_download import (
+    RangeNotSatisfiable,
+    attachment_response,
+    parse_range,
+)
+
+DATA = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def client(tmp_path):
+    path = tmp_path / "dump.bin"
+    path.write_bytes(DATA)
+    attachment = Attachment(
+        id=1,
+        filename="障害ダンプ.bin",
+        filepath=str(path),
+        content_hash=hashlib.sha256(DATA).hexdigest(),
+        created_at=datetime(2024, 1, 1),
+    )
+    app = FastAPI()
+
+    @app.api_route("/download", methods=["GET", "HEAD"])
+    async def download(request: Request):
+        return attachment_response(request, attachment)
+
+    client = TestClient(app)
+    client.etag = f'"{attachment.content_hash}"'
+    return client
+
+
+def test_full_download(client):
+    response = client.get("/download")
+    assert response.status_code == 200
+    assert response.content == DATA
+    assert response.headers["etag"] == client.etag
+    assert response.headers["accept-ranges"] == "bytes"
+    assert "filename*=utf-8''" in response.headers["content-disposition"]
+
+
+@pytest.mark.parametrize(
+    "header, start, end",
+    [
+        ("bytes=0-99", 0, 99),
+        ("bytes=10000-", 10000, 10239),
+        ("bytes=-40", 10200, 10239),
+    ],
+)
+def test_single_range(client, header, start, end):
+    response = client.get("/download", headers={"Range": header})
+    assert response.status_code == 206
+    assert response.content == DATA[start : end + 1]
+    assert response.headers["content-range"] == f"bytes {start}-{end}/{len(DATA)}"
+    assert response.headers["content-length"] == str(end - start + 1)
+
+
+def test_unsatisfiable_range(client):
+    response = client.get("/download", headers={"Range": "bytes=99999-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(DATA)}"
+
+
+def test_if_none_match_returns_304(client):
+    response = client.get("/download", headers={"If-None-Match": client.etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_if_range_mismatch_returns_full_content(client):
+    headers = {"Range": "bytes=0-9", "If-Range": '"stale"'}
+    assert client.get("/download", headers=headers).status_code == 200
+
+    headers["If-Range"] = client.etag
+    assert client.get("/download", headers=headers).status_code == 206
+
+
+def test_head_sends_headers_only(client):
+    response = client.head("/download")
+    assert response.status_code == 200
+    assert response.headers["content-length"] == str(len(DATA))
+    assert response.content == b""
+
+
+def test_parse_range_ignores_multiple_and_malformed_ranges():
+    assert parse_range("bytes=0-1,5-6", 10) is None
+    assert parse_range("items=0-1", 10) is None
+    assert parse_range("bytes=5-2", 10) is None
+    assert parse_range("bytes=0-999", 10) == (0, 9)
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range("bytes=-5", 0)
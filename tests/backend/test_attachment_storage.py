@@ -0,0 +1,195 @@
+import asyncio
+import hashlib
+import io
+import os
+import time
+
+import pytest
+from fastapi import UploadFile
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import packages.backend.models.change  # noqa: F401  リレーション解決のため
+import packages.backend.utils.attachment_storage as attachment_storage_module
+from packages.backend.database import Base
+from packages.backend.models.incident import Attachment
+from packages.backend.utils.attachment_storage import (
+    AttachmentStorage,
+    AttachmentTooLarge,
+    safe_filename,
+    sweep_periodically,
+)
+
+
+def _upload(data: bytes, filename="log.tar.gz"):
+    return UploadFile(file=io.BytesIO(data), filename=filename)
+
+
+def _blobs(root):
+    return sorted(p.name for p in root.rglob("*") if p.is_file())
+
+
+def test_save_upload_streams_hash_and_size(tmp_path):
+    storage = AttachmentStorage(root=str(tmp_path), max_bytes=1024, chunk_size=100)
+    data = bytes(range(256)) * 3
+
+    stored = asyncio.run(storage.save_upload(_upload(data)))
+
+    sha256 = hashlib.sha256(data).hexdigest()
+    assert (stored.size, stored.sha256) == (len(data), sha256)
+    assert stored.path == str(tmp_path / sha256[:2] / sha256[2:4] / sha256)
+    assert open(stored.path, "rb").read() == data
+    assert _blobs(tmp_path) == [sha256]
+
+
+def test_oversized_upload_is_aborted_without_leftovers(tmp_path):
+    storage = AttachmentStorage(root=str(tmp_path), max_bytes=500, chunk_size=100)
+
+    with pytest.raises(AttachmentTooLarge):
+        asyncio.run(storage.save_upload(_upload(b"x" * 501)))
+    assert _blobs(tmp_path) == []
+
+
+def test_identical_content_shares_one_blob(tmp_path):
+    storage = AttachmentStorage(root=str(tmp_path), chunk_size=7)
+
+    first = storage.save_stream(io.BytesIO(b"same content"))
+    second = asyncio.run(storage.save_upload(_upload(b"same content", "copy.txt")))
+
+    assert not first.deduplicated and second.deduplicated
+    assert first.path == second.path
+    assert _blobs(tmp_path) == [first.sha256]
+
+
+def test_save_stream_enforces_limit(tmp_path):
+    storage = AttachmentStorage(root=str(tmp_path), max_bytes=10, chunk_size=4)
+    with pytest.raises(AttachmentTooLarge):
+        storage.save_stream(io.BytesIO(b"x" * 11))
+    assert _blobs(tmp_path) == []
+
+
+def test_declared_size_is_rejected_up_front():
+    storage = AttachmentStorage(max_bytes=10)
+    with pytest.raises(AttachmentTooLarge):
+        storage.check_declared_size(11)
+    storage.check_declared_size(None)
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    [
+        ("../../etc/passwd", "passwd"),
+        ("..\\windows\\system.ini", "system.ini"),
+        ("障害ログ.txt", "障害ログ.txt"),
+        (".env", "env"),
+        ("", "attachment"),
+        (None, "attachment"),
+    ],
+)
+def test_safe_filename(name, expected):
+    assert safe_filename(name) == expected
+
+
+@pytest.fixture
+def gc_storage(tmp_path, monkeypatch):
+    # 猶予 0 秒で、参照がなくなった実体を即座に回収する
+    storage = AttachmentStorage(root=str(tmp_path), gc_grace=-1)
+    monkeypatch.setattr(attachment_storage_module, "attachment_storage", storage)
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield storage, session
+    session.close()
+
+
+def _attach(session, stored):
+    attachment = Attachment(
+        filename="a.txt",
+        filepath=stored.path,
+        content_hash=stored.sha256,
+        uploaded_by_id=1,
+    )
+    session.add(attachment)
+    session.commit()
+    return attachment
+
+
+def test_blob_is_collected_when_last_reference_is_deleted(gc_storage):
+    storage, session = gc_storage
+    first = _attach(session, storage.save_stream(io.BytesIO(b"shared")))
+    second = _attach(session, storage.save_stream(io.BytesIO(b"shared")))
+
+    session.delete(first)
+    session.commit()
+    assert storage.has_blob(second.content_hash)
+
+    session.delete(second)
+    session.commit()
+    assert not storage.has_blob(second.content_hash)
+
+
+def test_rollback_keeps_blob(gc_storage):
+    storage, session = gc_storage
+    attachment = _attach(session, storage.save_stream(io.BytesIO(b"keep")))
+
+    session.delete(attachment)
+    session.flush()
+    session.rollback()
+    assert storage.has_blob(attachment.content_hash)
+
+
+def test_recently_reused_blob_survives_collection(gc_storage):
+    storage, session = gc_storage
+    storage.gc_grace = 300
+    attachment = _attach(session, storage.save_stream(io.BytesIO(b"busy")))
+
+    session.delete(attachment)
+    session.commit()
+    assert storage.has_blob(attachment.content_hash)
+
+
+def test_sweep_removes_unreferenced_blobs(gc_storage):
+    storage, session = gc_storage
+    kept = _attach(session, storage.save_stream(io.BytesIO(b"kept")))
+    orphan = storage.save_stream(io.BytesIO(b"orphan"))
+
+    assert storage.sweep(session) == 1
+    assert storage.has_blob(kept.content_hash)
+    assert not storage.has_blob(orphan.sha256)
+
+
+def test_blob_kept_within_grace_is_swept_afterwards(gc_storage):
+    storage, session = gc_storage
+    storage.gc_grace = 300
+    attachment = _attach(session, storage.save_stream(io.BytesIO(b"late")))
+    session.delete(attachment)
+    session.commit()
+
+    # 猶予期間内はコミット時にも定期回収でも残す
+    assert storage.sweep(session) == 0
+    assert storage.has_blob(attachment.content_hash)
+
+    expired = time.time() - 301
+    os.utime(storage.blob_path(attachment.content_hash), (expired, expired))
+    assert storage.sweep(session) == 1
+    assert not storage.has_blob(attachment.content_hash)
+
+
+def test_periodic_sweep_collects_orphans(tmp_path, monkeypatch):
+    storage = AttachmentStorage(root=str(tmp_path / "blobs"), gc_grace=-1)
+    monkeypatch.setattr(attachment_storage_module, "attachment_storage", storage)
+    engine = create_engine(f"sqlite:///{tmp_path / 'gc.db'}")
+    Base.metadata.create_all(bind=engine)
+    orphan = storage.save_stream(io.BytesIO(b"orphan"))
+
+    async def scenario():
+        task = asyncio.create_task(sweep_periodically(sessionmaker(bind=engine), 0.01))
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if not storage.has_blob(orphan.sha256):
+                break
+        task.cancel()
+
+    asyncio.run(scenario())
+    engine.dispose()
+    assert not storage.has_blob(orphan.sha256)
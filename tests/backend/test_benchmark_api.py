@@ -0,0 +1,88 @@
+import pytest
+
+from packages.backend.benchmark_api import (
+    SCENARIOS,
+    BenchContext,
+    compare,
+    percentile,
+    summarize,
+)
+
+
+def _result(**scenarios):
+    return {"scenarios": scenarios}
+
+
+def _stats(p50=10.0, p95=20.0, p99=30.0, rps=100.0, errors=0):
+    return {
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "rps": rps,
+        "errors": errors,
+        "status_codes": {"200": 10 - errors, "500": errors} if errors else {"200": 10},
+    }
+
+
+def test_percentile_interpolates():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == pytest.approx(50.5)
+    assert percentile(values, 99) == pytest.approx(99.01)
+    assert percentile([], 95) == 0.0
+    assert percentile([3.0], 99) == 3.0
+
+
+def test_summarize_reports_latency_throughput_and_errors():
+    summary = summarize([0.001, 0.002, 0.003, 0.004], [200, 200, 404, 500], 0.5)
+
+    assert summary["requests"] == 4
+    assert summary["errors"] == 2
+    assert summary["error_rate"] == 0.5
+    assert summary["status_codes"] == {"200": 2, "404": 1, "500": 1}
+    assert summary["p50_ms"] == pytest.approx(2.5)
+    assert summary["max_ms"] == pytest.approx(4.0)
+    assert summary["rps"] == 8.0
+
+
+def test_compare_flags_latency_throughput_and_error_regressions():
+    baseline = _result(a=_stats(), b=_stats(), c=_stats())
+    current = _result(
+        a=_stats(p95=30.0),
+        b=_stats(rps=50.0),
+        c=_stats(errors=1),
+        new=_stats(p95=1000.0),
+    )
+
+    regressions = compare(current, baseline, tolerance=0.2)
+    assert [line.split(":")[0] for line in regressions] == ["a", "b", "c"]
+    assert "p95_ms 20.00 -> 30.00" in regressions[0]
+    assert "1 error responses" in regressions[2]
+
+
+def test_compare_fails_on_errors_even_without_baseline():
+    baseline = _result(a=_stats(errors=2))
+    current = _result(a=_stats(errors=2), new=_stats(errors=1))
+
+    assert [line.split(":")[0] for line in compare(current, baseline)] == ["a", "new"]
+
+
+def test_compare_ignores_noise_below_thresholds():
+    baseline = _result(a=_stats(p50=1.0, p95=2.0, p99=3.0))
+    current = _result(a=_stats(p50=1.5, p95=2.1, p99=3.9, rps=90.0))
+
+    # p50 は 50% 増だが 1ms 未満、p95 は 20% 未満
+    assert compare(current, baseline, tolerance=0.2, min_delta_ms=1.0) == []
+
+
+def test_scenarios_cover_read_and_write_endpoints():
+    names = {scenario.name for scenario in SCENARIOS}
+    for resource in ("incidents", "problems", "changes", "users"):
+        assert {f"{resource}.list", f"{resource}.detail"} <= names
+        assert {f"{resource}.create", f"{resource}.update"} <= names
+    assert {"auth.login", "auth.me"} <= names
+
+    ctx = BenchContext({"incidents": range(5, 10)}, user_id=1, seed=0)
+    detail = next(s for s in SCENARIOS if s.name == "incidents.detail")
+    assert 5 <= int(detail.path(ctx).rsplit("/", 1)[1]) < 10
+    assert ctx.unique() != ctx.unique()
+
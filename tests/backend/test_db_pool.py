@@ -0,0 +1,122 @@
+import threading
+
+import pytest
+from sqlalchemy import create_engine, event, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+import packages.backend.models.change  # noqa: F401  リレーション解決のため
+from packages.backend.database import Base
+from packages.backend.db_pool import (
+    POOL_CHECKOUT_WAIT,
+    RoutingSession,
+    TimedQueuePool,
+    is_file_sqlite,
+    label_pool,
+    set_sqlite_pragma,
+    set_sqlite_reader_pragma,
+)
+from packages.backend.models.user import User
+
+
+@pytest.fixture
+def engines(tmp_path):
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    args = {"connect_args": {"check_same_thread": False}, "poolclass": TimedQueuePool}
+    writer = label_pool(
+        create_engine(url, pool_size=1, max_overflow=0, **args), "test_writer"
+    )
+    reader = label_pool(
+        create_engine(url, pool_size=3, max_overflow=0, **args), "test_reader"
+    )
+    event.listen(writer, "connect", set_sqlite_pragma)
+    event.listen(reader, "connect", set_sqlite_reader_pragma)
+    Base.metadata.create_all(bind=writer)
+    yield writer, reader
+    writer.dispose()
+    reader.dispose()
+
+
+def _track(engine):
+    statements = []
+    event.listen(
+        engine, "before_cursor_execute", lambda *args: statements.append(args[2])
+    )
+    return statements
+
+
+def test_is_file_sqlite():
+    assert is_file_sqlite("sqlite:///./itsm.db")
+    assert not is_file_sqlite("sqlite://")
+    assert not is_file_sqlite("sqlite:///:memory:")
+    assert not is_file_sqlite("postgresql://localhost/itsm")
+
+
+def test_reads_use_reader_until_first_write(engines):
+    writer, reader = engines
+    on_writer, on_reader = _track(writer), _track(reader)
+    session = sessionmaker(class_=RoutingSession, bind=writer, reader=reader)()
+
+    session.execute(select(User)).all()
+    assert len(on_reader) == 1 and not on_writer
+
+    session.add(User(username="alice", email="alice@example.com", password_hash="x"))
+    session.flush()
+    # 書き込み後は同じトランザクション内の読み取りも書き込み接続を使う
+    assert session.scalar(select(User.username)) == "alice"
+    assert len(on_reader) == 1
+    session.commit()
+
+    session.execute(select(User)).all()
+    assert len(on_reader) == 2
+    session.close()
+
+
+def test_reader_connections_refuse_writes(engines):
+    _, reader = engines
+    with reader.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("DELETE FROM users"))
+
+
+def test_readers_run_while_writer_holds_a_transaction(engines):
+    writer, reader = engines
+    factory = sessionmaker(class_=RoutingSession, bind=writer, reader=reader)
+
+    holder = factory()
+    holder.add(User(username="bob", email="bob@example.com", password_hash="x"))
+    holder.flush()  # 書き込み接続を保持したまま
+
+    counts = []
+
+    def read():
+        session = factory()
+        counts.append(session.scalar(select(User.id).limit(1)))
+        session.close()
+
+    threads = [threading.Thread(target=read) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    # 未コミットの行は見えないが、書き込みの完了を待たずに読める
+    assert counts == [None, None, None]
+    holder.rollback()
+    holder.close()
+
+
+def _checkouts(label):
+    return sum(
+        sample.value
+        for sample in POOL_CHECKOUT_WAIT.collect()[0].samples
+        if sample.name.endswith("_count") and sample.labels["pool"] == label
+    )
+
+
+def test_checkout_wait_is_recorded(engines):
+    _, reader = engines
+    before = _checkouts("test_reader")
+    with reader.connect():
+        pass
+    assert _checkouts("test_reader") == before + 1
@@ -0,0 +1,160 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from packages.backend.database import Base
+from packages.backend.models.change import (
+    Change,
+    ChangeComment,
+    ChangePriority,
+    ChangeStatus,
+    ChangeTask,
+)
+from packages.backend.models.incident import (
+    Attachment,
+    Comment,
+    Incident,
+    IncidentPriority,
+    IncidentStatus,
+)
+from packages.backend.models.loading import DETAIL, LIST, loading_options
+from packages.backend.models.user import User
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+
+    users = [
+        User(username=f"user{i}", email=f"user{i}@example.com", password_hash="x")
+        for i in range(4)
+    ]
+    incident_status = IncidentStatus(name="new")
+    incident_priority = IncidentPriority(name="high")
+    change_status = ChangeStatus(name="draft")
+    change_priority = ChangePriority(name="low")
+    session.add_all(users + [incident_status, incident_priority])
+    session.add_all([change_status, change_priority])
+    session.flush()
+
+    for i in range(20):
+        incident = Incident(
+            title=f"Incident {i}",
+            description="test",
+            status=incident_status,
+            priority=incident_priority,
+            reporter=users[i % 4],
+            assignee=users[(i + 1) % 4],
+        )
+        incident.comments = [
+            Comment(content="c", user=users[j % 4]) for j in range(i % 3)
+        ]
+        incident.attachments = [
+            Attachment(filename="a.txt", filepath="/tmp/a.txt", uploaded_by=users[0])
+            for _ in range(i % 2)
+        ]
+        session.add(incident)
+
+        change = Change(
+            change_number=f"CHG-{i:04d}",
+            title=f"Change {i}",
+            description="test",
+            status=change_status,
+            priority=change_priority,
+            requester=users[i % 4],
+            assignee=users[(i + 2) % 4],
+            approver=users[(i + 3) % 4],
+        )
+        change.tasks = [ChangeTask(title="t", assignee=users[1])]
+        change.comments = [ChangeComment(content="c", user=users[2])]
+        session.add(change)
+    session.commit()
+    session.expunge_all()
+
+    statements = []
+    event.listen(
+        engine, "before_cursor_execute", lambda *args: statements.append(args[2])
+    )
+    session.statements = statements
+    yield session
+    session.close()
+
+
+def _queries_for(db, model, profile, limit, include_details=False):
+    db.expunge_all()
+    db.statements.clear()
+    rows = db.query(model).options(*loading_options(model, profile)).limit(limit)
+    data = [row.to_dict(include_details=include_details) for row in rows]
+    return len(db.statements), data
+
+
+@pytest.mark.parametrize(
+    "model, profile, include_details",
+    [
+        (Incident, LIST, False),
+        (Incident, DETAIL, True),
+        (Change, LIST, False),
+        (Change, DETAIL, True),
+    ],
+)
+def test_query_count_does_not_grow_with_page_size(db, model, profile, include_details):
+    small, _ = _queries_for(db, model, profile, 2, include_details)
+    large, _ = _queries_for(db, model, profile, 20, include_details)
+    assert small == large
+
+
+def test_list_profile_counts_children_in_sql(db):
+    count, data = _queries_for(db, Incident, LIST, 20)
+    assert count == 1
+    by_title = {row["title"]: row for row in data}
+    assert by_title["Incident 5"]["comments_count"] == 2
+    assert by_title["Incident 5"]["attachments_count"] == 1
+    assert by_title["Incident 6"]["comments_count"] == 0
+    assert by_title["Incident 6"]["reporter"] == "user2"
+
+
+def test_to_dict_without_profile_still_counts(db):
+    incident = db.query(Incident).filter_by(title="Incident 4").one()
+    data = incident.to_dict()
+    assert (data["comments_count"], data["attachments_count"]) == (1, 0)
+
+
+def test_single_object_fetches_use_detail_profile(tmp_path):
+    from packages.backend.main import get_or_404, save
+
+    url = tmp_path / "detail.db"
+    sync_engine = create_engine(f"sqlite:///{url}")
+    Base.metadata.create_all(bind=sync_engine)
+    with sessionmaker(bind=sync_engine)() as session:
+        user = User(username="alice", email="alice@example.com", password_hash="x")
+        incident = Incident(
+            title="t",
+            description="d",
+            status=IncidentStatus(name="new"),
+            priority=IncidentPriority(name="high"),
+            reporter=user,
+        )
+        incident.comments = [Comment(content="c", user=user)]
+        session.add(incident)
+        session.commit()
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{url}")
+
+    async def scenario():
+        async with async_sessionmaker(bind=engine, expire_on_commit=False)() as db:
+            fetched = await get_or_404(db, Incident, 1, "not found")
+            fetched.title = "updated"
+            saved = await save(db, fetched)
+        await engine.dispose()
+        return fetched, saved
+
+    for obj in asyncio.run(scenario()):
+        # 詳細プロファイルのコレクションが読み込み済み（非同期セッションで遅延ロードしない）
+        loaded = inspect(obj).dict
+        assert [comment.user.username for comment in loaded["comments"]] == ["alice"]
+        assert loaded["attachments"] == []
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from packages.backend.database import Base
+from packages.backend.models.change import Change
+from packages.backend.models.incident import Incident
+from packages.backend.models.problem import Problem
+from packages.backend.models.user import User
+from packages.backend.utils.pagination import decode_cursor, encode_cursor, paginate
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    base = datetime(2025, 1, 1)
+    for i in range(25):
+        session.add(
+            Incident(
+                title=f"Incident {i}",
+                description="test",
+                status_id=1,
+                priority_id=1,
+                reporter_id=1,
+                # 同一時刻の行を混ぜて id によるタイブレークを確認する
+                created_at=base + timedelta(minutes=i // 2),
+            )
+        )
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2025, 5, 1, 12, 30, 15, 123456)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor("not-a-cursor")
+    assert exc_info.value.status_code == 400
+
+
+def test_keyset_walks_all_rows_without_duplicates(db):
+    seen = []
+    cursor = ""
+    while cursor is not None:
+        page = paginate(db.query(Incident), Incident, limit=10, cursor=cursor)
+        seen.extend(row.id for row in page["items"])
+        cursor = page["next_cursor"]
+        assert page["page"] is None
+
+    assert len(seen) == 25
+    assert len(set(seen)) == 25
+    rows = {row.id: row for row in db.query(Incident).all()}
+    keys = [(rows[row_id].created_at, row_id) for row_id in seen]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_offset_mode_is_unchanged(db):
+    page = paginate(db.query(Incident), Incident, skip=20, limit=10, total=25)
+    assert page["page"] == 3
+    assert page["pages"] == 3
+    assert page["total"] == 25
+    assert len(page["items"]) == 5
+    assert page["next_cursor"] is None
+
+
+@pytest.mark.parametrize("model", [Incident, Problem, Change, User])
+def test_keyset_models_require_created_at(model):
+    # NULL の created_at は created_at < カーソル値 に一致せず、一覧から漏れる
+    assert model.__table__.c.created_at.nullable is False
+
+
+def test_null_created_at_is_rejected(db):
+    with pytest.raises(IntegrityError):
+        db.execute(
+            Incident.__table__.insert().values(
+                title="no timestamp",
+                description="test",
+                status_id=1,
+                priority_id=1,
+                reporter_id=1,
+                created_at=None,
+            )
+        )
+    db.rollback()
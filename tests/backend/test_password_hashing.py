@@ -0,0 +1,49 @@
+import asyncio
+import threading
+
+import pytest
+
+from packages.backend.utils.auth import get_password_hash, password_needs_rehash
+from packages.backend.utils.password_hashing import PasswordHasher, PasswordHasherBusy
+
+
+def test_jobs_run_off_the_event_loop_thread():
+    hasher = PasswordHasher(workers=2, max_queue=0)
+
+    async def main():
+        return await hasher.run("test", lambda: threading.current_thread().name)
+
+    try:
+        assert asyncio.run(main()).startswith("password-hash")
+    finally:
+        hasher.shutdown()
+
+
+def test_full_queue_is_rejected():
+    hasher = PasswordHasher(workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def main():
+        running = [
+            asyncio.ensure_future(hasher.run("test", release.wait)) for _ in range(2)
+        ]
+        await asyncio.sleep(0.05)
+        assert hasher.queue_depth == 1
+        with pytest.raises(PasswordHasherBusy):
+            await hasher.run("test", release.wait)
+        release.set()
+        await asyncio.gather(*running)
+        assert hasher.queue_depth == 0
+
+    try:
+        asyncio.run(main())
+    finally:
+        release.set()
+        hasher.shutdown()
+
+
+def test_rehash_detection_follows_work_factor():
+    current = get_password_hash("secret")
+    assert not password_needs_rehash(current)
+    assert password_needs_rehash("$2b$04$" + current.split("$")[3])
+    assert password_needs_rehash("not-a-bcrypt-hash")
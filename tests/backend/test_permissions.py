@@ -0,0 +1,70 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import packages.backend.models.change  # noqa: F401  リレーション解決のため
+from packages.backend.database import Base
+from packages.backend.models.user import Permission, Role, User
+from packages.backend.utils.permissions import BitRegistry, permission_registry
+from packages.backend.utils.principal_cache import Principal
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    read = Permission(code="incident:read", name="閲覧")
+    write = Permission(code="incident:write", name="編集")
+    operator = Role(name="operator", permissions=[read, write])
+    auditor = Role(name="auditor", permissions=[read])
+    session.add(
+        User(
+            username="bob", email="bob@example.com", password_hash="x", roles=[operator]
+        )
+    )
+    session.add(
+        User(
+            username="eve", email="eve@example.com", password_hash="x", roles=[auditor]
+        )
+    )
+    session.commit()
+    permission_registry.load(session)
+    yield session
+    session.close()
+    permission_registry.invalidate_roles()
+
+
+def test_bit_registry_assigns_stable_positions():
+    registry = BitRegistry()
+    a, b = registry.bit("a"), registry.bit("b")
+    assert (a, b) == (1, 2)
+    assert registry.bit("a") == a
+    assert registry.mask_for(["a", "b"]) == 3
+    assert registry.names_for(3) == ["a", "b"]
+
+
+def test_user_has_permission_uses_role_masks(db):
+    bob = db.query(User).filter_by(username="bob").one()
+    eve = db.query(User).filter_by(username="eve").one()
+    assert bob.has_permission("incident:write")
+    assert eve.has_permission("incident:read")
+    assert not eve.has_permission("incident:write")
+    assert not eve.has_permission("unknown:code")
+
+
+def test_principal_checks_are_mask_based(db):
+    principal = Principal.from_user(db.query(User).filter_by(username="eve").one())
+    assert principal.has_role("auditor")
+    assert not principal.has_role("operator")
+    assert principal.permissions == frozenset({"incident:read"})
+
+
+def test_role_change_recomputes_mask(db):
+    eve = db.query(User).filter_by(username="eve").one()
+    auditor = db.query(Role).filter_by(name="auditor").one()
+    auditor.permissions.append(
+        db.query(Permission).filter_by(code="incident:write").one()
+    )
+    db.commit()
+    assert eve.has_permission("incident:write")
@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import packages.backend.models.change  # noqa: F401  リレーション解決のため
+from packages.backend.database import Base
+from packages.backend.models.user import Permission, Role, User
+from packages.backend.utils.principal_cache import (
+    Principal,
+    PrincipalCache,
+    principal_cache,
+)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    role = Role(name="operator")
+    role.permissions.append(Permission(code="incident:read", name="閲覧"))
+    user = User(username="alice", email="alice@example.com", password_hash="x")
+    user.roles.append(role)
+    session.add(user)
+    session.commit()
+    principal_cache.clear()
+    yield session
+    session.close()
+    principal_cache.clear()
+
+
+def _cache(db, username="alice"):
+    user = db.query(User).filter_by(username=username).one()
+    principal_cache.put(username, Principal.from_user(user))
+    return user
+
+
+def test_principal_carries_roles_and_permissions(db):
+    principal = Principal.from_user(_cache(db))
+    assert principal.has_role("operator")
+    assert principal.has_permission("incident:read")
+    assert not principal.has_permission("incident:delete")
+
+
+def test_lru_eviction_and_ttl():
+    cache = PrincipalCache(maxsize=2, ttl=60)
+    entries = {
+        name: Principal(
+            i, name, f"{name}@x", None, None, None, None, True, frozenset(), 0, 0
+        )
+        for i, name in enumerate(["a", "b", "c"])
+    }
+    cache.put("a", entries["a"])
+    cache.put("b", entries["b"])
+    assert cache.get("a") is entries["a"]  # a を最近使用に
+    cache.put("c", entries["c"])
+    assert cache.get("b") is None
+    assert cache.get("a") is entries["a"]
+
+    expired = PrincipalCache(maxsize=2, ttl=0)
+    expired.put("a", entries["a"])
+    assert expired.get("a") is None
+
+
+def test_profile_update_invalidates_user(db):
+    user = _cache(db)
+    user.is_active = False
+    db.commit()
+    assert principal_cache.get("alice") is None
+
+
+def test_unrelated_update_keeps_entry(db):
+    user = _cache(db)
+    user.failed_login_attempts = 3
+    db.commit()
+    assert principal_cache.get("alice") is not None
+
+
+def test_role_permission_change_clears_cache(db):
+    _cache(db)
+    role = db.query(Role).filter_by(name="operator").one()
+    role.permissions.append(Permission(code="incident:write", name="編集"))
+    db.commit()
+    assert principal_cache.get("alice") is None
@@ -0,0 +1,92 @@
+import asyncio
+
+from sqlalchemy import event, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import packages.backend.models.change  # noqa: F401  リレーション解決のため
+from packages.backend.database import Base
+from packages.backend.models.incident import Incident
+from packages.backend.models.problem import Problem, ProblemIncidentLink
+from packages.backend.utils.problem_links import sync_incident_links
+
+
+def _run(tmp_path, scenario):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'links.db'}")
+    factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    statements = []
+
+    async def main():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            ticket = {"description": "d", "status_id": 1, "priority_id": 1}
+            await conn.execute(
+                insert(Incident),
+                [
+                    {"id": i, "title": f"i{i}", "reporter_id": 1, **ticket}
+                    for i in range(1, 5)
+                ],
+            )
+            await conn.execute(
+                insert(Problem), [{"id": 1, "title": "p", "reporter_id": 1, **ticket}]
+            )
+            await conn.execute(
+                insert(ProblemIncidentLink),
+                [
+                    {"problem_id": 1, "incident_id": 1},
+                    {"problem_id": 1, "incident_id": 2},
+                ],
+            )
+
+        event.listen(
+            engine.sync_engine,
+            "before_cursor_execute",
+            lambda conn, cursor, statement, *args: statements.append(statement),
+        )
+        async with factory() as db:
+            missing = await scenario(db)
+            executed = list(statements)
+            await db.commit()
+            links = set(
+                await db.execute(
+                    select(
+                        ProblemIncidentLink.problem_id, ProblemIncidentLink.incident_id
+                    )
+                )
+            )
+        await engine.dispose()
+        return missing, links, executed
+
+    return asyncio.run(main())
+
+
+def test_sync_replaces_links_with_batched_statements(tmp_path):
+    missing, links, statements = _run(
+        tmp_path, lambda db: sync_incident_links(db, 1, [2, 3, 4, 99, 3])
+    )
+
+    assert missing == [99]
+    assert links == {(1, 2), (1, 3), (1, 4)}
+    # 存在確認・既存リンク取得・差分の DELETE・一括 INSERT の4文（件数に依存しない）
+    kinds = [statement.split()[0].upper() for statement in statements]
+    assert kinds == ["SELECT", "SELECT", "DELETE", "INSERT"]
+    assert "IN (" in statements[0]
+
+
+def test_unchanged_links_are_only_read(tmp_path):
+    missing, links, statements = _run(
+        tmp_path, lambda db: sync_incident_links(db, 1, [1, 2])
+    )
+
+    assert missing == []
+    assert links == {(1, 1), (1, 2)}
+    assert [s.split()[0].upper() for s in statements] == ["SELECT", "SELECT"]
+
+
+def test_new_problem_skips_existing_lookup(tmp_path):
+    missing, links, statements = _run(
+        tmp_path, lambda db: sync_incident_links(db, 2, [1, 3], existing=set())
+    )
+
+    assert missing == []
+    assert {(2, 1), (2, 3)} <= links
+    assert [s.split()[0].upper() for s in statements] == ["SELECT", "INSERT"]
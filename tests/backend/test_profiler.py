@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+
+from packages.backend.middleware.profiling import _wants_profile
+from packages.backend.utils.profiler import (
+    ProfileFormat,
+    ProfilerBusy,
+    ProfileStore,
+    SamplingProfiler,
+    render,
+    start_exclusive,
+    stop_exclusive,
+)
+
+
+def busy_loop_for_profiler_test(stop):
+    while not stop.is_set():
+        sum(range(100))
+
+
+@pytest.fixture
+def busy_thread():
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=busy_loop_for_profiler_test, args=(stop,), name="busy"
+    )
+    thread.start()
+    yield thread
+    stop.set()
+    thread.join()
+
+
+def _profile(seconds=0.1):
+    with SamplingProfiler(interval=0.002) as profiler:
+        time.sleep(seconds)
+    return profiler
+
+
+def test_collapsed_stacks_include_sampled_functions(busy_thread):
+    profiler = _profile()
+
+    assert profiler.samples > 0
+    busy = [
+        line
+        for line in profiler.collapsed().splitlines()
+        if line.startswith("thread:busy;")
+    ]
+    assert busy
+    assert all("busy_loop_for_profiler_test (test_profiler.py:" in l for l in busy)
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in busy) <= profiler.samples
+    # サンプラー自身のスレッドは含めない
+    assert "sampling-profiler" not in profiler.collapsed()
+
+
+def test_speedscope_profile_references_shared_frames(busy_thread):
+    profiler = _profile()
+    document = render(profiler, ProfileFormat.SPEEDSCOPE, "test")
+
+    frames = document["shared"]["frames"]
+    [profile] = document["profiles"]
+    assert profile["type"] == "sampled"
+    assert len(profile["samples"]) == len(profile["weights"])
+    assert all(0 <= i < len(frames) for sample in profile["samples"] for i in sample)
+    assert any(f["name"] == "busy_loop_for_profiler_test" for f in frames)
+    assert profile["endValue"] == pytest.approx(sum(profile["weights"]))
+
+
+def test_only_one_exclusive_profile_at_a_time():
+    profiler = start_exclusive(0.01)
+    try:
+        with pytest.raises(ProfilerBusy):
+            start_exclusive(0.01)
+    finally:
+        stop_exclusive(profiler)
+    stop_exclusive(start_exclusive(0.01))
+
+
+def test_profile_store_evicts_oldest():
+    store = ProfileStore(maxsize=2)
+    profiles = [SamplingProfiler() for _ in range(3)]
+    for i, profiler in enumerate(profiles):
+        store.add(str(i), profiler)
+
+    assert store.get("0") is None
+    assert store.get("2") is profiles[2]
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        (b"profile=1", True),
+        (b"a=1&profile=true", True),
+        (b"profile=0", False),
+        (b"", False),
+    ],
+)
+def test_profile_query_flag(query, expected):
+    assert _wants_profile({"query_string": query}) is expected
@@ -0,0 +1,84 @@
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from packages.backend.middleware.query_metrics import (
+    REQUEST_QUERY_COUNT,
+    QueryMetricsMiddleware,
+    current_query_stats,
+    instrument_engine,
+)
+
+
+@pytest.fixture
+def engine():
+    engine = instrument_engine(create_engine("sqlite:///:memory:"))
+    # 二重登録しても1回しか数えない
+    instrument_engine(engine)
+    return engine
+
+
+@pytest.fixture
+def client(engine):
+    app = FastAPI()
+    app.add_middleware(QueryMetricsMiddleware, n_plus_one_threshold=5)
+
+    @app.get("/items/{item_id}")
+    def read_item(item_id: int, n: int = 1):
+        with engine.connect() as conn:
+            for i in range(n):
+                conn.execute(text("SELECT :i"), {"i": i})
+        return {"id": item_id}
+
+    @app.get("/none")
+    async def no_queries():
+        return {"stats": current_query_stats() is not None}
+
+    return TestClient(app)
+
+
+def _sample(method, route):
+    return REQUEST_QUERY_COUNT.labels(method=method, route=route)._sum.get()
+
+
+def test_server_timing_reports_queries(client):
+    response = client.get("/items/1", params={"n": 3})
+
+    timing = response.headers["server-timing"]
+    assert 'desc="3 queries"' in timing
+    assert "db-slowest;dur=" in timing
+
+
+def test_requests_without_queries_are_measured(client):
+    response = client.get("/none")
+    assert response.json() == {"stats": True}
+    assert 'db;dur=0.0;desc="0 queries"' == response.headers["server-timing"]
+
+
+def test_histograms_use_route_template(client):
+    before = _sample("GET", "/items/{item_id}")
+    client.get("/items/1", params={"n": 2})
+    client.get("/items/2", params={"n": 2})
+
+    assert _sample("GET", "/items/{item_id}") - before == 4
+
+
+def test_repeated_statements_are_logged(client, caplog):
+    with caplog.at_level(logging.WARNING, "packages.backend.middleware.query_metrics"):
+        client.get("/items/1", params={"n": 4})
+        assert caplog.records == []
+        client.get("/items/1", params={"n": 6})
+
+    [record] = caplog.records
+    assert "N+1" in record.getMessage()
+    assert "/items/{item_id}" in record.getMessage()
+    assert "SELECT ?" in record.getMessage()
+
+
+def test_queries_outside_requests_are_ignored(engine):
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert current_query_stats() is None
@@ -0,0 +1,198 @@
+"""
+一覧・詳細クエリの実行計画チェック
+シード済みの DB で実際に発行される SQL を EXPLAIN QUERY PLAN にかけ、
+テーブル全体の走査（インデックスを使わない SCAN）や並べ替え用の一時 B-tree があれば失敗させる
+"""
+
+import re
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from packages.backend.database import Base
+from packages.backend.models.change import (
+    Change,
+    ChangeComment,
+    ChangePriority,
+    ChangeStatus,
+    ChangeTask,
+)
+from packages.backend.models.incident import (
+    Attachment,
+    Comment,
+    Incident,
+    IncidentPriority,
+    IncidentStatus,
+)
+from packages.backend.models.loading import DETAIL, loading_options
+from packages.backend.models.problem import (
+    Problem,
+    ProblemCategory,
+    ProblemIncidentLink,
+    ProblemPriority,
+    ProblemStatus,
+    RootCauseAnalysis,
+    Workaround,
+)
+from packages.backend.models.user import User
+from packages.backend.utils.pagination import paginate
+
+# 一覧 API の絞り込み条件（main.py / routes/problems.py / Flask routes/incidents.py）
+HOT_FILTERS = [
+    (Incident, "status_id"),
+    (Incident, "priority_id"),
+    (Incident, "assignee_id"),
+    (Problem, "status_id"),
+    (Problem, "priority_id"),
+    (Problem, "category_id"),
+    (Problem, "assignee_id"),
+    (Problem, "reporter_id"),
+    (Change, "status_id"),
+    (Change, "priority_id"),
+    (Change, "assignee_id"),
+]
+
+_FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+
+@pytest.fixture(scope="module")
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+
+    users = [
+        User(username=f"user{i}", email=f"user{i}@example.com", password_hash="x")
+        for i in range(20)
+    ]
+    lookups = [
+        [IncidentStatus(name=f"is{i}") for i in range(4)],
+        [IncidentPriority(name=f"ip{i}") for i in range(4)],
+        [ProblemStatus(name=f"ps{i}") for i in range(4)],
+        [ProblemPriority(name=f"pp{i}") for i in range(4)],
+        [ProblemCategory(name=f"pc{i}") for i in range(4)],
+        [ChangeStatus(name=f"cs{i}") for i in range(4)],
+        [ChangePriority(name=f"cp{i}") for i in range(4)],
+    ]
+    session.add_all(users)
+    for rows in lookups:
+        session.add_all(rows)
+    session.flush()
+
+    start = datetime(2024, 1, 1)
+    for i in range(400):
+        created = start + timedelta(minutes=i)
+        user = users[i % 20]
+        incident = Incident(
+            title=f"incident {i}",
+            description="d",
+            status_id=i % 4 + 1,
+            priority_id=i % 3 + 1,
+            reporter=user,
+            assignee=users[(i + 1) % 20],
+            created_at=created,
+        )
+        incident.comments = [Comment(content="c", user=user) for _ in range(2)]
+        incident.attachments = [
+            Attachment(filename="a", filepath="/tmp/a", uploaded_by=user)
+        ]
+        problem = Problem(
+            title=f"problem {i}",
+            description="d",
+            status_id=i % 4 + 1,
+            priority_id=i % 3 + 1,
+            category_id=i % 4 + 1,
+            reporter=user,
+            assignee=users[(i + 2) % 20],
+            created_at=created,
+        )
+        problem.comments = [Comment(content="c", user=user)]
+        problem.root_cause_analyses = [RootCauseAnalysis(description="r")]
+        problem.workarounds = [Workaround(description="w")]
+        problem.incident_links = [ProblemIncidentLink(incident=incident)]
+        change = Change(
+            change_number=f"CHG-{i:05d}",
+            title=f"change {i}",
+            description="d",
+            status_id=i % 4 + 1,
+            priority_id=i % 3 + 1,
+            requester=user,
+            assignee=users[(i + 3) % 20],
+            created_at=created,
+        )
+        change.tasks = [ChangeTask(title="t")]
+        change.comments = [ChangeComment(content="c", user=user)]
+        session.add_all([incident, problem, change])
+    session.commit()
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    session.expunge_all()
+    session.engine = engine
+    yield session
+    session.close()
+
+
+@contextmanager
+def captured_statements(engine):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+def plan_problems(engine, statements):
+    """実行計画のうち、全件走査または並べ替え用の一時 B-tree を使う行"""
+    problems = []
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            for detail in (row[3] for row in rows):
+                if _FULL_SCAN.match(detail) or "TEMP B-TREE FOR ORDER BY" in detail:
+                    problems.append(f"{detail}\n    in: {statement.splitlines()[0]}")
+    return problems
+
+
+@pytest.mark.parametrize(
+    "model, column", HOT_FILTERS, ids=[f"{m.__tablename__}.{c}" for m, c in HOT_FILTERS]
+)
+def test_filtered_list_uses_index(db, model, column):
+    with captured_statements(db.engine) as statements:
+        query = (
+            db.query(model)
+            .options(*loading_options(model))
+            .filter(getattr(model, column) == 2)
+        )
+        first = paginate(query, model, limit=10, cursor="")
+        assert first["next_cursor"]
+        paginate(query, model, limit=10, cursor=first["next_cursor"])
+        # routes/problems.py・Flask 版の一覧と同じオフセット方式
+        query.order_by(model.created_at.desc()).offset(40).limit(20).all()
+    assert plan_problems(db.engine, statements) == []
+
+
+@pytest.mark.parametrize("model", [Incident, Problem, Change, User])
+def test_keyset_pages_use_index(db, model):
+    with captured_statements(db.engine) as statements:
+        query = db.query(model).options(*loading_options(model))
+        first = paginate(query, model, limit=5, cursor="")
+        assert first["next_cursor"]
+        paginate(query, model, limit=5, cursor=first["next_cursor"])
+    assert plan_problems(db.engine, statements) == []
+
+
+@pytest.mark.parametrize("model", [Incident, Problem, Change])
+def test_detail_children_use_foreign_key_indexes(db, model):
+    with captured_statements(db.engine) as statements:
+        db.get(model, 123, options=loading_options(model, DETAIL))
+    db.expunge_all()
+    assert plan_problems(db.engine, statements) == []
@@ -0,0 +1,115 @@
+import json
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import packages.backend.models.change  # noqa: F401  リレーション解決のため
+from packages.backend.database import Base
+from packages.backend.models.change import ChangeStatus
+from packages.backend.models.incident import IncidentStatus
+from packages.backend.models.problem import ProblemPriority, ProblemStatus
+from packages.backend.utils.reference_data import (
+    ReferenceDataRegistry,
+    reference_data,
+    reference_response,
+)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([ProblemStatus(name="登録済"), ProblemStatus(name="調査中")])
+    session.commit()
+    reference_data.invalidate()
+
+    statements = []
+    event.listen(
+        engine, "before_cursor_execute", lambda *args: statements.append(args[2])
+    )
+    session.statements = statements
+    yield session
+    session.close()
+    reference_data.invalidate()
+
+
+def test_lookups_are_served_from_memory(db):
+    reference_data.load(db, (ProblemStatus,))
+    db.statements.clear()
+
+    table = reference_data.get(db, ProblemStatus)
+    assert table.has_id(1) and not table.has_id(99)
+    assert table.id_for("調査中") == 2
+    assert table.name_for(1) == "登録済"
+    assert db.statements == []
+
+
+def test_cached_body_keeps_each_models_payload(db):
+    db.add_all([IncidentStatus(name="新規"), ChangeStatus(name="申請中")])
+    db.commit()
+    reference_data.load(db, (IncidentStatus, ChangeStatus, ProblemStatus))
+
+    # to_dict を持つモデルは従来の API と同じ形で返す
+    for model in (IncidentStatus, ChangeStatus):
+        body = json.loads(reference_data.get(db, model).body)
+        assert body == [row.to_dict() for row in db.query(model).order_by(model.id)]
+    assert set(json.loads(reference_data.get(db, ChangeStatus).body)[0]) == {
+        "id",
+        "name",
+        "description",
+    }
+    # to_dict のないモデルは全カラム
+    assert "created_at" in json.loads(reference_data.get(db, ProblemStatus).body)[0]
+
+
+def test_commit_invalidates_only_the_changed_table(db):
+    reference_data.load(db, (ProblemStatus, ProblemPriority))
+    before = reference_data.get(db, ProblemStatus).etag
+
+    db.add(ProblemStatus(name="解決済"))
+    db.commit()
+
+    assert reference_data.cached(ProblemStatus) is None
+    assert reference_data.cached(ProblemPriority) is not None
+    table = reference_data.get(db, ProblemStatus)
+    assert table.id_for("解決済") == 3
+    assert table.etag != before
+
+
+def test_rollback_keeps_snapshot_until_reload(db):
+    reference_data.load(db, (ProblemStatus,))
+    db.add(ProblemStatus(name="保留"))
+    db.flush()
+    db.rollback()
+
+    # flush 時に破棄されるが、再読み込み後はロールバック前の内容になる
+    assert reference_data.get(db, ProblemStatus).id_for("保留") is None
+
+
+def test_ttl_expires_snapshot(db):
+    registry = ReferenceDataRegistry(ttl=0)
+    registry.load(db, (ProblemStatus,))
+    assert registry.cached(ProblemStatus) is None
+
+
+def test_reference_response_honours_if_none_match(db):
+    reference_data.load(db, (ProblemStatus,))
+    app = FastAPI()
+
+    @app.get("/statuses/")
+    async def statuses(request: Request):
+        return reference_response(request, reference_data.cached(ProblemStatus))
+
+    client = TestClient(app)
+    first = client.get("/statuses/")
+    assert first.status_code == 200
+    assert [row["name"] for row in first.json()] == ["登録済", "調査中"]
+
+    etag = first.headers["etag"]
+    second = client.get("/statuses/", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.content == b""
@@ -0,0 +1,60 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import packages.backend.models.change  # noqa: F401  リレーション解決のため
+from packages.backend.database import Base
+from packages.backend.models.incident import Incident
+from packages.backend.utils.row_counts import CountMode, count_rows, row_counts
+
+
+def _incident(title):
+    return Incident(
+        title=title, description="test", status_id=1, priority_id=1, reporter_id=1
+    )
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([_incident(f"Incident {i}") for i in range(3)])
+    session.commit()
+    row_counts.invalidate()
+    yield session
+    session.close()
+    row_counts.invalidate()
+
+
+def test_estimated_count_tracks_commits_without_recounting(db):
+    assert count_rows(db, Incident, CountMode.ESTIMATED) == 3
+
+    db.add(_incident("new"))
+    db.commit()
+    db.delete(db.query(Incident).first())
+    db.delete(db.query(Incident).order_by(Incident.id.desc()).first())
+    db.commit()
+
+    # キャッシュ値のみで追従していることを確認するため、COUNT をバイパスした行を追加
+    db.execute(
+        Incident.__table__.insert().values(
+            title="raw", description="raw", status_id=1, priority_id=1, reporter_id=1
+        )
+    )
+    db.commit()
+
+    assert count_rows(db, Incident, CountMode.ESTIMATED) == 2
+    assert count_rows(db, Incident, CountMode.EXACT) == 3
+
+
+def test_rolled_back_inserts_are_not_counted(db):
+    assert count_rows(db, Incident, CountMode.ESTIMATED) == 3
+    db.add(_incident("discarded"))
+    db.flush()
+    db.rollback()
+    assert count_rows(db, Incident, CountMode.ESTIMATED) == 3
+
+
+def test_count_none_skips_counting(db):
+    assert count_rows(db, Incident, CountMode.NONE) is None
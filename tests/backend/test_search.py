@@ -0,0 +1,228 @@
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from packages.backend.database import Base
+from packages.backend.models.change import Change, ChangePriority, ChangeStatus
+from packages.backend.models.incident import (
+    Comment,
+    Incident,
+    IncidentPriority,
+    IncidentStatus,
+)
+from packages.backend.models.problem import Problem, RootCauseAnalysis, Workaround
+from packages.backend.models.user import User
+from packages.backend.schemas.search import SearchResponse
+from packages.backend.utils.search import (
+    ensure_search_index,
+    matching_ids,
+    rebuild_search_index,
+    search,
+    search_index,
+)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        ensure_search_index(connection)
+    session = sessionmaker(bind=engine)()
+    user = User(username="agent", email="agent@example.com", password_hash="x")
+    session.add_all([user, IncidentStatus(name="new"), IncidentPriority(name="high")])
+    session.add_all([ChangeStatus(name="draft"), ChangePriority(name="low")])
+    session.commit()
+    session.user = user
+    yield session
+    session.close()
+
+
+def _incident(db, title, description, **kw):
+    incident = Incident(
+        title=title,
+        description=description,
+        status_id=1,
+        priority_id=1,
+        reporter=db.user,
+        **kw,
+    )
+    db.add(incident)
+    db.commit()
+    return incident
+
+
+def _ids(hits, entity_type="incident"):
+    return [hit.entity_id for hit in hits if hit.entity_type == entity_type]
+
+
+def test_new_rows_are_indexed_on_commit(db):
+    incident = _incident(db, "メールサーバー停止", "SMTP が応答しない")
+
+    hits = search(db, "メールサーバー")
+    assert _ids(hits) == [incident.id]
+    assert "[" in hits[0].snippet or hits[0].title == "メールサーバー停止"
+
+
+def test_child_text_and_updates_are_reindexed(db):
+    incident = _incident(db, "VPN 接続不可", "拠点から接続できない")
+    assert search(db, "証明書") == []
+
+    incident.comments.append(Comment(content="証明書の期限切れが原因", user=db.user))
+    db.commit()
+    assert _ids(search(db, "証明書")) == [incident.id]
+
+    incident.title = "リモートアクセス障害"
+    db.commit()
+    assert _ids(search(db, "リモートアクセス")) == [incident.id]
+    assert search(db, "VPN 接続不可") == []
+
+
+def test_deleted_rows_leave_the_index(db):
+    incident = _incident(db, "プリンタ障害", "印刷できない")
+    db.delete(incident)
+    db.commit()
+    assert search(db, "プリンタ") == []
+
+
+def test_rollback_discards_index_changes(db):
+    _incident(db, "DNS 障害", "名前解決に失敗")
+    db.add(
+        Incident(
+            title="DNS 再発",
+            description="x",
+            status_id=1,
+            priority_id=1,
+            reporter=db.user,
+        )
+    )
+    db.flush()
+    db.rollback()
+    assert len(search(db, "DNS")) == 1
+
+
+def test_title_matches_rank_above_body_matches(db):
+    body_only = _incident(db, "性能劣化", "データベースの応答が遅い")
+    in_title = _incident(db, "データベース停止", "接続不可")
+
+    assert _ids(search(db, "データベース")) == [in_title.id, body_only.id]
+
+
+def test_problem_and_change_text_sources(db):
+    problem = Problem(
+        title="ディスク逼迫",
+        description="ログが肥大化",
+        status_id=1,
+        priority_id=1,
+        reporter=db.user,
+    )
+    problem.root_cause_analyses.append(
+        RootCauseAnalysis(description="ローテート設定漏れ")
+    )
+    problem.workarounds.append(Workaround(description="手動で圧縮"))
+    change = Change(
+        change_number="CHG-0001",
+        title="ログローテート設定変更",
+        description="logrotate を導入",
+        rollback_plan="設定を戻す",
+        status_id=1,
+        priority_id=1,
+        requester=db.user,
+    )
+    db.add_all([problem, change])
+    db.commit()
+
+    hits = search(db, "ローテート")
+    assert {(hit.entity_type, hit.entity_id) for hit in hits} == {
+        ("problem", problem.id),
+        ("change", change.id),
+    }
+    assert _ids(search(db, "ローテート", ["change"]), "change") == [change.id]
+    assert _ids(search(db, "手動で圧縮"), "problem") == [problem.id]
+
+
+def test_short_terms_and_operators_are_matched_literally(db):
+    incident = _incident(db, "AD 認証エラー", 'ユーザー "admin" がロック OR 停止')
+
+    assert _ids(search(db, "AD")) == [incident.id]
+    assert _ids(search(db, '"admin" OR')) == [incident.id]
+    assert search(db, "%") == []
+
+
+def test_matching_ids_filters_list_queries(db):
+    hit = _incident(db, "バックアップ失敗", "夜間ジョブ")
+    _incident(db, "ネットワーク遅延", "夜間ジョブ")
+
+    rows = db.scalars(
+        select(Incident.id).where(
+            Incident.id.in_(matching_ids("incident", "バックアップ"))
+        )
+    )
+    assert list(rows) == [hit.id]
+
+
+def test_rebuild_restores_index(db):
+    _incident(db, "ファイルサーバー容量不足", "容量")
+    db.execute(search_index.delete())
+    db.commit()
+    assert search(db, "ファイルサーバー") == []
+
+    assert rebuild_search_index(db.connection()) == 1
+    db.commit()
+    assert len(search(db, "ファイルサーバー")) == 1
+
+
+def test_writes_without_index_are_not_blocked():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add(User(username="u", email="u@example.com", password_hash="x"))
+    session.add(
+        Incident(title="t", description="d", status_id=1, priority_id=1, reporter_id=1)
+    )
+    session.commit()
+    assert session.scalar(select(func.count(Incident.id))) == 1
+
+
+def test_response_schema_accepts_hits(db):
+    _incident(db, "証明書更新", "期限")
+    response = SearchResponse(query="証明書", results=search(db, "証明書"))
+    assert response.results[0].entity_type == "incident"
+
+
+def test_ensure_indexes_rows_created_before_the_index():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add(User(username="u", email="u@example.com", password_hash="x"))
+    session.add(
+        Incident(
+            title="VPN 接続不可",
+            description="d",
+            status_id=1,
+            priority_id=1,
+            reporter_id=1,
+        )
+    )
+    session.commit()
+
+    with engine.begin() as connection:
+        ensure_search_index(connection)
+    assert _ids(search(session, "VPN 接続")) == [1]
+
+    session.close()
+
+    # 構築済みのインデックスは起動のたびに作り直さない
+    with engine.begin() as connection:
+        connection.execute(
+            Incident.__table__.insert(),
+            {
+                "title": "ORM 外",
+                "description": "d",
+                "status_id": 1,
+                "priority_id": 1,
+                "reporter_id": 1,
+            },
+        )
+        ensure_search_index(connection)
+        assert connection.scalar(select(func.count()).select_from(search_index)) == 1
@@ -0,0 +1,137 @@
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from packages.backend.database import Base
+from packages.backend.models.change import Change, ChangePriority, ChangeStatus
+from packages.backend.models.incident import (
+    Attachment,
+    Comment,
+    Incident,
+    IncidentPriority,
+    IncidentStatus,
+)
+from packages.backend.models.problem import (
+    Problem,
+    ProblemIncidentLink,
+    ProblemPriority,
+    ProblemStatus,
+)
+from packages.backend.models.sequence import TicketSequence
+from packages.backend.models.user import AuditLog, User
+from packages.backend.seed_perf_data import PerfDataSeeder, SeedConfig
+from packages.backend.utils.ticket_numbers import next_ticket_number
+
+CONFIG = SeedConfig(
+    users=10, incidents=300, problems=50, changes=40, audit_logs=100, batch_size=64
+)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        session.add_all(
+            [IncidentStatus(name=name) for name in ("新規", "対応中", "クローズ")]
+            + [ProblemStatus(name=name) for name in ("新規", "解決済み")]
+            + [ChangeStatus(name=name) for name in ("申請中", "完了")]
+            + [IncidentPriority(name=name) for name in ("高", "中", "低")]
+            + [ProblemPriority(name="中"), ChangePriority(name="中")]
+        )
+        session.commit()
+    return engine
+
+
+def _seed(engine, config=CONFIG):
+    with engine.connect() as connection:
+        return PerfDataSeeder(connection, config).run()
+
+
+def _count(session, model):
+    return session.scalar(select(func.count()).select_from(model))
+
+
+def test_requested_volumes_are_inserted(engine):
+    counts = _seed(engine)
+
+    with Session(engine) as session:
+        assert _count(session, User) == 10
+        assert _count(session, Incident) == 300
+        assert _count(session, Problem) == 50
+        assert _count(session, Change) == 40
+        assert _count(session, AuditLog) == 100
+        assert counts["comments"] == _count(session, Comment)
+        assert _count(session, Attachment) > 0
+        assert _count(session, ProblemIncidentLink) >= 50
+
+
+def test_children_reference_existing_parents(engine):
+    _seed(engine)
+    _seed(engine, SeedConfig(users=2, incidents=20, problems=5, changes=5, seed=1))
+
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA foreign_key_check").all() == []
+        orphans = connection.scalar(
+            select(func.count())
+            .select_from(Comment)
+            .where(Comment.incident_id.is_(None), Comment.problem_id.is_(None))
+        )
+        assert orphans == 0
+
+
+def test_same_seed_reproduces_data(engine):
+    other = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=other)
+    with engine.connect() as source, other.connect() as target:
+        for table in Base.metadata.sorted_tables:
+            rows = [row._mapping for row in source.execute(table.select())]
+            if rows:
+                target.execute(table.insert(), rows)
+        target.commit()
+
+    _seed(engine)
+    _seed(other)
+    query = select(Incident.title, Incident.status_id, Incident.assignee_id).order_by(
+        Incident.id
+    )
+    with engine.connect() as a, other.connect() as b:
+        assert a.execute(query).all() == b.execute(query).all()
+
+
+def test_open_ratio_and_assignee_skew(engine):
+    _seed(engine, SeedConfig(users=20, incidents=2000, open_ratio=0.1, problems=0))
+
+    with Session(engine) as session:
+        closed = session.scalar(
+            select(func.count())
+            .select_from(Incident)
+            .join(IncidentStatus)
+            .where(IncidentStatus.name == "クローズ")
+        )
+        busiest = session.execute(
+            select(func.count())
+            .select_from(Incident)
+            .group_by(Incident.assignee_id)
+            .order_by(func.count().desc())
+        ).first()[0]
+    assert 0.85 < closed / 2000 < 0.95
+    assert busiest > 2000 / 20 * 3
+
+
+def test_later_ticket_numbers_do_not_collide(engine):
+    _seed(engine)
+
+    with Session(engine) as session:
+        assert _count(session, TicketSequence) > 0
+        numbers = set(session.scalars(select(Change.change_number)))
+        sequence = session.scalars(
+            select(TicketSequence).where(TicketSequence.prefix == "CHG")
+        ).all()
+        for row in sequence:
+            assert row.last_value >= max(
+                int(number.rsplit("-", 1)[1])
+                for number in numbers
+                if number.startswith(f"CHG-{row.year}-")
+            )
+        assert next_ticket_number(session, "CHG") not in numbers
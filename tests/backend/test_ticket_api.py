@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from packages.backend.database import Base
+from packages.backend.main import (
+    create_change,
+    create_incident,
+    create_problem,
+    get_incidents,
+    update_change,
+    update_problem,
+)
+from packages.backend.models.change import ChangePriority, ChangeStatus
+from packages.backend.models.incident import IncidentPriority, IncidentStatus
+from packages.backend.models.problem import ProblemPriority, ProblemStatus
+from packages.backend.models.user import User
+from packages.backend.schemas.change import Change as ChangeSchema
+from packages.backend.schemas.change import ChangeCreate, ChangeUpdate
+from packages.backend.schemas.incident import Incident as IncidentSchema
+from packages.backend.schemas.incident import IncidentCreate
+from packages.backend.schemas.problem import Problem as ProblemSchema
+from packages.backend.schemas.problem import ProblemCreate, ProblemUpdate
+from packages.backend.utils.reference_data import reference_data
+from packages.backend.utils.row_counts import CountMode
+from packages.backend.utils.ticket_numbers import ticket_numbers
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    url = tmp_path / "tickets.db"
+    sync_engine = create_engine(f"sqlite:///{url}")
+    Base.metadata.create_all(bind=sync_engine)
+    with sessionmaker(bind=sync_engine)() as session:
+        session.add(
+            User(username="alice", email="alice@example.com", password_hash="x")
+        )
+        for model, names in [
+            (IncidentStatus, ["新規", "対応中"]),
+            (IncidentPriority, ["高", "中"]),
+            (ProblemStatus, ["新規", "解決済み"]),
+            (ProblemPriority, ["高", "中"]),
+            (ChangeStatus, ["申請中", "実施中", "完了"]),
+            (ChangePriority, ["高", "中"]),
+        ]:
+            session.add_all(model(name=name) for name in names)
+        session.commit()
+    sync_engine.dispose()
+
+    # 別のテストのデータベースで読み込んだ参照データ・採番ブロックを使わない
+    reference_data.invalidate()
+    ticket_numbers.clear()
+    engine = create_async_engine(f"sqlite+aiosqlite:///{url}")
+    yield async_sessionmaker(bind=engine, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+    reference_data.invalidate()
+
+
+def _run(session_factory, handler, *args):
+    async def scenario():
+        async with session_factory() as db:
+            return await handler(*args, db=db, current_user=None)
+
+    return asyncio.run(scenario())
+
+
+def test_creates_assign_ticket_numbers_and_default_references(session_factory):
+    incident = _run(
+        session_factory,
+        create_incident,
+        IncidentCreate(title="t", description="d", reporter_id=1),
+    )
+    problem = _run(
+        session_factory,
+        create_problem,
+        ProblemCreate(title="t", description="d", reporter_id=1),
+    )
+    change = _run(
+        session_factory,
+        create_change,
+        ChangeCreate(title="t", description="d", requester_id=1),
+    )
+
+    incident = IncidentSchema.model_validate(incident)
+    assert incident.incident_number.startswith("INC-")
+    assert (incident.status.name, incident.priority.name) == ("新規", "中")
+    assert incident.reporter.username == "alice"
+
+    problem = ProblemSchema.model_validate(problem)
+    assert problem.problem_number.startswith("PRB-")
+    assert (problem.status.name, problem.priority.name) == ("新規", "中")
+
+    change = ChangeSchema.model_validate(change)
+    assert change.change_number.startswith("CHG-")
+    assert (change.status.name, change.priority.name) == ("申請中", "中")
+    assert change.requester.username == "alice"
+
+
+def test_list_validates_against_response_schema(session_factory):
+    for title in ("a", "b"):
+        _run(
+            session_factory,
+            create_incident,
+            IncidentCreate(title=title, description="d", reporter_id=1),
+        )
+
+    page = _run(session_factory, get_incidents, 0, 10, "", CountMode.EXACT)
+    assert [item.title for item in page.items] == ["b", "a"]
+    assert page.items[0].status.name == "新規"
+
+
+def test_updates_validate_references_and_track_status_times(session_factory):
+    _run(
+        session_factory,
+        create_problem,
+        ProblemCreate(title="t", description="d", reporter_id=1),
+    )
+    _run(
+        session_factory,
+        create_change,
+        ChangeCreate(title="t", description="d", requester_id=1),
+    )
+
+    problem = _run(session_factory, update_problem, 1, ProblemUpdate(status_id=2))
+    assert problem.status.name == "解決済み"
+    assert problem.resolved_at is not None
+
+    change = _run(session_factory, update_change, 1, ChangeUpdate(status_id=2))
+    assert change.actual_start is not None and change.actual_end is None
+
+    with pytest.raises(HTTPException) as excinfo:
+        _run(session_factory, update_change, 1, ChangeUpdate(priority_id=99))
+    assert excinfo.value.status_code == 400
+    with pytest.raises(HTTPException):
+        _run(session_factory, update_change, 1, ChangeUpdate(status_id=None))
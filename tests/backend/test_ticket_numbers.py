@@ -0,0 +1,104 @@
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import packages.backend.models.change  # noqa: F401  リレーション解決のため
+from packages.backend.database import Base
+from packages.backend.models.incident import Incident
+from packages.backend.models.sequence import TicketSequence
+from packages.backend.utils.ticket_numbers import TicketNumberAllocator
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'seq.db'}", connect_args={"timeout": 30}
+    )
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def _last_value(session_factory, prefix, year):
+    with session_factory() as db:
+        return db.get(TicketSequence, (prefix, year)).last_value
+
+
+def test_numbers_are_sequential_per_prefix_and_year(session_factory):
+    allocator = TicketNumberAllocator(block_size=1)
+    with session_factory() as db:
+        assert allocator.reserve(db, "INC", year=2025) == ["INC-2025-0001"]
+        assert allocator.reserve(db, "INC", year=2025) == ["INC-2025-0002"]
+        assert allocator.reserve(db, "PRB", year=2025) == ["PRB-2025-0001"]
+        assert allocator.reserve(db, "INC", year=2026) == ["INC-2026-0001"]
+        db.commit()
+
+
+def test_block_is_cached_only_after_commit(session_factory):
+    allocator = TicketNumberAllocator(block_size=10)
+    with session_factory() as db:
+        assert allocator.reserve(db, "CHG", year=2025) == ["CHG-2025-0001"]
+        db.rollback()
+        assert allocator.reserve(db, "CHG", year=2025) == ["CHG-2025-0001"]
+        db.commit()
+        # 以降はプロセス内のブロックから払い出され、シーケンス行は更新されない
+        assert allocator.reserve(db, "CHG", 3, year=2025) == [
+            "CHG-2025-0002",
+            "CHG-2025-0003",
+            "CHG-2025-0004",
+        ]
+        db.commit()
+    assert _last_value(session_factory, "CHG", 2025) == 10
+
+
+def test_new_sequence_continues_after_highest_issued_number(session_factory):
+    allocator = TicketNumberAllocator(block_size=1)
+    with session_factory() as db:
+        db.execute(
+            Incident.__table__.insert(),
+            [
+                {
+                    "incident_number": number,
+                    "title": number,
+                    "description": "",
+                    "status_id": 1,
+                    "priority_id": 1,
+                    "reporter_id": 1,
+                }
+                # 0001〜0009 の大半が削除済みで、件数（3）は最大番号を下回る
+                for number in ["INC-2025-0002", "INC-2025-0009", "INC-2024-0042"]
+            ],
+        )
+        assert allocator.reserve(
+            db, "INC", column=Incident.incident_number, year=2025
+        ) == ["INC-2025-0010"]
+        assert allocator.reserve(
+            db, "INC", column=Incident.incident_number, year=2026
+        ) == ["INC-2026-0001"]
+        db.commit()
+
+
+def test_concurrent_reservations_never_collide(session_factory):
+    allocator = TicketNumberAllocator(block_size=1)
+    issued = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(20):
+            with session_factory() as db:
+                numbers = allocator.reserve(db, "INC", 2, year=2025)
+                db.commit()
+            with lock:
+                issued.extend(numbers)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(issued) == 160
+    assert len(set(issued)) == 160
+    assert _last_value(session_factory, "INC", 2025) == 160
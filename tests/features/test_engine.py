@@ -0,0 +1,413 @@
+import asyncio
+import random
+
+import pytest
+
+# 特徴量エンジンは import 時に NumPy を読み込む
+pytest.importorskip("numpy")
+
+import features.engine as engine  # noqa: E402
+from features.engine import (  # noqa: E402
+    EventBuffer,
+    FeatureCache,
+    FeatureEngine,
+    KeyWindowState,
+    ProcessWindowFunction,
+    RedisFeatureWriter,
+    WindowConfig,
+    WindowedFeatureAggregator,
+)
+
+NOW = 1_700_000_000.0  # バケット幅 60 秒の境界（28333333 番目のバケットの先頭）
+
+
+def _aggregator(now=NOW):
+    clock = {"now": now}
+    aggregator = WindowedFeatureAggregator(
+        60.0, (300, 3600), clock=lambda: clock["now"]
+    )
+    return aggregator, clock
+
+
+def _login(user, ip, at, success=True):
+    return {
+        "event_type": "login_attempt",
+        "user_id": user,
+        "source_ip": ip,
+        "success": success,
+        "timestamp": at,
+    }
+
+
+def _session(user, ip, at, duration):
+    return {
+        "event_type": "session_end",
+        "user_id": user,
+        "source_ip": ip,
+        "duration_seconds": duration,
+        "timestamp": at,
+    }
+
+
+def test_bucket_leaves_each_window_separately():
+    state = KeyWindowState((5, 60))
+    assert state.add(100, attempts=2)
+
+    assert state.advance(104) is False
+    assert [t.attempts for t in state.totals] == [2, 2]
+    # 5 バケット後に短いウィンドウから、60 バケット後に長いウィンドウから外れる
+    assert state.advance(105) is True
+    assert [t.attempts for t in state.totals] == [0, 2]
+    assert state.advance(159) is False
+    assert state.advance(160) is True
+    assert [t.attempts for t in state.totals] == [0, 0]
+
+
+def test_late_events_within_ring_count_only_in_covering_windows():
+    state = KeyWindowState((5, 60))
+    state.add(100, attempts=1)
+
+    assert state.add(93, attempts=1)
+    assert [t.attempts for t in state.totals] == [1, 2]
+    # リングより古いイベントは捨てる
+    assert state.add(40, attempts=1) is False
+    assert [t.attempts for t in state.totals] == [1, 2]
+
+
+def test_features_per_window():
+    aggregator, _ = _aggregator()
+    events = [
+        _login("alice", "10.0.0.1", NOW - 30, success=False),
+        _login("alice", "10.0.0.2", NOW - 30, success=True),
+        _login("alice", "10.0.0.1", NOW - 1000, success=False),
+        _session("alice", "10.0.0.3", NOW - 10, 10.0),
+        _session("alice", "10.0.0.3", NOW - 20, 30.0),
+        _login("bob", "10.0.0.1", NOW - 5),
+    ]
+    for event in events:
+        aggregator.add_event(event)
+
+    alice = aggregator.features(("user", "alice"))
+    assert alice["user_login_attempts_300s"] == 2
+    assert alice["user_login_failures_300s"] == 1
+    assert alice["user_failure_rate_300s"] == 0.5
+    assert alice["user_login_attempts_3600s"] == 3
+    assert alice["user_failure_rate_3600s"] == pytest.approx(2 / 3)
+    assert alice["user_distinct_ips_300s"] == 3
+    assert alice["user_session_count_300s"] == 2
+    assert alice["user_session_mean_300s"] == 20.0
+    assert alice["user_session_std_300s"] == pytest.approx(10.0)
+
+    ip = aggregator.features(("ip", "10.0.0.1"))
+    assert ip["ip_distinct_users_300s"] == 2
+    assert ip["ip_login_attempts_3600s"] == 3
+
+
+def test_single_session_has_zero_std():
+    aggregator, _ = _aggregator()
+    aggregator.add_event(_session("alice", "10.0.0.1", NOW - 10, 12.5))
+
+    features = aggregator.features(("user", "alice"))
+    assert features["user_session_mean_300s"] == 12.5
+    assert features["user_session_std_300s"] == 0.0
+
+
+def test_future_timestamps_are_clamped_to_the_clock():
+    aggregator, _ = _aggregator()
+    aggregator.add_event(_login("mallory", "10.0.0.9", NOW + 10**9))
+    aggregator.collect()
+
+    # 未来の時刻でウィンドウが進みすぎず、後続の正しいイベントも数えられる
+    aggregator.add_event(_login("mallory", "10.0.0.9", NOW))
+    features = aggregator.features(("user", "mallory"))
+    assert features["user_login_attempts_300s"] == 2
+
+
+def test_idle_keys_decay_and_are_evicted():
+    aggregator, clock = _aggregator()
+    aggregator.add_event(_login("alice", "10.0.0.1", NOW, success=False))
+    first = aggregator.collect()
+    assert first["feature:user_login_failures_300s:alice"] == 1
+
+    # alice にイベントがなくても、時間が進めば 300 秒ウィンドウから外れて再出力される
+    clock["now"] = NOW + 400
+    aggregator.add_event(_login("bob", "10.0.0.2", NOW + 400))
+    second = aggregator.collect()
+    assert second["feature:user_login_failures_300s:alice"] == 0
+    assert second["feature:user_login_failures_3600s:alice"] == 1
+
+    # 何も変わらないフラッシュでは出力しない
+    assert aggregator.collect() == {}
+
+    # 最大ウィンドウからも外れたら 0 を出力して状態を破棄する
+    clock["now"] = NOW + 3700
+    aggregator.add_event(_login("bob", "10.0.0.2", NOW + 3700))
+    third = aggregator.collect()
+    assert third["feature:user_login_failures_3600s:alice"] == 0
+    assert third["feature:ip_distinct_users_3600s:10.0.0.1"] == 0
+    assert ("user", "alice") not in aggregator.states
+    assert ("ip", "10.0.0.1") not in aggregator.states
+    assert ("user", "bob") in aggregator.states
+
+
+def test_flush_releases_key_codes():
+    config = WindowConfig(batch_size=10)
+    window = ProcessWindowFunction(config)
+    emitted = {}
+
+    async def sink(features):
+        emitted.update(features)
+
+    window.sink = sink
+
+    async def scenario():
+        await window.process_batch([_login(f"u{i}", "10.0.0.1", NOW) for i in range(3)])
+        await window.flush()
+
+    window.aggregator.clock = lambda: NOW
+    asyncio.run(scenario())
+
+    assert emitted["feature:ip_distinct_users_300s:10.0.0.1"] == 3
+    assert window.aggregator.users.names == []
+    assert emitted["feature:user_failure_rate_300s:u0"] == 0.0
+
+
+def _random_events(rng, count):
+    return [
+        {
+            "event_type": rng.choice(["login_attempt", "session_end", "other", None]),
+            "user_id": rng.choice(["alice", "bob", "carol", 42, "", None]),
+            "source_ip": rng.choice(["10.0.0.1", "10.0.0.2", "", None]),
+            "success": rng.random() < 0.6,
+            "severity": rng.choice(["high", "low", None]),
+            "duration_seconds": rng.random() * 100,
+            # 複数のバケットにまたがり、一部はリングより古い
+            "timestamp": NOW - rng.random() * 5000,
+        }
+        for _ in range(count)
+    ]
+
+
+def _assert_same_features(actual, expected):
+    assert actual.keys() == expected.keys()
+    for key, value in expected.items():
+        assert actual[key] == pytest.approx(value, abs=1e-6), key
+
+
+def test_batch_aggregation_matches_per_event_path():
+    events = _random_events(random.Random(7), 2000)
+
+    per_event, _ = _aggregator()
+    for event in events:
+        per_event.add_event(event)
+    batch, _ = _aggregator()
+    batch.add_batch(events)
+
+    actual = batch.collect()
+    assert not any(key.endswith(":") for key in actual)
+    _assert_same_features(actual, per_event.collect())
+
+
+def test_event_buffer_grows_and_is_reused_after_flush():
+    rng = random.Random(11)
+    per_event, _ = _aggregator()
+    columnar, _ = _aggregator()
+    buffer = EventBuffer(4, columnar.users, columnar.ips)
+
+    for _ in range(2):
+        events = _random_events(rng, 500)
+        # 1件ずつの追加とまとめての追加を混ぜて、容量の拡張をまたがせる
+        for event in events[:3]:
+            buffer.append(event)
+        buffer.extend(events[3:250])
+        for event in events[250:260]:
+            buffer.append(event)
+        buffer.extend(events[260:])
+        assert len(buffer) == 500
+
+        for event in events:
+            per_event.add_event(event)
+        columnar.add_columns(buffer.columns())
+        _assert_same_features(columnar.collect(), per_event.collect())
+
+        # フラッシュ後は配列を確保し直さずに使い回す
+        capacity = buffer.capacity
+        timestamps = buffer.timestamps
+        buffer.clear()
+        assert len(buffer) == 0
+        assert buffer.capacity == capacity >= 500
+        assert buffer.timestamps is timestamps
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def setex(self, key, ttl, value):
+        self.commands.append((key, value))
+
+    async def execute(self):
+        await asyncio.sleep(self.redis.latency)
+        if self.redis.errors:
+            raise self.redis.errors.pop(0)
+        self.redis.data.update(self.commands)
+        self.redis.pipelines += 1
+        return [True] * len(self.commands)
+
+
+class FakeRedis:
+    def __init__(self, latency=0.0, errors=()):
+        self.latency = latency
+        self.errors = list(errors)
+        self.data = {}
+        self.pipelines = 0
+        self.mgets = []
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+    async def mget(self, keys):
+        self.mgets.append(list(keys))
+        return [self.data.get(key) for key in keys]
+
+
+def test_writer_coalesces_updates_per_key():
+    redis = FakeRedis()
+    writer = RedisFeatureWriter(ttl=60, interval=0.01, batch_size=2)
+
+    async def scenario():
+        writer.start(redis)
+        for value in range(100):
+            await writer.submit({"feature:a:1": value, "feature:b:1": -value})
+        await writer.stop()
+
+    asyncio.run(scenario())
+    assert redis.data == {"feature:a:1": "99", "feature:b:1": "-99"}
+    assert redis.pipelines == 1
+
+
+def test_writer_stop_keeps_batch_in_flight():
+    redis = FakeRedis(latency=0.05)
+    writer = RedisFeatureWriter(ttl=60, interval=0.01, batch_size=10)
+
+    async def scenario():
+        writer.start(redis)
+        await writer.submit({f"feature:a:{i}": i for i in range(25)})
+        await asyncio.sleep(0.02)  # 最初のバッチの execute 中に止める
+        await writer.stop()
+
+    asyncio.run(scenario())
+    assert len(redis.data) == 25
+    assert writer.pending == {}
+
+
+def test_submit_waits_while_pending_is_full():
+    redis = FakeRedis(latency=0.05)
+    # 周期では書き込まれない間隔にして、上限超過による書き込みだけを見る
+    writer = RedisFeatureWriter(ttl=60, interval=10.0, batch_size=4, max_pending=8)
+
+    async def scenario():
+        writer.start(redis)
+        await writer.submit({f"feature:a:{i}": i for i in range(8)})
+        assert redis.pipelines == 0  # 上限ちょうどまでは待たない
+
+        blocked = asyncio.create_task(writer.submit({"feature:a:8": 8}))
+        await asyncio.sleep(0.03)
+        assert not blocked.done()  # 最初のバッチの書き込み中は待たされる
+        assert redis.pipelines == 0
+
+        await asyncio.wait_for(blocked, 1.0)
+        # 上限の半分（4件）以下まで減った時点で再開する
+        resumed_after = redis.pipelines
+        await writer.stop()
+        return resumed_after
+
+    assert asyncio.run(scenario()) >= 2
+    assert len(redis.data) == 9
+    assert writer.pending == {}
+
+
+def test_cancelled_batch_is_restored():
+    redis = FakeRedis(latency=1.0)
+    writer = RedisFeatureWriter(ttl=60, batch_size=10)
+    writer.client = redis
+
+    async def scenario():
+        await writer.submit({"feature:a:1": 1})
+        task = asyncio.create_task(writer.flush())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert writer.pending == {"feature:a:1": 1}
+
+
+def test_writer_survives_unexpected_errors():
+    redis = FakeRedis(errors=[RuntimeError("boom")])
+    writer = RedisFeatureWriter(ttl=60, interval=0.01)
+
+    async def scenario():
+        writer.start(redis)
+        await writer.submit({"feature:a:1": 1})
+        await asyncio.sleep(0.1)
+        alive = not writer._task.done()
+        await writer.stop()
+        return alive
+
+    assert asyncio.run(scenario())
+    assert redis.data == {"feature:a:1": "1"}
+
+
+def test_feature_cache_evicts_least_recently_used():
+    cache = FeatureCache(maxsize=2, ttl=60)
+    cache.update({"feature:a:1": 1.0, "feature:b:1": None})
+    assert cache.lookup("feature:a:1") == (True, 1.0)
+
+    cache.update({"feature:c:1": 3.0})
+    # 直前に参照した a は残り、最も古い b が追い出される
+    assert len(cache) == 2
+    assert cache.lookup("feature:b:1") == (False, None)
+    assert cache.lookup("feature:a:1") == (True, 1.0)
+    assert cache.lookup("feature:c:1") == (True, 3.0)
+
+
+def test_feature_cache_entries_expire(monkeypatch):
+    clock = {"now": 100.0}
+    monkeypatch.setattr(engine.time, "monotonic", lambda: clock["now"])
+    cache = FeatureCache(maxsize=10, ttl=5)
+    cache.update({"feature:a:1": 1.0, "feature:b:1": None})
+
+    clock["now"] = 104.9
+    assert cache.lookup("feature:b:1") == (True, None)  # 値なしもキャッシュする
+    clock["now"] = 105.0
+    assert cache.lookup("feature:a:1") == (False, None)
+    assert len(cache) == 1
+
+
+def test_get_features_batches_misses_into_one_mget(monkeypatch):
+    monkeypatch.setattr(engine, "start_http_server", lambda port: None)
+    feature_engine = FeatureEngine(config=WindowConfig(cache_size=100))
+    redis = FakeRedis()
+    redis.data = {"feature:a:1": "1.5", "feature:b:1": "not-a-number"}
+    feature_engine.redis_pool = redis
+
+    requests = [("a", "1"), ("b", "1"), ("c", "1")]
+    first = asyncio.run(feature_engine.get_features(requests))
+    assert first == {("a", "1"): 1.5, ("b", "1"): None, ("c", "1"): None}
+    assert redis.mgets == [["feature:a:1", "feature:b:1", "feature:c:1"]]
+
+    # a と値なしの c はキャッシュから返し、変換できなかった b と新しい d だけを取りに行く
+    second = asyncio.run(feature_engine.get_features(requests + [("d", "1")]))
+    assert second[("a", "1")] == 1.5
+    assert redis.mgets[1] == ["feature:b:1", "feature:d:1"]
+    assert asyncio.run(feature_engine.get_feature("a", "1")) == 1.5
+    assert len(redis.mgets) == 2